@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""Compare a per-item loop with FunctestStore.aggregate to compute pass rates.
+
+Both compute the number of items, the pass rate and the median
+duration of the items grouped by the fields of the store and by
+day. The time of the loop includes the parsing of the dates of
+the items, which the store does once when items are added.
+
+Then, new items are loaded together with some of the items already
+in the store, like the ones of a fetch that overlaps the previous
+one, and the aggregations are calculated again: from the columns
+and from the running aggregations of the grouping, tracked with
+`FunctestStore.track`.
+"""
+
+import argparse
+import collections
+import datetime
+import json
+import statistics
+import time
+
+from perceval.backends.opnfv.functest import parse_start_date
+from perceval.backends.opnfv.store import FunctestStore
+
+from synthetic import build_page
+
+
+BUCKET = 24 * 60 * 60
+
+# Selects all the items, so the aggregations are calculated from the columns
+FROM_DATE = datetime.datetime(1970, 1, 1)
+
+
+def build_items(nitems, page_size):
+    for page in range(1, nitems // page_size + 1):
+        for result in json.loads(build_page(page_size, page=page))['results']:
+            yield {'uuid': result['_id'], 'data': result}
+
+
+def aggregate_loop(items):
+    groups = collections.defaultdict(list)
+
+    for item in items:
+        data = item['data']
+        start = parse_start_date(data['start_date']).timestamp()
+        stop = parse_start_date(data['stop_date']).timestamp()
+        key = tuple(data[field] for field in FunctestStore.GROUP_BY) + (start // BUCKET,)
+        groups[key].append((data['criteria'] == FunctestStore.PASS, stop - start))
+
+    return [
+        (key, len(values), 100 * sum(p for p, _ in values) / len(values),
+         statistics.median(d for _, d in values))
+        for key, values in groups.items()
+    ]
+
+
+def aggregate_store(store):
+    return store.aggregate(bucket=BUCKET, percentiles=[50])
+
+
+def aggregate_columns(store):
+    return store.aggregate(bucket=BUCKET, percentiles=[50], from_date=FROM_DATE)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=200000,
+                        help="number of items")
+    parser.add_argument('--page-size', type=int, default=1000,
+                        help="number of items decoded at once")
+    parser.add_argument('--new-items', type=int, default=1000,
+                        help="number of items added before aggregating again")
+    parser.add_argument('--overlap', type=int, default=1000,
+                        help="number of items already in the store loaded again with the new ones")
+    args = parser.parse_args()
+
+    all_items = list(build_items(args.items + args.new_items, args.page_size))
+    items = all_items[:args.items]
+
+    groups, elapsed = timed(aggregate_loop, items)
+    print("%-24s %8.2f s  %d groups" % ('loop', elapsed, len(groups)))
+
+    store, elapsed = timed(FunctestStore, items)
+    print("%-24s %8.2f s" % ('FunctestStore load', elapsed))
+
+    groups, elapsed = timed(aggregate_store, store)
+    print("%-24s %8.2f s  %d groups" % ('FunctestStore aggregate', elapsed, len(groups)))
+
+    _, elapsed = timed(store.track, None, BUCKET)
+    print("%-24s %8.2f s" % ('FunctestStore track', elapsed))
+
+    update = all_items[args.items - args.overlap:]
+    nitems, elapsed = timed(store.load, update)
+    print("%-24s %8.2f s  %d items, %d loaded" % ('load update', elapsed, nitems, len(update)))
+
+    columns, elapsed = timed(aggregate_columns, store)
+    print("%-24s %8.2f s  %d groups" % ('aggregate after update', elapsed, len(columns)))
+
+    groups, elapsed = timed(aggregate_store, store)
+    print("%-24s %8.2f s  %d groups" % ('tracked after update', elapsed, len(groups)))
+
+    if groups != columns:
+        print("tracked aggregations differ from the ones of the columns")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""Compare the size and replay speed of Functest archives with and without compressed pages.
+
+Two archives are written fetching the same synthetic pages from a
+local stand-in server, one of them storing the pages compressed.
+Then, both are replayed with `Functest.fetch_from_archive`. The
+time of each replay is the best of several runs.
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+from perceval.archive import Archive
+from perceval.backends.opnfv.functest import Functest
+
+from server import FunctestStandIn
+
+
+FROM_DATE = datetime.datetime(2017, 1, 1)
+
+
+def write_archive(url, archive_path, compress_archive):
+    functest = Functest(url, archive=Archive.create(archive_path), workers=8,
+                        compress_archive=compress_archive)
+    for _ in functest.fetch(from_date=FROM_DATE):
+        pass
+
+    return os.path.getsize(archive_path)
+
+
+def replay(url, archive_path, repeat):
+    best = None
+
+    for _ in range(repeat):
+        functest = Functest(url, archive=Archive(archive_path))
+
+        start = time.perf_counter()
+        nitems = sum(1 for _ in functest.fetch_from_archive())
+        elapsed = time.perf_counter() - start
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return nitems, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=500,
+                        help="number of pages of the archive")
+    parser.add_argument('--page-size', type=int, default=100,
+                        help="number of results per page")
+    parser.add_argument('--details-depth', type=int, default=None,
+                        help="number of modules in the details of each result")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="number of replays of each archive")
+    args = parser.parse_args()
+
+    tmp_path = tempfile.mkdtemp(prefix='functest-bench_')
+
+    try:
+        with FunctestStandIn(total_pages=args.pages, page_size=args.page_size,
+                             details_depth=args.details_depth) as standin:
+            standin.preload()
+            url = standin.url
+
+            archives = []
+            for name, compress_archive in (('uncompressed', False), ('compressed', True)):
+                archive_path = os.path.join(tmp_path, name + '.sqlite3')
+                size = write_archive(url, archive_path, compress_archive)
+                archives.append((name, archive_path, size))
+
+        baseline_size, baseline_time = None, None
+        for name, archive_path, size in archives:
+            nitems, elapsed = replay(url, archive_path, args.repeat)
+            baseline_size = baseline_size or size
+            baseline_time = baseline_time or elapsed
+            print("%-14s %9.1f MiB  x%.2f size  %8d items  %7.2f s  %10.0f items/s  x%.2f time" %
+                  (name, size / 2 ** 20, size / baseline_size, nitems, elapsed,
+                   nitems / elapsed, elapsed / baseline_time))
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
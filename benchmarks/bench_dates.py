@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Measure the conversion of start dates of Functest items to timestamps.
+
+The general purpose parser is compared with the parser of the
+backend, with and without its cache. Items are generated so groups
+of them share the same start second, like the results of a CI run.
+"""
+
+import argparse
+import datetime
+import time
+
+from grimoirelab_toolkit.datetime import str_to_datetime
+
+from perceval.backends.opnfv.functest import (FUNCTEST_DATETIME_FORMAT,
+                                              Functest,
+                                              parse_start_date)
+
+
+def build_items(nitems, shared):
+    start = datetime.datetime(2017, 6, 1)
+    return [
+        {'start_date': (start + datetime.timedelta(seconds=i // shared)).strftime(FUNCTEST_DATETIME_FORMAT)}
+        for i in range(nitems)
+    ]
+
+
+def general(items):
+    for item in items:
+        str_to_datetime(item['start_date']).timestamp()
+
+
+def uncached(items):
+    for item in items:
+        parse_start_date.__wrapped__(item['start_date']).timestamp()
+
+
+def cached(items):
+    parse_start_date.cache_clear()
+    for item in items:
+        Functest.metadata_updated_on(item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000,
+                        help="number of items")
+    parser.add_argument('--shared', type=int, default=10,
+                        help="number of items that share each start date")
+    args = parser.parse_args()
+
+    items = build_items(args.items, args.shared)
+
+    baseline = None
+    for name, func in (('str_to_datetime', general),
+                       ('fast path', uncached),
+                       ('fast path + cache', cached)):
+        start = time.perf_counter()
+        func(items)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print("%-18s %8.2f ms  %6.2f us/item  x%.1f" %
+              (name, elapsed * 1000, elapsed * 10 ** 6 / args.items, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
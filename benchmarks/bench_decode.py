@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Compare decoding Functest pages twice against decoding them once.
+
+Before, each page was decoded by `FunctestClient.results` to read
+its pagination and decoded again by `Functest.parse_json` to get
+its results. Now, pages are decoded once. This script measures
+both strategies on pages built scaling up the test fixtures.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from synthetic import build_page
+
+
+def decode_twice(raw):
+    content = raw.decode('utf-8')
+    pagination = json.loads(content)['pagination']
+    results = json.loads(content)['results']
+    return pagination, results
+
+
+def decode_once(raw):
+    content = json.loads(raw)
+    return content['pagination'], content['results']
+
+
+def measure(func, raw, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(raw)
+    elapsed = (time.perf_counter() - start) / rounds
+
+    tracemalloc.start()
+    func(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=2000,
+                        help="number of results per page")
+    parser.add_argument('--rounds', type=int, default=20,
+                        help="number of times each page is decoded")
+    args = parser.parse_args()
+
+    raw = build_page(args.items)
+    print("page size: %.2f MB" % (len(raw) / 2 ** 20))
+
+    for name, func in (('twice', decode_twice), ('once', decode_once)):
+        elapsed, peak = measure(func, raw, args.rounds)
+        print("%-6s %8.2f ms/page  peak %7.2f MB" % (name, elapsed * 1000, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""Compare the export of Functest items with the default JSON output.
+
+Items are built from synthetic pages and written as the pretty
+JSON documents of the `perceval` command and with each format of
+`FunctestExporter`. The script reports the time, the throughput
+and the size of the file of each one.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from perceval.backends.opnfv.export import EXPORT_FORMATS, FunctestExporter
+from perceval.backends.opnfv.functest import Functest
+
+from synthetic import build_page
+
+
+def build_items(nitems, page_size, details_depth):
+    backend = Functest('http://example.com/')
+    items = []
+
+    for page in range(1, nitems // page_size + 1):
+        raw_json = build_page(page_size, page=page, details_depth=details_depth).decode('utf-8')
+        items.extend(backend.metadata(result) for result in Functest.parse_json(raw_json))
+
+    return items
+
+
+def dump_json(items, path):
+    with open(path, 'w') as fd:
+        for item in items:
+            fd.write(json.dumps(item, indent=4, sort_keys=True))
+            fd.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000,
+                        help="number of items")
+    parser.add_argument('--page-size', type=int, default=100,
+                        help="number of items of each synthetic page")
+    parser.add_argument('--details-depth', type=int, default=None,
+                        help="number of modules in the details of each result")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="number of rows written at once by the exporter")
+    args = parser.parse_args()
+
+    items = build_items(args.items, args.page_size, args.details_depth)
+
+    runs = [('json (pretty)', 'items.json', dump_json)]
+    for fmt in EXPORT_FORMATS:
+        filename = 'items.%s' % fmt if fmt == 'parquet' else 'items.%s.gz' % fmt
+
+        def export(items, path, fmt=fmt):
+            with FunctestExporter(path, fmt=fmt, batch_size=args.batch_size) as exporter:
+                exporter.export(items)
+
+        runs.append((fmt, filename, export))
+
+    tmp_path = tempfile.mkdtemp(prefix='functest-bench_')
+
+    try:
+        baseline = None
+        for name, filename, func in runs:
+            path = os.path.join(tmp_path, filename)
+
+            start = time.perf_counter()
+            try:
+                func(items, path)
+            except Exception as e:
+                print("%-14s skipped: %s" % (name, e))
+                continue
+            elapsed = time.perf_counter() - start
+
+            baseline = baseline or elapsed
+            print("%-14s %8.2f s  %10.0f items/s  %8.2f MB  x%.1f" %
+                  (name, elapsed, len(items) / elapsed,
+                   os.path.getsize(path) / 2 ** 20, baseline / elapsed))
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Measure the latency per page of FunctestClient with and without pooled connections.
+
+Pages are served by a local stand-in server which simulates the cost
+of opening new connections. Each configuration fetches the same
+query; the script reports the mean time per page, the number of
+connections opened and the bytes transferred.
+"""
+
+import argparse
+import datetime
+import time
+
+from perceval.backends.opnfv.functest import FunctestClient
+
+from server import FunctestStandIn
+
+
+CONFIGURATIONS = [
+    ('no pooling', {'keep_alive': False, 'compress': False}),
+    ('keep-alive', {'keep_alive': True, 'compress': False}),
+    ('keep-alive + gzip', {'keep_alive': True, 'compress': True}),
+]
+
+
+def run(standin, workers, options):
+    client = FunctestClient(standin.url, workers=workers, **options)
+    from_date = datetime.datetime(2017, 1, 1)
+
+    npages = 0
+    start = time.perf_counter()
+    for _ in client.results(from_date=from_date):
+        npages += 1
+    elapsed = time.perf_counter() - start
+
+    return elapsed / npages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50,
+                        help="number of pages of the query")
+    parser.add_argument('--page-size', type=int, default=100,
+                        help="number of results per page")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of workers of the client")
+    parser.add_argument('--connect-delay', type=float, default=0.02,
+                        help="seconds spent opening each connection")
+    args = parser.parse_args()
+
+    for name, options in CONFIGURATIONS:
+        with FunctestStandIn(total_pages=args.pages, page_size=args.page_size,
+                             connect_delay=args.connect_delay) as standin:
+            standin.preload()
+            per_page = run(standin, args.workers, options)
+            print("%-18s %8.2f ms/page  %4d connections  %8.2f MB" %
+                  (name, per_page * 1000, standin.nconnections, standin.nbytes / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
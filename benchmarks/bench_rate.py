@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Compare the fixed retry policy of FunctestClient with the adaptive rate limiter.
+
+Pages are served by a local stand-in server which throttles the
+requests above a number of concurrent ones and fails some others
+at random. The script reports whether each configuration fetched
+the whole query, its time and the number of failed requests.
+"""
+
+import argparse
+import datetime
+import time
+
+import requests
+
+from perceval.backends.opnfv.functest import FunctestClient
+
+from server import FunctestStandIn
+
+
+CONFIGURATIONS = [
+    ('fixed retries', {'adaptive_rate': False}),
+    ('adaptive rate', {'adaptive_rate': True}),
+]
+
+
+def run(standin, workers, options):
+    client = FunctestClient(standin.url, workers=workers, **options)
+    from_date = datetime.datetime(2017, 1, 1)
+
+    npages = 0
+    start = time.perf_counter()
+    try:
+        for _ in client.results(from_date=from_date):
+            npages += 1
+        outcome = 'completed'
+    except requests.exceptions.RequestException as e:
+        outcome = 'failed (%s)' % e.__class__.__name__
+
+    return outcome, npages, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=100,
+                        help="number of pages of the query")
+    parser.add_argument('--page-size', type=int, default=10,
+                        help="number of results per page")
+    parser.add_argument('--workers', type=int, default=8,
+                        help="number of workers of the client")
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="seconds the server takes to reply")
+    parser.add_argument('--max-in-flight', type=int, default=3,
+                        help="concurrent requests accepted by the server")
+    parser.add_argument('--error-rate', type=float, default=0.05,
+                        help="fraction of requests failing at random")
+    parser.add_argument('--retry-after', type=float, default=1,
+                        help="seconds sent in the Retry-After header")
+    args = parser.parse_args()
+
+    for name, options in CONFIGURATIONS:
+        with FunctestStandIn(total_pages=args.pages, page_size=args.page_size,
+                             latency=args.latency, error_rate=args.error_rate,
+                             max_in_flight=args.max_in_flight,
+                             retry_after=args.retry_after) as standin:
+            standin.preload()
+            outcome, npages, elapsed = run(standin, args.workers, options)
+            print("%-14s %-24s %4d/%d pages  %7.2f s  %4d failed requests" %
+                  (name, outcome, npages, args.pages, elapsed, standin.nfailures))
+
+
+if __name__ == '__main__':
+    main()
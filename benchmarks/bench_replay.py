@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""Measure where the time of the replay of a Functest archive goes.
+
+An archive is written fetching synthetic pages from a local stand-in
+server. Then, it is replayed with `Functest.fetch_from_archive`, which
+looks up the pages one by one with `Archive.retrieve`. The script
+reports the time of the replay and how much of it is spent retrieving
+the pages from the archive, decoding them and in the rest of the
+backend, like building the metadata of the items.
+
+Reading the pages in batches, or decoding them in a pool of processes,
+can only save part of the time of the lookups: most of the time goes
+to unpickling the pages, decoding them and to the backend.
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+from perceval.archive import Archive
+from perceval.backends.opnfv.functest import Functest
+
+from server import FunctestStandIn
+
+
+FROM_DATE = datetime.datetime(2017, 1, 1)
+
+
+class Timer:
+    """Accumulate the time spent in a set of calls"""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def wrap(self, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.elapsed += time.perf_counter() - start
+        return timed
+
+
+class TimedArchive(Archive):
+    """Archive that times the retrieval of the pages"""
+
+    def __init__(self, archive_path, timer):
+        super().__init__(archive_path)
+        self.retrieve = timer.wrap(self.retrieve)
+
+
+class TimedFunctest(Functest):
+    """Backend that times the decoding of the pages"""
+
+    def __init__(self, *args, timer=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timer = timer
+
+    def _init_client(self, from_archive=False):
+        client = super()._init_client(from_archive=from_archive)
+        client._decode = self.timer.wrap(client._decode)
+        return client
+
+
+def replay(url, archive_path):
+    retrieve_timer = Timer()
+    decode_timer = Timer()
+
+    functest = TimedFunctest(url, archive=TimedArchive(archive_path, retrieve_timer),
+                             timer=decode_timer)
+
+    start = time.perf_counter()
+    nitems = sum(1 for _ in functest.fetch_from_archive())
+    elapsed = time.perf_counter() - start
+
+    return nitems, elapsed, retrieve_timer.elapsed, decode_timer.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=1000,
+                        help="number of pages of the archive")
+    parser.add_argument('--page-size', type=int, default=100,
+                        help="number of results per page")
+    parser.add_argument('--details-depth', type=int, default=None,
+                        help="number of modules in the details of each result")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="number of replays of the archive")
+    args = parser.parse_args()
+
+    tmp_path = tempfile.mkdtemp(prefix='functest-bench_')
+    archive_path = os.path.join(tmp_path, 'archive.sqlite3')
+
+    try:
+        with FunctestStandIn(total_pages=args.pages, page_size=args.page_size,
+                             details_depth=args.details_depth) as standin:
+            standin.preload()
+            url = standin.url
+            functest = Functest(url, archive=Archive.create(archive_path), workers=8)
+            for _ in functest.fetch(from_date=FROM_DATE):
+                pass
+
+        for run in range(args.repeat):
+            nitems, elapsed, retrieving, decoding = replay(url, archive_path)
+            rest = elapsed - retrieving - decoding
+            print("run %d  %8d items  %7.2f s  %10.0f items/s  "
+                  "retrieve %5.1f%%  decode %5.1f%%  backend %5.1f%%" %
+                  (run + 1, nitems, elapsed, nitems / elapsed,
+                   100 * retrieving / elapsed, 100 * decoding / elapsed, 100 * rest / elapsed))
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""Compare the memory and query time of Functest items as dicts and in a FunctestStore.
+
+Items are decoded from synthetic pages, so their strings are not
+shared, like the ones of items fetched from a server. Dicts keep
+only the fields that the store keeps, to compare the same data.
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import time
+import tracemalloc
+
+from perceval.backends.opnfv.functest import parse_start_date
+from perceval.backends.opnfv.store import FunctestStore
+
+from synthetic import build_page
+
+
+QUERY = {
+    'installer': 'fuel',
+    'pod_name': 'lf-pod2',
+    'version': 'danube'
+}
+FROM_DATE = datetime.datetime(2017, 6, 1, 10, 30, tzinfo=datetime.timezone.utc)
+TO_DATE = datetime.datetime(2017, 6, 1, 10, 50, tzinfo=datetime.timezone.utc)
+
+
+def build_items(nitems, page_size):
+    for page in range(1, nitems // page_size + 1):
+        for result in json.loads(build_page(page_size, page=page))['results']:
+            yield {'uuid': result['_id'], 'data': result}
+
+
+def load_dicts(items):
+    fields = ['_id'] + FunctestStore.FIELDS + ['start_date', 'stop_date']
+    return [dict({'uuid': item['uuid']}, **{f: item['data'].get(f) for f in fields})
+            for item in items]
+
+
+def matches(record):
+    if any(record[field] != value for field, value in QUERY.items()):
+        return False
+    return FROM_DATE <= parse_start_date(record['start_date']) <= TO_DATE
+
+
+def query_dicts(records):
+    return [i for i, record in enumerate(records) if matches(record)]
+
+
+def query_store(store):
+    return store.find(from_date=FROM_DATE, to_date=TO_DATE, **QUERY)
+
+
+def measure(load, query, args):
+    gc.collect()
+    tracemalloc.start()
+    data = load(build_items(args.items, args.page_size))
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        found = query(data)
+    elapsed = (time.perf_counter() - start) / args.repeat
+
+    return memory, elapsed, len(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000,
+                        help="number of items")
+    parser.add_argument('--page-size', type=int, default=1000,
+                        help="number of items decoded at once")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="number of runs of each query")
+    args = parser.parse_args()
+
+    for name, load, query in (('dicts', load_dicts, query_dicts),
+                              ('FunctestStore', FunctestStore, query_store)):
+        memory, elapsed, nfound = measure(load, query, args)
+        print("%-14s %8.1f MiB  %8.2f ms/query  %d items found" %
+              (name, memory / 2 ** 20, elapsed * 1000, nfound))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Measure the memory used decoding a Functest page at once or incrementally.
+
+The page is built scaling up the test fixtures and it is fed to
+the decoders in chunks, as it would be read from a connection.
+Items are consumed one by one and discarded, like the backend does.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from perceval.backends.opnfv.functest import (Functest,
+                                              FunctestClient)
+
+from synthetic import build_page
+
+
+def read_chunks(raw, size):
+    for i in range(0, len(raw), size):
+        yield raw[i:i + size]
+
+
+def decode_page(raw):
+    # The whole body is kept before decoding it, like Response.json()
+    body = b''.join(read_chunks(raw, FunctestClient.STREAM_CHUNK_SIZE))
+    content = json.loads(body)
+    for _ in content['results']:
+        pass
+
+
+def decode_stream(raw):
+    content = Functest.parse_json_stream(read_chunks(raw, FunctestClient.STREAM_CHUNK_SIZE))
+    for _ in content['results']:
+        pass
+
+
+def measure(func, raw):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(raw)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000,
+                        help="number of results per page")
+    args = parser.parse_args()
+
+    raw = build_page(args.items)
+    print("page size: %.2f MB" % (len(raw) / 2 ** 20))
+
+    for name, func in (('page', decode_page), ('stream', decode_stream)):
+        elapsed, peak = measure(func, raw)
+        print("%-6s %8.2f ms  peak %7.2f MB" % (name, elapsed * 1000, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark suite of the hot path of the Functest backend.
+
+Synthetic pages are served by a local stand-in server. The suite
+measures the items per second, the time to the first item and the
+peak RSS of `Functest.fetch`, `Functest.fetch_from_archive` and
+`Functest.parse_json`. Each benchmark runs in its own process, so
+the peak RSS of one does not hide the others. Results are written
+as JSON to track regressions between releases.
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import tempfile
+import time
+
+from perceval.archive import Archive
+from perceval.backends.opnfv._version import __version__
+from perceval.backends.opnfv.functest import Functest
+
+from server import FunctestStandIn
+from synthetic import build_page
+
+
+FROM_DATE = datetime.datetime(2017, 1, 1)
+
+
+def peak_rss():
+    """Peak RSS of the current process in bytes"""
+
+    # Linux reports kilobytes; macOS, bytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == 'Darwin' else rss * 1024
+
+
+def consume(items):
+    """Consume a generator of items; returns the number of them and the time to the first one"""
+
+    start = time.perf_counter()
+    first = None
+    nitems = 0
+
+    for _ in items:
+        if first is None:
+            first = time.perf_counter() - start
+        nitems += 1
+
+    return nitems, first
+
+
+def bench_fetch(url, archive_path, args):
+    functest = Functest(url, workers=args.workers, stream=args.stream)
+    return functest.fetch(from_date=FROM_DATE)
+
+
+def bench_fetch_from_archive(url, archive_path, args):
+    functest = Functest(url, archive=Archive(archive_path), stream=args.stream)
+    return functest.fetch_from_archive()
+
+
+def bench_parse_json(url, archive_path, args):
+    raw_json = build_page(args.page_size, details_depth=args.details_depth).decode('utf-8')
+
+    for _ in range(args.pages):
+        for item in Functest.parse_json(raw_json):
+            yield item
+
+
+BENCHMARKS = [
+    ('fetch', bench_fetch),
+    ('fetch_from_archive', bench_fetch_from_archive),
+    ('parse_json', bench_parse_json),
+]
+
+
+def run(func, url, archive_path, args, queue):
+    """Run a benchmark; it is the target of the benchmark process"""
+
+    baseline = peak_rss()
+    start = time.perf_counter()
+    nitems, first = consume(func(url, archive_path, args))
+    elapsed = time.perf_counter() - start
+    peak = peak_rss()
+
+    queue.put({
+        'items': nitems,
+        'seconds': elapsed,
+        'items_per_second': nitems / elapsed if elapsed else None,
+        'time_to_first_item': first,
+        'peak_rss': peak,
+        'peak_rss_increase': peak - baseline
+    })
+
+
+def run_isolated(func, url, archive_path, args):
+    """Run a benchmark in a new process and get its results"""
+
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run,
+                                      args=(func, url, archive_path, args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+
+    return result
+
+
+def write_archive(url, archive_path):
+    """Fetch the data once to fill the archive used by the benchmarks"""
+
+    functest = Functest(url, archive=Archive.create(archive_path))
+    for _ in functest.fetch(from_date=FROM_DATE):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=20,
+                        help="number of pages of the query")
+    parser.add_argument('--page-size', type=int, default=100,
+                        help="number of results per page")
+    parser.add_argument('--details-depth', type=int, default=None,
+                        help="number of modules in the details of each result")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of workers of the backend")
+    parser.add_argument('--stream', action='store_true',
+                        help="decode the pages incrementally")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="number of runs of each benchmark; the best one is reported")
+    parser.add_argument('--only', action='append', choices=[name for name, _ in BENCHMARKS],
+                        help="run only this benchmark; it can be set several times")
+    parser.add_argument('-o', '--output',
+                        help="file to write the results; by default, the standard output")
+    args = parser.parse_args()
+
+    # Benchmarks must not inherit the memory of the stand-in
+    multiprocessing.set_start_method('spawn')
+
+    tmp_path = tempfile.mkdtemp(prefix='functest-bench_')
+    archive_path = os.path.join(tmp_path, 'archive.sqlite3')
+
+    results = {}
+
+    try:
+        with FunctestStandIn(total_pages=args.pages, page_size=args.page_size,
+                             details_depth=args.details_depth) as standin:
+            standin.preload()
+            write_archive(standin.url, archive_path)
+
+            for name, func in BENCHMARKS:
+                if args.only and name not in args.only:
+                    continue
+
+                runs = [run_isolated(func, standin.url, archive_path, args)
+                        for _ in range(args.repeat)]
+                results[name] = max(runs, key=lambda r: r['items_per_second'] or 0)
+    finally:
+        shutil.rmtree(tmp_path)
+
+    report = {
+        'date': datetime.datetime.utcnow().isoformat(),
+        'version': __version__,
+        'backend': Functest.version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'pages': args.pages,
+            'page_size': args.page_size,
+            'details_depth': args.details_depth,
+            'workers': args.workers,
+            'stream': args.stream,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(report, fd, indent=4, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=4, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Local stand-in of a Functest server for benchmarks."""
+
+import functools
+import gzip
+import http.server
+import random
+import threading
+import time
+import urllib.parse
+
+from synthetic import build_page
+
+
+class FunctestStandIn:
+    """Functest server running on a local port.
+
+    The server replies to requests on `/api/v1/results` with
+    synthetic pages, reusing connections when the client asks
+    for it. It can simulate the latency of each request and the
+    cost of opening a new connection (e.g. TCP and TLS handshakes).
+
+    :param total_pages: number of pages of any query
+    :param page_size: number of results of each page
+    :param latency: seconds to wait before replying each request
+    :param connect_delay: seconds to wait on each new connection
+    :param details_depth: number of modules in the details of each
+        result; by default, the details of the fixtures are kept
+    :param error_rate: fraction of requests that fail with a 503 error
+    :param max_in_flight: requests processed at the same time; the
+        ones above this number fail with a 429 error
+    :param retry_after: value of the `Retry-After` header of failed
+        requests
+    :param seed: seed of the random failures
+    """
+    def __init__(self, total_pages=10, page_size=100, latency=0, connect_delay=0,
+                 details_depth=None, error_rate=0, max_in_flight=None,
+                 retry_after=None, seed=0):
+        self.total_pages = total_pages
+        self.page_size = page_size
+        self.details_depth = details_depth
+        self.error_rate = error_rate
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.nfailures = 0
+        self.in_flight = 0
+        self._random = random.Random(seed)
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.nconnections = 0
+        self.nrequests = 0
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return 'http://%s:%s/' % (host, port)
+
+    def start(self):
+        handler = functools.partial(_FunctestHandler, self)
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @functools.lru_cache(maxsize=None)
+    def page(self, number, compressed=False):
+        body = build_page(self.page_size, page=number, total_pages=self.total_pages,
+                          details_depth=self.details_depth)
+        return gzip.compress(body) if compressed else body
+
+    def preload(self):
+        """Build all the pages in advance, so they are not built while measuring"""
+
+        for number in range(1, self.total_pages + 1):
+            self.page(number)
+            self.page(number, compressed=True)
+
+    def enter(self):
+        """Register a new request; returns the status code of its response"""
+
+        with self._lock:
+            self.in_flight += 1
+
+            if self.max_in_flight and self.in_flight > self.max_in_flight:
+                status = 429
+            elif self.error_rate and self._random.random() < self.error_rate:
+                status = 503
+            else:
+                status = 200
+
+            if status != 200:
+                self.nfailures += 1
+
+            return status
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def count(self, connection=False, nbytes=0):
+        with self._lock:
+            if connection:
+                self.nconnections += 1
+            else:
+                self.nrequests += 1
+                self.nbytes += nbytes
+
+
+class _FunctestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are written separately; avoid waiting
+    # for delayed ACKs on reused connections
+    disable_nagle_algorithm = True
+
+    def __init__(self, standin, *args, **kwargs):
+        self.standin = standin
+        super().__init__(*args, **kwargs)
+
+    def setup(self):
+        super().setup()
+        self.standin.count(connection=True)
+        if self.standin.connect_delay:
+            time.sleep(self.standin.connect_delay)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+
+        if url.path != '/api/v1/results':
+            self.send_error(404)
+            return
+
+        status = self.standin.enter()
+
+        try:
+            if self.standin.latency:
+                time.sleep(self.standin.latency)
+
+            if status == 200:
+                self.send_page(url)
+            else:
+                self.send_failure(status)
+        finally:
+            self.standin.leave()
+
+    def send_failure(self, status):
+        self.standin.count()
+
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        if self.standin.retry_after is not None:
+            self.send_header('Retry-After', str(self.standin.retry_after))
+        self.end_headers()
+
+    def send_page(self, url):
+        params = urllib.parse.parse_qs(url.query)
+        page = int(params.get('page', ['1'])[0])
+        compressed = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = self.standin.page(page, compressed=compressed)
+
+        self.standin.count(nbytes=len(body))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        if self.headers.get('Connection', '').lower() == 'close':
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
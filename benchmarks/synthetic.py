@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Synthetic Functest pages built scaling up the test fixtures."""
+
+import json
+import os
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'tests',
+                       'data', 'functest', 'functest_results_page_1.json')
+
+
+def build_page(nitems, page=1, total_pages=1, details_depth=None):
+    """Build a page with `nitems` results copied from the fixtures.
+
+    Identifiers are unique across the pages of the same size. When
+    `details_depth` is set, the `details` of every result are replaced
+    with a list of that number of modules, like the ones of rally.
+    """
+    with open(FIXTURE, 'r') as f:
+        fixture = json.load(f)
+
+    results = fixture['results']
+    offset = (page - 1) * nitems
+    details = build_details(details_depth) if details_depth is not None else None
+    items = []
+
+    for i in range(nitems):
+        item = dict(results[i % len(results)])
+        item['_id'] = '%024x' % (offset + i)
+        if details is not None:
+            item['details'] = details
+        items.append(item)
+
+    content = {
+        'pagination': {'current_page': page, 'total_pages': total_pages},
+        'results': items
+    }
+    return json.dumps(content, indent=4).encode('utf-8')
+
+
+def build_details(nmodules):
+    """Build the details of a result with `nmodules` modules"""
+
+    return [
+        {
+            'module': ('module%d' % i).ljust(17),
+            'details': {
+                'duration': ('%.2f' % (10 + i * 1.5)).rjust(10),
+                'success': '100.00',
+                'nb tests': 10 + i % 7
+            }
+        }
+        for i in range(nmodules)
+    ]
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import csv
+import gzip
+import json
+
+from ...errors import BackendError
+from .functest import parse_date
+
+# Formats to export the items
+EXPORT_NDJSON = 'ndjson'
+EXPORT_CSV = 'csv'
+EXPORT_PARQUET = 'parquet'
+EXPORT_FORMATS = [EXPORT_NDJSON, EXPORT_CSV, EXPORT_PARQUET]
+
+
+class FunctestExporter:
+    """Export Functest items to a table.
+
+    Items are flattened into rows with the columns of `COLUMNS`
+    and written in batches, so memory does not grow with the
+    number of items. Dates are converted to UTC datetimes and
+    `duration` is the number of seconds between `start_date`
+    and `stop_date`. Missing or invalid values are set to `None`.
+
+    Rows are written as newline-delimited JSON, CSV or Parquet.
+    JSON and CSV files are compressed with gzip when their name
+    ends with `.gz`; in these formats, dates are written in ISO
+    8601. Parquet files are compressed by column and require
+    `pyarrow`.
+
+    :param path: path of the file to write
+    :param fmt: format of the file
+    :param batch_size: number of rows written at once
+
+    :raises BackendError: when the format is not valid or
+        `pyarrow` is not installed to write Parquet files
+    """
+    DEFAULT_BATCH_SIZE = 1000
+    COMPRESS_LEVEL = 6
+
+    # Name and type of the columns
+    COLUMNS = [
+        ('uuid', 'string'),
+        ('id', 'string'),
+        ('project', 'string'),
+        ('case', 'string'),
+        ('installer', 'string'),
+        ('pod', 'string'),
+        ('scenario', 'string'),
+        ('version', 'string'),
+        ('build_tag', 'string'),
+        ('criteria', 'string'),
+        ('start_date', 'timestamp'),
+        ('stop_date', 'timestamp'),
+        ('duration', 'float')
+    ]
+
+    def __init__(self, path, fmt=EXPORT_NDJSON, batch_size=None):
+        if fmt not in EXPORT_FORMATS:
+            cause = "%s export format not valid; valid formats: %s" % (fmt, ', '.join(EXPORT_FORMATS))
+            raise BackendError(cause=cause)
+
+        self.path = path
+        self.format = fmt
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.nrows = 0
+
+        self.names = [name for name, _ in self.COLUMNS]
+        self._date_columns = [i for i, (_, type_) in enumerate(self.COLUMNS)
+                              if type_ == 'timestamp']
+        self._batch = []
+        self._fd = None
+        self._writer = None
+
+        if self.format == EXPORT_PARQUET:
+            self._open_parquet()
+        else:
+            self._open_text()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def export(self, items):
+        """Export a set of items; returns the number of rows written"""
+
+        for item in items:
+            self.write(item)
+        self.flush()
+
+        return self.nrows
+
+    def write(self, item):
+        """Add an item to the batch, writing it when it is full"""
+
+        self._batch.append(self.flatten(item))
+
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the rows of the batch"""
+
+        if not self._batch:
+            return
+
+        if self.format == EXPORT_PARQUET:
+            self._write_parquet(self._batch)
+        elif self.format == EXPORT_CSV:
+            self._write_csv(self._batch)
+        else:
+            self._write_ndjson(self._batch)
+
+        self.nrows += len(self._batch)
+        self._batch = []
+
+    def close(self):
+        """Write the pending rows and close the file"""
+
+        self.flush()
+
+        if self._writer and self.format == EXPORT_PARQUET:
+            self._writer.close()
+        if self._fd:
+            self._fd.close()
+
+        self._writer = None
+        self._fd = None
+
+    @staticmethod
+    def flatten(item):
+        """Convert an item to a row with the values of `COLUMNS`"""
+
+        data = item['data']
+
+        start_date = parse_date(data.get('start_date', None))
+        stop_date = parse_date(data.get('stop_date', None))
+
+        if start_date and stop_date:
+            duration = (stop_date - start_date).total_seconds()
+        else:
+            duration = None
+
+        return (
+            item['uuid'],
+            data.get('_id', None),
+            data.get('project_name', None),
+            data.get('case_name', None),
+            data.get('installer', None),
+            data.get('pod_name', None),
+            data.get('scenario', None),
+            data.get('version', None),
+            data.get('build_tag', None),
+            data.get('criteria', None),
+            start_date,
+            stop_date,
+            duration
+        )
+
+    def _open_text(self):
+        if self.path.endswith('.gz'):
+            self._fd = gzip.open(self.path, 'wt', encoding='utf-8', newline='',
+                                 compresslevel=self.COMPRESS_LEVEL)
+        else:
+            self._fd = open(self.path, 'w', encoding='utf-8', newline='')
+
+        if self.format == EXPORT_CSV:
+            self._writer = csv.writer(self._fd)
+            self._writer.writerow(self.names)
+        else:
+            self._writer = json.JSONEncoder(separators=(',', ':'))
+
+    def _open_parquet(self):
+        # pyarrow takes a while to load, so it is only imported here
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            cause = "pyarrow is required to export Parquet files; install the 'parquet' extra"
+            raise BackendError(cause=cause)
+
+        types = {
+            'string': pyarrow.string(),
+            'timestamp': pyarrow.timestamp('s', tz='UTC'),
+            'float': pyarrow.float64()
+        }
+
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([(name, types[type_]) for name, type_ in self.COLUMNS])
+        self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema)
+
+    def _text_rows(self, rows):
+        """Convert the dates of the rows to ISO 8601"""
+
+        date_columns = self._date_columns
+
+        for row in rows:
+            row = list(row)
+            for i in date_columns:
+                if row[i]:
+                    row[i] = row[i].isoformat()
+            yield row
+
+    def _write_ndjson(self, rows):
+        encode = self._writer.encode
+        names = self.names
+
+        lines = [encode(dict(zip(names, row))) for row in self._text_rows(rows)]
+        lines.append('')
+
+        self._fd.write('\n'.join(lines))
+
+    def _write_csv(self, rows):
+        self._writer.writerows(self._text_rows(rows))
+
+    def _write_parquet(self, rows):
+        columns = [self._pyarrow.array(values, type=field.type)
+                   for values, field in zip(zip(*rows), self._schema)]
+        table = self._pyarrow.Table.from_arrays(columns, schema=self._schema)
+
+        self._writer.write_table(table)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import bisect
+import json
+import os
+
+from ...errors import BackendError
+from .functest import parse_date
+
+
+class FunctestFlakyDetector:
+    """Detect flaky test cases in a stream of Functest items.
+
+    Results are grouped by the fields of `KEY_FIELDS`. Each group
+    keeps the outcomes of its `window` most recent runs, sorted by
+    start date, so memory grows with the number of groups and not
+    with the number of items. Items can be given in any order, like
+    the newest first as `Functest.fetch` returns them; items older
+    than the runs of a full window are discarded. Runs of the same
+    build tag are taken as one, keeping its latest outcome.
+
+    A run passed when its `criteria` is `PASS` and failed when it
+    is `FAIL` or `FAILED`; items with any other `criteria` or with
+    no start date are ignored. The flakiness score of a group is
+    the number of flips between consecutive outcomes of the window
+    divided by the number of possible flips; it goes from 0 (no
+    flips) to 1 (the outcome flips on every run).
+
+    When `path` is set, the state is read from that file, if it
+    exists, and written on `save`, so items can be analyzed in
+    several runs.
+
+    :param window: number of recent runs of each group
+    :param min_runs: minimum number of runs to score a group
+    :param path: path to the state file
+    """
+    KEY_FIELDS = ['case_name', 'scenario', 'pod_name']
+    DEFAULT_WINDOW = 20
+    DEFAULT_MIN_RUNS = 3
+
+    PASSED = ['PASS']
+    FAILED = ['FAIL', 'FAILED']
+
+    def __init__(self, window=None, min_runs=None, path=None):
+        self.window = window or self.DEFAULT_WINDOW
+        self.min_runs = min_runs or self.DEFAULT_MIN_RUNS
+        self.path = path
+
+        # Runs of each group as [timestamp, build tag, passed] lists
+        self.runs = {}
+
+        if self.path:
+            self.load()
+
+    def __len__(self):
+        return len(self.runs)
+
+    def process(self, items):
+        """Analyze a set of items, generating the score of the group of each of them"""
+
+        for item in items:
+            score = self.update(item)
+            if score:
+                yield score
+
+    def update(self, item):
+        """Add the run of an item to its group.
+
+        :returns: the score of the group; `None` when the item
+            was ignored
+        """
+        data = item['data']
+
+        criteria = data.get('criteria', None)
+        if criteria in self.PASSED:
+            passed = True
+        elif criteria in self.FAILED:
+            passed = False
+        else:
+            return None
+
+        start_date = parse_date(data.get('start_date', None))
+        if not start_date:
+            return None
+
+        timestamp = int(start_date.timestamp())
+        build_tag = data.get('build_tag', None)
+        key = tuple(data.get(field, None) for field in self.KEY_FIELDS)
+
+        runs = self.runs.setdefault(key, [])
+
+        for run in runs:
+            if build_tag is not None and run[1] == build_tag:
+                if timestamp >= run[0]:
+                    run[0] = timestamp
+                    run[2] = passed
+                    runs.sort(key=lambda r: r[0])
+                return self.score(key)
+
+        if len(runs) >= self.window and timestamp <= runs[0][0]:
+            return None
+
+        bisect.insort(runs, [timestamp, build_tag, passed], key=lambda r: r[0])
+        if len(runs) > self.window:
+            del runs[0]
+
+        return self.score(key)
+
+    def score(self, key):
+        """Get the score of a group as a dict.
+
+        The dict has the values of the fields of the group, the
+        number of runs and flips of the window, the flakiness
+        `score`, which is `None` when there are not enough runs,
+        and the build tag and outcome of the latest run.
+        """
+        runs = self.runs[key]
+
+        flips = sum(1 for previous, run in zip(runs, runs[1:]) if previous[2] != run[2])
+
+        score = dict(zip(self.KEY_FIELDS, key))
+        score['runs'] = len(runs)
+        score['flips'] = flips
+        score['score'] = round(flips / (len(runs) - 1), 4) if len(runs) >= self.min_runs else None
+        score['last_build_tag'] = runs[-1][1]
+        score['last_passed'] = runs[-1][2]
+
+        return score
+
+    def flaky(self, min_score=None):
+        """Get the scores of the flaky groups, the highest first.
+
+        :param min_score: minimum score of the groups; by default,
+            groups with any flip
+        """
+        scores = []
+
+        for key in self.runs:
+            score = self.score(key)
+            if score['score'] is None:
+                continue
+            if (min_score is None and score['flips']) or \
+                    (min_score is not None and score['score'] >= min_score):
+                scores.append(score)
+
+        return sorted(scores, key=lambda s: s['score'], reverse=True)
+
+    def load(self):
+        """Read the state from the file; returns whether it existed"""
+
+        try:
+            with open(self.path, 'r') as fd:
+                data = json.load(fd)
+        except FileNotFoundError:
+            return False
+
+        self.runs = {tuple(key): runs[-self.window:] for key, runs in data['groups']}
+
+        return True
+
+    def save(self):
+        """Write the state to the file.
+
+        :raises BackendError: when the detector has no `path`
+        """
+        if not self.path:
+            cause = "state of the flaky detector cannot be saved; path not set"
+            raise BackendError(cause=cause)
+
+        data = {
+            'window': self.window,
+            'groups': [[list(key), runs] for key, runs in self.runs.items()]
+        }
+
+        tmp_path = self.path + '.tmp'
+
+        with open(tmp_path, 'w') as fd:
+            json.dump(data, fd)
+
+        os.replace(tmp_path, self.path)
@@ -20,25 +20,133 @@
 #     Quan Zhou <quan@bitergia.com>
 #
 
+import asyncio
+import codecs
+import collections
+import concurrent.futures
+import datetime
+import email.utils
+import functools
+import gzip
+import hashlib
+import itertools
 import json
 import logging
-
-from grimoirelab_toolkit.datetime import (datetime_utcnow,
+import math
+import os
+import queue
+import signal
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from grimoirelab_toolkit.datetime import (InvalidDateError,
+                                          datetime_utcnow,
                                           datetime_to_utc,
-                                          str_to_datetime)
+                                          str_to_datetime,
+                                          unixtime_to_datetime)
+from grimoirelab_toolkit.introspect import find_signature_parameters
 from grimoirelab_toolkit.uris import urijoin
 
+from ...archive import Archive
 from ...backend import (Backend,
                         BackendCommand,
-                        BackendCommandArgumentParser)
+                        BackendCommandArgumentParser,
+                        fetch,
+                        fetch_from_archive,
+                        uuid)
 from ...client import HttpClient
+from ...errors import BackendError
 from ...utils import DEFAULT_DATETIME
 
 CATEGORY_FUNCTEST = "functest"
 
+FUNCTEST_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Modes to emit the `details` of the items
+DETAILS_FULL = 'full'
+DETAILS_SUMMARY = 'summary'
+DETAILS_EXTERNAL = 'external'
+DETAILS_MODES = [DETAILS_FULL, DETAILS_SUMMARY, DETAILS_EXTERNAL]
+
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4096)
+def parse_start_date(value):
+    """Convert a start date of a Functest item to a UTC datetime.
+
+    Dates are expected in the format `YYYY-MM-DD HH:MM:SS` with
+    no timezone, which is parsed without the general purpose
+    parser; any other format falls back to `str_to_datetime`.
+    Conversions are cached, as the results of the same run
+    usually share their start dates.
+
+    :param value: date to convert
+
+    :returns: a datetime in UTC
+    """
+    if len(value) == 19 and value[4] == '-' and value[7] == '-' \
+            and value[10] == ' ' and value[13] == ':' and value[16] == ':':
+        try:
+            return datetime.datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                     int(value[11:13]), int(value[14:16]), int(value[17:19]),
+                                     tzinfo=datetime.timezone.utc)
+        except ValueError:
+            pass
+
+    return str_to_datetime(value)
+
+
+def parse_date(value):
+    """Convert a date of a Functest item to a UTC datetime.
+
+    Unlike `parse_start_date`, missing, non-string or invalid
+    dates are not an error.
+
+    :param value: date to convert
+
+    :returns: a datetime in UTC; `None` when the date is not valid
+    """
+    if not value or not isinstance(value, str):
+        return None
+
+    try:
+        return parse_start_date(value)
+    except InvalidDateError:
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_number_string(value):
+    """Convert a string of the details of a Functest item to a number.
+
+    Conversions are cached, as the same values, like `"100.00"`,
+    are repeated in the details of many items.
+    """
+    value = value.strip()
+
+    try:
+        return int(value)
+    except ValueError:
+        pass
+
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+
+    return number if math.isfinite(number) else None
+
+
 class Functest(Backend):
     """Functest backend for Perceval.
 
@@ -46,45 +154,510 @@ class Functest(Backend):
     server. To initialize this class the URL must be provided.
     The `url` will be set as the origin of the data.
 
-    :param url: Functest URL
+    Several servers can be fetched at once giving a list of URLs.
+    Each server is fetched by its own thread, with the same options,
+    and items are returned as they arrive. The origin of each item
+    is the URL of its server; the origin of the backend is the list
+    of URLs joined by commas. Fetch processes of several servers
+    cannot be resumed from checkpoints nor be incremental.
+
+    :param url: Functest URL or list of URLs
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     :param ssl_verify: enable/disable SSL verification
+    :param workers: number of threads used to fetch pages concurrently
+    :param checkpoint_file: path to the file where the progress of the
+        fetch process is saved after each page; when the file exists,
+        the fetch process resumes from the point it stores
+    :param stream: decode the results of the pages incrementally,
+        while they are downloaded; pages are still read completely
+        when they are archived, fetched by several workers or cached
+    :param pool_size: maximum number of connections kept open with
+        the server; by default, enough for the number of workers
+    :param keep_alive: reuse connections between requests
+    :param compress: ask the server for compressed responses
+    :param details: how the `details` of the items are emitted;
+        `full` keeps them as they are, `summary` replaces them with
+        their totals and `external` also moves them to a store
+    :param details_dir: directory of the store of details, required
+        by the `external` mode
+    :param sync_file: path to the file where the latest date of the
+        fetched items is saved; when the file exists, only the items
+        newer than that date are fetched
+    :param max_retries: maximum retries per request; by default,
+        `FunctestClient.MAX_RETRIES`
+    :param timeout: seconds to wait for the server to accept a
+        connection or to send data; by default, `FunctestClient.TIMEOUT`
+    :param adaptive_rate: adapt the number of concurrent requests
+        and the time between them to the latency and errors of
+        the server
+    :param max_backoff: maximum seconds to wait between requests
+        when the rate is adapted
+    :param latency_factor: times the lowest latency of the server
+        a request can take before the rate is reduced
+    :param cache_file: path to the file of the cache of responses;
+        when it is set, pages cached are not downloaded again
+    :param cache_size: maximum size of the cache in megabytes
+    :param cache_ttl: seconds a cached page is used before it is
+        validated again with the server
+    :param stats: collect statistics of the fetch process in
+        `stats`, a `FunctestStats` object
+    :param stats_interval: seconds between two summaries of the
+        statistics written to the log; it enables `stats`
+    :param stats_file: path to the file where summaries of the
+        statistics are appended as JSON lines; it enables `stats`
+    :param dedupe: when several servers are fetched, return only
+        the first item found with each `_id`
+    :param consistency: check the consistency of the pages while
+        they are fetched; duplicated items are dropped and the items
+        skipped when pages shift are fetched again. The result of
+        the last check is available in `consistency_check`
+    :param bloom_capacity: keep the ids of the items returned in a
+        Bloom filter sized for this number of items, instead of in
+        a set, when the consistency is checked
+    :param metrics: add to each item the metrics of the modules of
+        its details, under the key `metrics`, parsed to numbers,
+        with the totals of tests and durations and the percentage
+        of successful tests
+    :param compress_archive: store the bodies of the pages in the
+        archive compressed with gzip; they are decompressed when
+        they are unpickled, so any reader of the archive gets the
+        original pages
+
+    :raises BackendError: when the details mode is not valid or
+        checkpoints or sync files are set with several URLs
     """
-    version = '1.0.0'
+    version = '1.1.0'
 
     CATEGORIES = [CATEGORY_FUNCTEST]
     EXTRA_SEARCH_FIELDS = {
         'project_name': ['project_name']
     }
 
-    def __init__(self, url, tag=None, archive=None, ssl_verify=True):
-        origin = url
+    # Arguments to select items by the values of their fields,
+    # with the field and the API parameter that filters it
+    SELECTION_ARGS = {
+        'projects': ('project_name', 'project'),
+        'cases': ('case_name', 'case'),
+        'installers': ('installer', 'installer'),
+        'pods': ('pod_name', 'pod')
+    }
+
+    # Maximum number of items fetched from several servers waiting to be returned
+    SERVERS_QUEUE_SIZE = 1000
+
+    # Seconds between polls and of results checked again when following the server
+    FOLLOW_INTERVAL = 5
+    FOLLOW_MAX_INTERVAL = 60
+    FOLLOW_LOOKBACK = 3600
+
+    def __init__(self, url, tag=None, archive=None, ssl_verify=True, workers=1,
+                 checkpoint_file=None, stream=False, pool_size=None,
+                 keep_alive=True, compress=True, details=DETAILS_FULL,
+                 details_dir=None, sync_file=None, max_retries=None, timeout=None,
+                 adaptive_rate=False, max_backoff=None, latency_factor=None,
+                 cache_file=None, cache_size=None, cache_ttl=None,
+                 stats=False, stats_interval=None, stats_file=None, dedupe=False,
+                 consistency=False, bloom_capacity=None, metrics=False,
+                 compress_archive=False):
+        urls = [url] if isinstance(url, str) else list(url)
+
+        if details not in DETAILS_MODES:
+            cause = "unknown details mode '%s'" % details
+            raise BackendError(cause=cause)
+        if details == DETAILS_EXTERNAL and not details_dir:
+            cause = "a directory is required to store the details"
+            raise BackendError(cause=cause)
+        if not urls:
+            cause = "at least one URL is required"
+            raise BackendError(cause=cause)
+        if len(urls) > 1 and (checkpoint_file or sync_file):
+            cause = "checkpoints and sync files cannot be used with several URLs"
+            raise BackendError(cause=cause)
+
+        origin = ','.join(urls)
 
         super().__init__(origin, tag=tag, archive=archive, ssl_verify=ssl_verify)
-        self.url = url
+        self.url = origin
+        self.urls = urls
+        self.workers = workers
+        self.stream = stream
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.compress = compress
+        self.checkpoint = FunctestCheckpoint(checkpoint_file) if checkpoint_file else None
+        self.details = details
+        self.details_store = FunctestDetailsStore(details_dir) if details == DETAILS_EXTERNAL else None
+        self.sync_state = FunctestSyncState(sync_file) if sync_file else None
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.adaptive_rate = adaptive_rate
+        self.max_backoff = max_backoff
+        self.latency_factor = latency_factor
+        self.cache_file = cache_file
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        if stats or stats_interval or stats_file:
+            self.stats = FunctestStats(interval=stats_interval, path=stats_file)
+        else:
+            self.stats = None
+        self.dedupe = dedupe
+        self.consistency = consistency
+        self.bloom_capacity = bloom_capacity
+        self.consistency_check = None
+        self.metrics = metrics
+        self.compress_archive = compress_archive
         self.client = None
 
-    def fetch(self, category=CATEGORY_FUNCTEST, from_date=DEFAULT_DATETIME, to_date=None):
+        # Origin of the item being returned, when it is not the backend one
+        self._item_origin = None
+
+    def fetch(self, category=CATEGORY_FUNCTEST, from_date=DEFAULT_DATETIME, to_date=None,
+              shard_days=None, shard_pages=None, projects=None, cases=None,
+              installers=None, pods=None):
         """Fetch tests data from the server.
 
         This method fetches tests data from a server that were
         updated since the given date.
 
+        Items can be selected by the names of their projects, cases,
+        installers and pods. When only one value is given for any of
+        them, it is sent to the server to filter the results. In any
+        case, items are also filtered by the backend, so only the
+        selected ones are returned.
+
+        When the backend was initialized with a sync file, the fetch
+        process is incremental: items are fetched from the second of
+        the newest item returned by the previous process with the
+        same selection, skipping the ones already returned on that
+        second. The sync file is updated once all the items have
+        been returned.
+
+        When the backend was initialized with a checkpoint file that
+        stores the progress of a previous fetch process for the same
+        `from_date` and `to_date`, the process resumes from the page
+        after the last one completed. If `to_date` is not given, the
+        one stored in the checkpoint is used.
+
+        The range of dates can be split in windows which are fetched
+        concurrently by the workers of the backend. Windows can have
+        a fixed size of `shard_days` days or, with `shard_pages`, be
+        sized so each one has around that number of pages. Items are
+        returned ordered from the newest window to the oldest one,
+        removing the duplicates found at their edges. Sharded fetch
+        processes cannot be resumed.
+
         :param category: the category of items to fetch
         :param from_date: obtain data updated since this date
         :param to_date: obtain data updated before this date
+        :param shard_days: split the range of dates in windows of
+            this number of days
+        :param shard_pages: split the range of dates in windows of
+            around this number of pages
+        :param projects: list of projects to fetch
+        :param cases: list of test cases to fetch
+        :param installers: list of installers to fetch
+        :param pods: list of pods to fetch
 
         :returns: a generator of items
+
+        :raises BackendError: when the windows are not well defined
+            or the fetch process should resume from a checkpoint
         """
+        if shard_days and shard_pages:
+            cause = "'shard_days' and 'shard_pages' cannot be set at the same time"
+            raise BackendError(cause=cause)
+        if (shard_days and shard_days <= 0) or (shard_pages and shard_pages <= 0):
+            cause = "windows must have a positive size"
+            raise BackendError(cause=cause)
+        if (shard_days or shard_pages) and self.checkpoint:
+            cause = "sharded fetch processes cannot be resumed from checkpoints"
+            raise BackendError(cause=cause)
+
         from_date = datetime_to_utc(from_date) if from_date else DEFAULT_DATETIME
-        to_date = datetime_to_utc(to_date) if to_date else datetime_utcnow()
+        to_date = datetime_to_utc(to_date) if to_date else None
+
+        kwargs = {
+            "from_date": from_date,
+            "to_date": to_date,
+            "shard_days": shard_days,
+            "shard_pages": shard_pages,
+            "projects": projects,
+            "cases": cases,
+            "installers": installers,
+            "pods": pods
+        }
+
+        high_water = None
+
+        if self.sync_state:
+            high_water = self.sync_state.high_water(self._selection(kwargs))
+
+            if high_water and high_water[0] >= from_date:
+                logger.info("Fetching tests data since the last sync on %s",
+                            str(high_water[0]))
+                kwargs['from_date'] = high_water[0]
+                kwargs['skip_ids'] = sorted(high_water[1])
+            else:
+                high_water = None
+
+        if self.checkpoint:
+            filters = self._server_filters(kwargs)
+            kwargs.update(self.checkpoint.resume(kwargs['from_date'], to_date, filters))
+
+        if not kwargs['to_date']:
+            kwargs['to_date'] = datetime_utcnow()
 
-        kwargs = {"from_date": from_date, "to_date": to_date}
         items = super().fetch(category, **kwargs)
 
+        if self.sync_state:
+            items = self._sync_items(items, self._selection(kwargs), high_water)
+
         return items
 
+    def _sync_items(self, items, selection, high_water=None):
+        """Track the newest items returned, saving them when the process ends"""
+
+        last_ts, last_ids = None, set()
+
+        if high_water:
+            last_ts = int(high_water[0].timestamp())
+            last_ids = set(high_water[1])
+
+        for item in items:
+            # The API filters dates with second resolution
+            item_ts = int(item['updated_on'])
+
+            if last_ts is None or item_ts > last_ts:
+                last_ts, last_ids = item_ts, {item['data']['_id']}
+            elif item_ts == last_ts:
+                last_ids.add(item['data']['_id'])
+
+            yield item
+
+        if last_ts is not None:
+            self.sync_state.save(unixtime_to_datetime(last_ts), last_ids, selection)
+
+    def follow(self, category=CATEGORY_FUNCTEST, from_date=None, projects=None,
+               cases=None, installers=None, pods=None, interval=None,
+               max_interval=None, lookback=None, stop=None):
+        """Follow the server, returning new tests data as soon as they are found.
+
+        The server is polled for the results started since the
+        newest item returned, using the same client and connections
+        on every poll. Results are stored by the server once they
+        finish, so results started up to `lookback` seconds before
+        the newest item are checked again; the ids of the items
+        returned in that period are kept to remove duplicates.
+
+        Polls are `interval` seconds apart while new items are found.
+        Otherwise, the time between polls is doubled up to
+        `max_interval` seconds. Errors of the server are written to
+        the log and handled like polls with no items.
+
+        Polls request the same pages again and again, so they are
+        not stored in the archive of the backend, when it is set.
+
+        The process runs until `stop` is set or the generator is
+        closed. When the backend was initialized with a sync file,
+        the newest items returned are saved on every poll with new
+        items and when the process stops, and the process follows
+        the server from them when it is started again.
+
+        :param category: the category of items to fetch
+        :param from_date: obtain data started since this date; by
+            default, `lookback` seconds before now
+        :param projects: list of projects to fetch
+        :param cases: list of test cases to fetch
+        :param installers: list of installers to fetch
+        :param pods: list of pods to fetch
+        :param interval: minimum seconds between polls
+        :param max_interval: maximum seconds between polls
+        :param lookback: seconds of results checked again on
+            every poll
+        :param stop: `threading.Event` that stops the process
+
+        :returns: a generator of items
+
+        :raises BackendError: when several servers are given
+        """
+        if len(self.urls) > 1:
+            cause = "only one server can be followed"
+            raise BackendError(cause=cause)
+
+        interval = interval or self.FOLLOW_INTERVAL
+        max_interval = max(max_interval or self.FOLLOW_MAX_INTERVAL, interval)
+        lookback = self.FOLLOW_LOOKBACK if lookback is None else lookback
+        stop = stop or threading.Event()
+
+        kwargs = {
+            "from_date": None,
+            "to_date": None,
+            "projects": projects,
+            "cases": cases,
+            "installers": installers,
+            "pods": pods
+        }
+        selection = self._selection(kwargs)
+
+        if from_date:
+            newest = int(datetime_to_utc(from_date).timestamp()) + lookback
+        else:
+            newest = int(datetime_utcnow().timestamp())
+
+        # Ids of the items returned in the lookback period, with their start dates
+        recent = {}
+
+        if self.sync_state:
+            high_water = self.sync_state.high_water(selection)
+
+            if high_water and (not from_date or high_water[0] >= datetime_to_utc(from_date)):
+                newest = int(high_water[0].timestamp())
+                recent = dict.fromkeys(high_water[1], newest)
+
+        self.client = self._init_client()
+
+        if self.archive:
+            logger.warning("Tests data of '%s' are not archived while it is followed", self.url)
+            self.client.archive = None
+
+        logger.info("Following tests data of '%s' group since %s",
+                    self.url, str(unixtime_to_datetime(max(newest - lookback, 0))))
+
+        wait = interval
+        ndata = 0
+
+        try:
+            while not stop.is_set():
+                kwargs['from_date'] = unixtime_to_datetime(max(newest - lookback, 0))
+                nitems = 0
+
+                try:
+                    for test_data in self._fetch_selected_items(kwargs):
+                        if test_data['_id'] in recent:
+                            continue
+
+                        item = self.metadata(test_data)
+
+                        item_ts = int(item['updated_on'])
+                        recent[test_data['_id']] = item_ts
+                        newest = max(newest, item_ts)
+                        nitems += 1
+
+                        yield item
+                except requests.exceptions.RequestException as e:
+                    logger.warning("Error polling '%s': %s", self.url, str(e))
+
+                if nitems:
+                    ndata += nitems
+                    wait = interval
+
+                    # Ids out of the lookback period cannot be returned again
+                    oldest = newest - lookback
+                    recent = {item_id: ts for item_id, ts in recent.items() if ts >= oldest}
+
+                    self._save_recent(newest, recent, selection)
+                else:
+                    wait = min(wait * 2, max_interval)
+
+                logger.debug("%s new tests data found; next poll in %s seconds", nitems, wait)
+                stop.wait(wait)
+        finally:
+            self._save_recent(newest, recent, selection)
+            logger.info("Follow process stopped: %s tests data fetched", ndata)
+
+    def _save_recent(self, newest, recent, selection):
+        """Save the state of a follow process in the sync file"""
+
+        if self.sync_state and recent:
+            self.sync_state.save(unixtime_to_datetime(newest), recent.keys(), selection)
+
+    async def fetch_async(self, category=CATEGORY_FUNCTEST, from_date=DEFAULT_DATETIME,
+                          to_date=None, projects=None, cases=None, installers=None,
+                          pods=None, limit=None):
+        """Fetch tests data from the server with asyncio.
+
+        Async generator counterpart of `fetch`, which allows to run
+        many backends in one event loop. Items are selected and
+        their details emitted in the same way, but checkpoints and
+        sync files are not used and the dates are not split in
+        windows. The pages after the first one are requested
+        concurrently, up to `limit` at a time.
+
+        Data is stored in the archive in the same format `fetch`
+        does, so it can be read with `fetch_from_archive`.
+
+        :param category: the category of items to fetch
+        :param from_date: obtain data updated since this date
+        :param to_date: obtain data updated before this date
+        :param projects: list of projects to fetch
+        :param cases: list of test cases to fetch
+        :param installers: list of installers to fetch
+        :param pods: list of pods to fetch
+        :param limit: maximum number of concurrent requests; by
+            default, `AsyncFunctestClient.DEFAULT_LIMIT`
+
+        :returns: an async generator of items
+
+        :raises BackendError: when the category is not valid, there
+            are several URLs or `aiohttp` is not installed
+        """
+        if category not in self.categories:
+            cause = "%s category not valid for %s" % (category, self.__class__.__name__)
+            raise BackendError(cause=cause)
+        if len(self.urls) > 1:
+            cause = "several URLs cannot be fetched with asyncio"
+            raise BackendError(cause=cause)
+
+        from_date = datetime_to_utc(from_date) if from_date else DEFAULT_DATETIME
+        to_date = datetime_to_utc(to_date) if to_date else datetime_utcnow()
+
+        kwargs = {
+            "from_date": from_date,
+            "to_date": to_date,
+            "shard_days": None,
+            "shard_pages": None,
+            "projects": projects,
+            "cases": cases,
+            "installers": installers,
+            "pods": pods
+        }
+
+        archive = _CompressedArchive(self.archive) if self.archive and self.compress_archive else self.archive
+
+        client = AsyncFunctestClient(self.url, archive=archive,
+                                     ssl_verify=self.ssl_verify,
+                                     limit=limit or AsyncFunctestClient.DEFAULT_LIMIT,
+                                     max_retries=self.max_retries, timeout=self.timeout)
+
+        if self.archive:
+            self.archive.init_metadata(self.origin, self.__class__.__name__, self.version,
+                                       category, kwargs)
+
+        filters = self._server_filters(kwargs)
+        selection = self._selection(kwargs)
+
+        logger.info("Fetching tests data of '%s' group from %s to %s",
+                    self.url, str(from_date), str(to_date))
+
+        ndata = 0
+
+        async with client:
+            async for page in client.results(from_date, to_date, filters=filters):
+                for test_data in page['results']:
+                    if selection and not self._is_selected(test_data, selection):
+                        continue
+
+                    if self.metrics:
+                        self._add_metrics(test_data)
+                    if self.details != DETAILS_FULL:
+                        self._compact_details(test_data)
+
+                    yield self.metadata(test_data)
+                    ndata += 1
+
+        logger.info("Fetch process completed: %s tests data fetched", ndata)
+
     def fetch_items(self, category, **kwargs):
         """Fetch tests data
 
@@ -93,26 +666,374 @@ class Functest(Backend):
 
         :returns: a generator of items
         """
-        from_date = kwargs['from_date']
-        to_date = kwargs['to_date']
-
         logger.info("Fetching tests data of '%s' group from %s to %s",
-                    self.url, str(from_date),
-                    str(to_date) if to_date else '--')
+                    self.url, str(kwargs['from_date']),
+                    str(kwargs['to_date']) if kwargs['to_date'] else '--')
 
-        pages = self.client.results(from_date=from_date,
-                                    to_date=to_date)
-        ndata = 0
+        if len(self.urls) > 1:
+            items = self._fetch_servers_items(category, kwargs)
+        else:
+            items = self._fetch_selected_items(kwargs)
 
-        for raw_page in pages:
-            parsed_data = self.parse_json(raw_page)
+        ndata = 0
+        stats = self.stats
 
-            for test_data in parsed_data:
+        for test_data in items:
+            if stats:
+                # Time spent by the consumer until the next item is requested
+                returned_on = time.perf_counter()
                 yield test_data
-                ndata += 1
+                stats.record_item(time.perf_counter() - returned_on)
+            else:
+                yield test_data
+            ndata += 1
 
         logger.info("Fetch process completed: %s tests data fetched", ndata)
 
+        if stats:
+            stats.finish()
+
+    def _fetch_selected_items(self, kwargs):
+        """Fetch the items of the server, selecting them and compacting their details"""
+
+        from_date = kwargs['from_date']
+        to_date = kwargs['to_date']
+        shard_days = kwargs.get('shard_days', None)
+        shard_pages = kwargs.get('shard_pages', None)
+
+        filters = self._server_filters(kwargs)
+        selection = self._selection(kwargs)
+        skip_ids = set(kwargs.get('skip_ids', None) or [])
+
+        if self.consistency:
+            self.consistency_check = FunctestConsistencyCheck(self.bloom_capacity)
+
+        if shard_days or shard_pages:
+            items = self._fetch_sharded_items(from_date, to_date,
+                                              shard_days, shard_pages,
+                                              filters=filters)
+        else:
+            items = self._fetch_paginated_items(from_date, to_date,
+                                                kwargs.get('page', 1),
+                                                kwargs.get('last_id', None),
+                                                filters=filters)
+
+        for test_data in items:
+            # The server might ignore some filters
+            if selection and not self._is_selected(test_data, selection):
+                continue
+
+            # Items returned by the previous incremental process
+            if test_data['_id'] in skip_ids:
+                continue
+
+            if self.metrics:
+                self._add_metrics(test_data)
+            if self.details != DETAILS_FULL:
+                self._compact_details(test_data)
+
+            yield test_data
+
+        if self.consistency_check:
+            self.consistency_check.log()
+
+    def _fetch_servers_items(self, category, kwargs):
+        """Fetch the items of several servers concurrently.
+
+        Each server is fetched by a thread with a backend of its
+        own, which has its own connection to the archive. Items
+        are returned as they arrive; before returning each one,
+        `_item_origin` is set to its server, so `metadata` can set
+        it as its origin. Items are queued up to
+        `SERVERS_QUEUE_SIZE`. Errors of any server stop the
+        process.
+        """
+        from_archive = self.client.from_archive
+        items = queue.Queue(maxsize=self.SERVERS_QUEUE_SIZE)
+        stop = threading.Event()
+        done = object()
+
+        def put(entry):
+            while not stop.is_set():
+                try:
+                    items.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fetch_server(url):
+            try:
+                archive = Archive(self.archive.archive_path) if self.archive else None
+                backend = self._server_backend(url, archive)
+                backend.client = backend._init_client(from_archive=from_archive)
+                backend.client.stats = self.stats
+
+                for test_data in backend.fetch_items(category, **kwargs):
+                    if not put((url, test_data)):
+                        return
+                put((url, done))
+            except Exception as e:
+                put((url, e))
+
+        logger.info("Fetching tests data of %s servers", len(self.urls))
+
+        threads = [threading.Thread(target=fetch_server, args=(url,), daemon=True)
+                   for url in self.urls]
+        for thread in threads:
+            thread.start()
+
+        seen_ids = set()
+        pending = len(threads)
+
+        try:
+            while pending:
+                url, test_data = items.get()
+
+                if test_data is done:
+                    pending -= 1
+                    continue
+                if isinstance(test_data, Exception):
+                    raise test_data
+
+                if self.dedupe:
+                    if test_data['_id'] in seen_ids:
+                        continue
+                    seen_ids.add(test_data['_id'])
+
+                self._item_origin = url
+                yield test_data
+        finally:
+            self._item_origin = None
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _server_backend(self, url, archive):
+        """Build a backend to fetch one of the servers with the same options"""
+
+        return Functest(url, tag=self.tag, archive=archive, ssl_verify=self.ssl_verify,
+                        workers=self.workers, stream=self.stream, pool_size=self.pool_size,
+                        keep_alive=self.keep_alive, compress=self.compress,
+                        details=self.details,
+                        details_dir=self.details_store.dirpath if self.details_store else None,
+                        max_retries=self.max_retries, timeout=self.timeout,
+                        adaptive_rate=self.adaptive_rate,
+                        max_backoff=self.max_backoff, latency_factor=self.latency_factor,
+                        cache_file=self.cache_file, cache_size=self.cache_size,
+                        cache_ttl=self.cache_ttl,
+                        consistency=self.consistency, bloom_capacity=self.bloom_capacity,
+                        metrics=self.metrics, compress_archive=self.compress_archive)
+
+    def _fetch_paginated_items(self, from_date, to_date, first_page=1, skip_until=None,
+                               filters=None):
+        """Fetch the items of a query page by page, saving the progress"""
+
+        if first_page > 1:
+            logger.info("Resuming fetch process from page %s", first_page)
+
+        # Progress is not saved when the data comes from the archive
+        checkpoint = self.checkpoint if not self.client.from_archive else None
+
+        pages = self.client.results(from_date=from_date,
+                                    to_date=to_date,
+                                    page=first_page,
+                                    filters=filters)
+        pages = self._check_pages(pages, filters)
+        last_id = skip_until
+
+        for page in pages:
+            results = page['results']
+
+            # Pages might have shifted since the previous process
+            # stopped; skip the items it already returned
+            if skip_until:
+                results = self._skip_returned_items(results, skip_until)
+                skip_until = None
+
+            for test_data in results:
+                yield test_data
+                last_id = test_data['_id']
+
+            if checkpoint:
+                checkpoint.save(from_date, to_date,
+                                self.client._pagination(page)['current_page'],
+                                last_id, filters=filters)
+
+        if checkpoint:
+            checkpoint.remove()
+
+    def _fetch_sharded_items(self, from_date, to_date, shard_days=None, shard_pages=None,
+                             filters=None):
+        """Fetch the items of a query splitting its dates in windows"""
+
+        if shard_days:
+            windows = self._shard_by_days(from_date, to_date, shard_days)
+        else:
+            # Find out the size of the query with its first page
+            pages = self.client.results(from_date=from_date, to_date=to_date,
+                                        filters=filters)
+            first_page = next(pages)
+
+            if 'pagination' not in first_page:
+                # The results of this page are read again below
+                first_page['results'] = list(first_page['results'])
+
+            total_pages = self.client._pagination(first_page)['total_pages']
+
+            if total_pages <= shard_pages:
+                for page in self._check_pages(itertools.chain([first_page], pages), filters):
+                    yield from page['results']
+                return
+
+            pages.close()
+
+            pages = self.client.results(from_date=from_date, to_date=to_date,
+                                        page=total_pages, filters=filters)
+            last_page = next(pages)
+            pages.close()
+
+            start_dates = [parse_start_date(item['start_date'])
+                           for page in (first_page, last_page)
+                           for item in page['results']]
+            nwindows = math.ceil(total_pages / shard_pages)
+            windows = self._shard_evenly(from_date, to_date,
+                                         min(start_dates), max(start_dates),
+                                         nwindows)
+
+        logger.info("Fetching tests data in %s windows", len(windows))
+
+        # Items placed on the lower edge of a window can be
+        # returned again by the next one
+        edge_ids = set()
+
+        for window_from, _, pages in self.client.results_windows(windows, filters=filters):
+            lower_edge = window_from.strftime(FUNCTEST_DATETIME_FORMAT)
+            window_edge_ids = set()
+
+            # They are dropped before the consistency check, which
+            # would take them as duplicates of shifted pages
+            pages = self._drop_items(pages, edge_ids)
+
+            for page in self._check_pages(pages, filters):
+                for test_data in page['results']:
+                    if test_data['start_date'][:19] <= lower_edge:
+                        window_edge_ids.add(test_data['_id'])
+                    yield test_data
+
+            edge_ids = window_edge_ids
+
+    @staticmethod
+    def _drop_items(pages, ids):
+        """Drop the items with the given ids from the results of the pages"""
+
+        def drop(results):
+            for test_data in results:
+                if test_data['_id'] not in ids:
+                    yield test_data
+
+        for page in pages:
+            if ids:
+                page['results'] = drop(page['results'])
+            yield page
+
+    def _check_pages(self, pages, filters=None):
+        """Check the consistency of the pages of a query, when it is enabled"""
+
+        if not self.consistency_check:
+            return pages
+
+        def recover(from_date, to_date):
+            pages = self.client.results(from_date=from_date, to_date=to_date,
+                                        filters=filters)
+            for page in pages:
+                yield from page['results']
+
+        return self.consistency_check.check_pages(pages, recover)
+
+    @classmethod
+    def _server_filters(cls, kwargs):
+        """Get the API filters for the selection arguments with a single value"""
+
+        filters = {}
+
+        for arg, (_, param) in cls.SELECTION_ARGS.items():
+            values = kwargs.get(arg, None)
+            if values and len(values) == 1:
+                filters[param] = values[0]
+
+        return filters
+
+    @classmethod
+    def _selection(cls, kwargs):
+        """Get the sets of values to select, by item field"""
+
+        selection = {}
+
+        for arg, (field, _) in cls.SELECTION_ARGS.items():
+            values = kwargs.get(arg, None)
+            if values:
+                selection[field] = set(values)
+
+        return selection
+
+    @staticmethod
+    def _is_selected(item, selection):
+        for field, values in selection.items():
+            if item.get(field, None) not in values:
+                return False
+        return True
+
+    @staticmethod
+    def _shard_by_days(from_date, to_date, days):
+        """Split a range of dates in windows of a fixed number of days.
+
+        Windows are returned from the newest to the oldest one.
+        """
+        size = datetime.timedelta(days=days)
+        windows = []
+        upper = to_date
+
+        while True:
+            lower = (upper - size).replace(microsecond=0)
+            if lower <= from_date:
+                windows.append((from_date, upper))
+                break
+            windows.append((lower, upper))
+            upper = lower
+
+        return windows
+
+    @staticmethod
+    def _shard_evenly(from_date, to_date, oldest, newest, nwindows):
+        """Split a range of dates in windows of the same length.
+
+        The length of the windows is calculated using the dates
+        of the `oldest` and `newest` items of the range, so there
+        are no windows before or after them. Windows are returned
+        from the newest to the oldest one.
+        """
+        oldest = max(oldest, from_date)
+        newest = min(newest, to_date)
+        step = (newest - oldest) / nwindows
+
+        edges = [to_date]
+
+        for i in range(1, nwindows):
+            edge = (newest - i * step).replace(microsecond=0)
+            if edge < edges[-1] and edge > from_date:
+                edges.append(edge)
+
+        # When all the items share the same second, split the
+        # range in two halves to keep the queries of the windows
+        # different from the one of the whole range
+        if len(edges) == 1:
+            edges.append((from_date + (to_date - from_date) / 2).replace(microsecond=0))
+
+        edges.append(from_date)
+
+        return [(edges[i + 1], edges[i]) for i in range(len(edges) - 1)]
+
     @classmethod
     def has_archiving(cls):
         """Returns whether it supports archiving items on the fetch process.
@@ -121,13 +1042,28 @@ class Functest(Backend):
         """
         return True
 
+    def metadata(self, item, filter_classified=False):
+        """Add metadata to an item.
+
+        When several servers are fetched, the origin of the item
+        is the URL of its server, which is also used to build its
+        `uuid`.
+        """
+        item = super().metadata(item, filter_classified=filter_classified)
+
+        if self._item_origin:
+            item['origin'] = self._item_origin
+            item['uuid'] = uuid(self._item_origin, self.metadata_id(item['data']))
+
+        return item
+
     @classmethod
     def has_resuming(cls):
         """Returns whether it supports to resume the fetch process.
 
-        :returns: this backend does not support items resuming
+        :returns: this backend supports items resuming
         """
-        return False
+        return True
 
     @staticmethod
     def metadata_id(item):
@@ -148,7 +1084,7 @@ class Functest(Backend):
         :returns: a UNIX timestamp
         """
         ts = item['start_date']
-        ts = str_to_datetime(ts)
+        ts = parse_start_date(ts)
 
         return ts.timestamp()
 
@@ -175,10 +1111,217 @@ class Functest(Backend):
         result = json.loads(raw_json)
         return result['results']
 
+    @staticmethod
+    def parse_json_stream(chunks):
+        """Parse a Functest JSON stream incrementally.
+
+        The method reads the chunks of bytes of a JSON stream as
+        they are needed. It returns a dict with the members of
+        the stream, where `results` is a generator of the items of
+        that array. The members placed before `results` in the
+        stream, like `pagination`, are available at once; the
+        ones placed after it are added to the dict once the
+        generator is exhausted. Only one item is decoded at
+        a time.
+
+        :param chunks: iterable of chunks of bytes
+
+        :returns: a dict with the parsed data
+
+        :raises ValueError: when the stream is not valid JSON
+        """
+        reader = _JSONStreamReader(chunks)
+        return reader.read_page()
+
+    @staticmethod
+    def parse_number(value):
+        """Parse a number from a value of the details of an item.
+
+        The API returns some numbers as strings padded with
+        whitespaces, like `"     46.28"`. Those strings are
+        converted to `int` or `float`; numbers are returned as
+        they are.
+
+        :param value: value to parse
+
+        :returns: the number or `None` when the value is not
+            a finite number
+        """
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float)):
+            return value if math.isfinite(value) else None
+        if not isinstance(value, str):
+            return None
+
+        return _parse_number_string(value)
+
+    @staticmethod
+    def summarize_details(details):
+        """Summarize the details of an item.
+
+        When the details are a list of modules, like the ones of
+        `rally_sanity`, the summary has the number of modules and
+        the sum of their tests and durations; `success` is the
+        percentage of successful tests over all of them. Details
+        given as a dict are summarized from their own `tests`,
+        `duration` and `success` (or `failures`) fields. Totals
+        that cannot be calculated are set to `None`.
+
+        :param details: details of an item
+
+        :returns: a dict with the keys `modules`, `tests`,
+            `success` and `duration`
+        """
+        parse = Functest.parse_number
+
+        summary = {
+            'modules': 0,
+            'tests': None,
+            'success': None,
+            'duration': None
+        }
+
+        if isinstance(details, list):
+            summary['modules'] = len(details)
+            summary.update(Functest._aggregate_modules(Functest.parse_modules(details)))
+        elif isinstance(details, dict):
+            tests = parse(details.get('tests', None))
+            success = parse(details.get('success', None))
+            failures = parse(details.get('failures', None))
+
+            if success is None and tests and failures is not None:
+                success = round((tests - failures) * 100 / tests, 2)
+
+            summary['tests'] = tests
+            summary['success'] = success
+            summary['duration'] = parse(details.get('duration', None))
+
+        return summary
+
+    @staticmethod
+    def parse_modules(details):
+        """Parse the modules of the details of an item.
+
+        Details given as a list of modules, like the ones of
+        `rally_sanity`, are converted to records with the name
+        of the module and its `tests`, `success` and `duration`
+        as numbers; values that cannot be parsed are set to
+        `None`. The summary entries of the list, which have no
+        module, are skipped.
+
+        :param details: details of an item
+
+        :returns: a list of dicts with the keys `module`, `tests`,
+            `success` and `duration`
+        """
+        if not isinstance(details, list):
+            return []
+
+        parse = Functest.parse_number
+        modules = []
+
+        for module in details:
+            if not isinstance(module, dict) or 'module' not in module:
+                continue
+
+            module_details = module.get('details', None)
+            if not isinstance(module_details, dict):
+                module_details = {}
+
+            name = module['module']
+
+            modules.append({
+                'module': name.strip() if isinstance(name, str) else name,
+                'tests': parse(module_details.get('nb tests', None)),
+                'success': parse(module_details.get('success', None)),
+                'duration': parse(module_details.get('duration', None))
+            })
+
+        return modules
+
+    @staticmethod
+    def _aggregate_modules(modules):
+        """Sum the tests and durations of a list of parsed modules"""
+
+        tests = None
+        success = None
+        duration = None
+        succeeded = 0.0
+
+        for module in modules:
+            if module['tests'] is not None:
+                tests = (tests or 0) + module['tests']
+                if module['success'] is not None:
+                    succeeded += module['tests'] * module['success']
+            if module['duration'] is not None:
+                duration = (duration or 0) + module['duration']
+
+        if tests:
+            success = round(succeeded / tests, 2)
+        if duration is not None:
+            duration = round(duration, 2)
+
+        return {
+            'tests': tests,
+            'success': success,
+            'duration': duration
+        }
+
+    def _add_metrics(self, item):
+        """Add the metrics of the modules of an item and their totals"""
+
+        modules = self.parse_modules(item.get('details', None))
+
+        metrics = {'modules': modules}
+        metrics.update(self._aggregate_modules(modules))
+
+        item['metrics'] = metrics
+
+    def _compact_details(self, item):
+        """Replace the details of an item with their summary"""
+
+        details = item.get('details', None)
+
+        if self.details_store:
+            item['details_ref'] = self.details_store.put(item['_id'], details)
+
+        item['details'] = self.summarize_details(details)
+
+    @staticmethod
+    def _skip_returned_items(results, last_id):
+        """Remove the items up to `last_id` from a list of results.
+
+        When `last_id` is not found, the list is returned as it is.
+        """
+        results = list(results)
+
+        for i, item in enumerate(results):
+            if item['_id'] == last_id:
+                return results[i + 1:]
+        return results
+
     def _init_client(self, from_archive=False):
         """Init client"""
 
-        return FunctestClient(self.url, self.archive, from_archive, self.ssl_verify)
+        return FunctestClient(self.url, self.archive, from_archive, self.ssl_verify,
+                              workers=self.workers, stream=self.stream,
+                              pool_size=self.pool_size, keep_alive=self.keep_alive,
+                              compress=self.compress, max_retries=self.max_retries,
+                              timeout=self.timeout,
+                              adaptive_rate=self.adaptive_rate, max_backoff=self.max_backoff,
+                              latency_factor=self.latency_factor, cache=self._init_cache(),
+                              stats=self.stats,
+                              compress_archive=self.compress_archive)
+
+    def _init_cache(self):
+        """Init the cache of responses, when it is set"""
+
+        if not self.cache_file:
+            return None
+
+        return FunctestResponseCache(self.cache_file, max_size=self.cache_size,
+                                     ttl=self.cache_ttl)
 
 
 class FunctestClient(HttpClient):
@@ -191,6 +1334,46 @@ class FunctestClient(HttpClient):
     :param archive: an archive to store/read fetched data
     :param from_archive: it tells whether to write/read the archive
     :param ssl_verify: enable/disable SSL verification
+    :param workers: number of threads used to fetch pages concurrently;
+        when it is `1`, pages are fetched one after the other
+    :param stream: decode the results of the pages incrementally;
+        pages downloaded one after the other are decoded while they
+        are read from the connection; archived pages, pages fetched
+        by several workers and cached pages are read completely
+        first, so memory is only bounded by the size of an item
+        when none of them is used
+    :param pool_size: maximum number of connections kept open with
+        the server; when it is `None`, the pool has room for the
+        connections of all the workers and never less than
+        `DEFAULT_POOL_SIZE`
+    :param keep_alive: reuse connections between requests; when it
+        is disabled, connections are closed after each response
+    :param compress: ask the server for gzip or deflate compressed
+        responses; otherwise, only uncompressed ones are accepted
+    :param max_retries: maximum retries per request; by default,
+        `MAX_RETRIES`
+    :param timeout: seconds to wait for the server to accept a
+        connection or to send data, set on every request of the
+        session; by default, `TIMEOUT`
+    :param adaptive_rate: requests are sent through a
+        `FunctestRateLimiter`, which adapts the number of concurrent
+        requests, up to `workers`, and the time between them to the
+        latency and errors of the server; failed requests are retried
+        by the limiter instead of by the retry policy of `HttpClient`
+    :param max_backoff: maximum seconds to wait between requests
+        when the rate is adapted
+    :param latency_factor: times the lowest latency of the server
+        a request can take before the rate is reduced
+    :param cache: `FunctestResponseCache` to keep the pages fetched;
+        fresh pages are read from it and stale ones are validated
+        with conditional requests; cached pages are downloaded
+        completely before they are decoded, even when the client
+        streams them
+    :param stats: `FunctestStats` object where the requests and the
+        decoding of the pages are recorded; when it is not set, pages
+        are not measured
+    :param compress_archive: store the bodies of the responses in
+        the archive compressed with gzip; see `_CompressedArchive`
     """
     FUNCTEST_API_PATH = "/api/v1/"
 
@@ -201,45 +1384,1748 @@ class FunctestClient(HttpClient):
     PFROM_DATE = 'from'
     PTO_DATE = 'to'
     PPAGE = 'page'
+    PPROJECT = 'project'
+    PCASE = 'case'
+    PINSTALLER = 'installer'
+    PPOD = 'pod'
 
     # Maximum retries per request
     MAX_RETRIES = 3
 
-    def __init__(self, base_url, archive=None, from_archive=False, ssl_verify=True):
-        super().__init__(base_url, max_retries=FunctestClient.MAX_RETRIES,
+    # Seconds to wait for the server to accept a connection or to send data
+    TIMEOUT = 60
+
+    # Size of the chunks read when pages are decoded incrementally
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    # Minimum number of connections of the pool
+    DEFAULT_POOL_SIZE = 10
+
+    # Pages of a window fetched by a worker and not consumed yet
+    WINDOW_QUEUE_SIZE = 4
+
+    def __init__(self, base_url, archive=None, from_archive=False, ssl_verify=True,
+                 workers=1, stream=False, pool_size=None, keep_alive=True,
+                 compress=True, max_retries=None, timeout=None, adaptive_rate=False,
+                 max_backoff=None, latency_factor=None, cache=None,
+                 stats=None, compress_archive=False):
+        self.workers = workers
+        self.timeout = self.TIMEOUT if timeout is None else timeout
+        self.stream = stream
+        self.pool_size = pool_size or max(workers, self.DEFAULT_POOL_SIZE)
+        self.keep_alive = keep_alive
+        self.compress = compress
+        self.cache = cache
+        self.stats = stats
+        self.limiter = None
+
+        max_retries = self.MAX_RETRIES if max_retries is None else max_retries
+
+        if adaptive_rate:
+            self.limiter = FunctestRateLimiter(max_concurrency=workers,
+                                               max_retries=max_retries,
+                                               max_backoff=max_backoff,
+                                               latency_factor=latency_factor)
+
+        super().__init__(base_url, max_retries=max_retries,
                          archive=archive, from_archive=from_archive,
                          ssl_verify=ssl_verify)
 
-    def results(self, from_date, to_date=None):
-        """Get test cases results."""
+        if self.archive and compress_archive and not from_archive:
+            self.archive = _CompressedArchive(self.archive)
 
-        fdt = from_date.strftime("%Y-%m-%d %H:%M:%S")
-        params = {
-            self.PFROM_DATE: fdt,
-            self.PPAGE: 1
-        }
+        if self.stream:
+            self._check_stream()
 
-        if to_date:
-            tdt = to_date.strftime("%Y-%m-%d %H:%M:%S")
-            params[self.PTO_DATE] = tdt
+        self._setup_connections()
+
+    def _check_stream(self):
+        """Warn when pages are read completely even though they are streamed"""
+
+        reasons = []
+        if self.archive:
+            reasons.append('archived')
+        if self.workers > 1:
+            reasons.append('fetched by several workers')
+        if self.cache:
+            reasons.append('cached')
+
+        if reasons:
+            logger.warning("Pages are read completely before they are decoded when they are %s; "
+                           "streaming does not bound the memory used by each page",
+                           ', '.join(reasons))
+
+    def _setup_connections(self):
+        """Set the pool of connections and the headers of the session.
+
+        Adapters are replaced by others with room for `pool_size`
+        connections per host, keeping the retry policy set by
+        `HttpClient`. When the rate is adapted, requests go through
+        the limiter, which also retries them. Requests sent without
+        a timeout wait up to `timeout` seconds for the server. When
+        there is a cache, it is checked before sending any request.
+        """
+        for prefix in ('http://', 'https://'):
+            if self.limiter:
+                adapter = _AdaptiveHTTPAdapter(self.limiter, timeout=self.timeout,
+                                               pool_maxsize=self.pool_size)
+            else:
+                retries = self.session.get_adapter(prefix).max_retries
+                adapter = _TimeoutHTTPAdapter(timeout=self.timeout,
+                                              pool_maxsize=self.pool_size,
+                                              max_retries=retries)
+            if self.cache:
+                adapter = _CachedHTTPAdapter(self.cache, adapter)
+            self.session.mount(prefix, adapter)
+
+        headers = {
+            'Accept-Encoding': 'gzip, deflate' if self.compress else 'identity',
+            'Connection': 'keep-alive' if self.keep_alive else 'close'
+        }
+        self.session.headers.update(headers)
+
+    def results(self, from_date, to_date=None, page=1, filters=None):
+        """Get test cases results.
+
+        Each page is decoded only once and returned as a dict with
+        the keys `pagination` and `results`. Pages are returned
+        starting from `page`. Results can be filtered with the
+        API parameters `project`, `case`, `installer` and `pod`,
+        set in the `filters` dict.
+
+        The first page is always requested alone to find out the number
+        of pages of the query. When the client runs with more than one
+        worker, the rest of the pages are requested concurrently but they
+        are returned in the same order they would have been returned
+        fetching them one by one. When the data comes from the archive,
+        pages are read one by one with `HttpClient.fetch`.
+        """
+        url = urijoin(self.base_url, self.FUNCTEST_API_PATH, self.RRESULTS)
+        params = self._results_params(from_date, to_date, page, filters)
 
         while True:
-            url = urijoin(self.base_url, self.FUNCTEST_API_PATH, self.RRESULTS)
-            response = self.fetch(url, payload=params)
-            content = response.text
+            content = self._fetch_page(url, params)
             yield content
 
-            j = json.loads(content)
-            page = j['pagination']['current_page']
-            total_pages = j['pagination']['total_pages']
+            pagination = self._pagination(content)
+            page = pagination['current_page']
+            total_pages = pagination['total_pages']
 
             if page >= total_pages:
                 break
 
+            if self.workers > 1 and not self.from_archive:
+                yield from self._fetch_pages(url, params, page + 1, total_pages)
+                break
+
             params[self.PPAGE] = page + 1
 
+    def results_windows(self, windows, filters=None):
+        """Get test cases results of several windows of dates.
 
-class FunctestCommand(BackendCommand):
+        When the client runs with more than one worker, windows are
+        fetched concurrently, each one of them page by page. Windows
+        are returned in the same order they were given as tuples with
+        the `from` and `to` dates of the window and an iterator of its
+        pages.
+
+        :param windows: list of `(from_date, to_date)` tuples
+        :param filters: dict of API parameters to filter the results
+        """
+        if self.workers > 1 and not self.from_archive:
+            yield from self._fetch_windows(windows, filters)
+            return
+
+        for from_date, to_date in windows:
+            yield from_date, to_date, self.results(from_date, to_date, filters=filters)
+
+    @classmethod
+    def _results_params(cls, from_date, to_date=None, page=1, filters=None):
+        """Build the parameters of a query to the results resource"""
+
+        fdt = from_date.strftime(FUNCTEST_DATETIME_FORMAT)
+        params = {
+            cls.PFROM_DATE: fdt,
+            cls.PPAGE: page
+        }
+
+        if to_date:
+            tdt = to_date.strftime(FUNCTEST_DATETIME_FORMAT)
+            params[cls.PTO_DATE] = tdt
+
+        if filters:
+            params.update(filters)
+
+        return params
+
+    def _fetch_page(self, url, params):
+        """Fetch and decode a page, recording it when there are stats"""
+
+        if not self.stats:
+            return self._decode(self.fetch(url, payload=params, stream=self.stream))
+
+        start = time.perf_counter()
+        response = self.fetch(url, payload=params, stream=self.stream)
+        fetched_on = time.perf_counter()
+        content = self._decode(response)
+
+        # Pages read from the archive have no latency
+        latency = None if self.from_archive else fetched_on - start
+
+        self._record_page(params, response, content,
+                          latency, time.perf_counter() - fetched_on)
+
+        return content
+
+    def _record_page(self, payload, response, content, latency, decode_time):
+        """Record a page in the stats.
+
+        The size of a page is the number of bytes read from the
+        connection, so compressed pages count their compressed size.
+        The body of streamed pages is not read yet when they are
+        recorded; their size is taken from `Content-Length`, and
+        their number of items is not known.
+        """
+        raw = getattr(response, 'raw', None)
+
+        if not response._content_consumed:
+            nbytes = response.headers.get('Content-Length', None)
+            nbytes = int(nbytes) if nbytes else None
+        elif raw is not None and hasattr(raw, 'tell'):
+            nbytes = raw.tell()
+        else:
+            nbytes = len(response.content or b'')
+
+        # Retries made by the limiter or by urllib3
+        retries = getattr(response, 'retries', None)
+        if retries is None:
+            history = getattr(getattr(raw, 'retries', None), 'history', None)
+            retries = len(history) if history else 0
+
+        results = content['results']
+        nitems = len(results) if isinstance(results, list) else None
+
+        self.stats.record_page(payload[self.PPAGE], latency, nbytes,
+                               decode_time, nitems, retries)
+
+    def _fetch_pages(self, url, params, first_page, last_page):
+        """Fetch a range of pages using the pool of workers"""
+
+        def fetch_page(page):
+            payload = dict(params)
+            payload[self.PPAGE] = page
+            return [self._fetch_remote_page(url, payload)]
+
+        for _, fetched in self._run_workers(fetch_page, range(first_page, last_page + 1)):
+            yield from self._accept_pages(url, fetched)
+
+    def _fetch_windows(self, windows, filters=None):
+        """Fetch windows of dates using the pool of workers.
+
+        Each worker sends the pages of its window through a queue
+        of `WINDOW_QUEUE_SIZE` pages as soon as they are decoded,
+        so only a few pages of each window are kept in memory.
+        As in `_run_workers`, up to twice the number of workers
+        windows are fetched ahead. The pages of a window are read
+        completely before moving to the next one.
+        """
+        url = urijoin(self.base_url, self.FUNCTEST_API_PATH, self.RRESULTS)
+        stop = threading.Event()
+        done = object()
+
+        def put(pages, entry):
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fetch_window(window, pages):
+            from_date, to_date = window
+            payload = self._results_params(from_date, to_date, filters=filters)
+
+            try:
+                while True:
+                    payload, response, content = self._fetch_remote_page(url, payload,
+                                                                         stream=False)
+                    if not put(pages, (payload, response, content)):
+                        return
+
+                    if content is None:
+                        break
+
+                    page = content['pagination']['current_page']
+                    if page >= content['pagination']['total_pages']:
+                        break
+
+                    payload = dict(payload)
+                    payload[self.PPAGE] = page + 1
+            except Exception as e:
+                put(pages, e)
+            else:
+                put(pages, done)
+
+        def window_pages(pages):
+            while True:
+                fetched = pages.get()
+                if fetched is done:
+                    return
+                if isinstance(fetched, Exception):
+                    raise fetched
+                yield fetched
+
+        max_pending = 2 * self.workers
+        pending = collections.deque()
+        windows = iter(windows)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                while True:
+                    for window in itertools.islice(windows, max_pending - len(pending)):
+                        pages = queue.Queue(maxsize=self.WINDOW_QUEUE_SIZE)
+                        future = executor.submit(fetch_window, window, pages)
+                        pending.append((window, pages, future))
+
+                    if not pending:
+                        break
+
+                    (from_date, to_date), pages, _ = pending.popleft()
+                    accepted = self._accept_pages(url, window_pages(pages))
+
+                    yield from_date, to_date, accepted
+
+                    # Unread pages are archived before fetching new windows
+                    collections.deque(accepted, maxlen=0)
+            finally:
+                stop.set()
+                for _, _, future in pending:
+                    future.cancel()
+
+    def _run_workers(self, func, args):
+        """Run `func` over `args` with a pool of threads.
+
+        Results are returned as `(arg, result)` tuples in the same
+        order of `args`. The number of calls running, or finished but
+        not consumed yet, is limited to twice the number of workers.
+        """
+        max_pending = 2 * self.workers
+        pending = collections.deque()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                for arg in args:
+                    pending.append((arg, executor.submit(func, arg)))
+
+                    if len(pending) >= max_pending:
+                        arg, future = pending.popleft()
+                        yield arg, future.result()
+
+                while pending:
+                    arg, future = pending.popleft()
+                    yield arg, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _fetch_remote_page(self, url, payload, stream=None):
+        """Fetch and decode a page without using the archive.
+
+        This method is run by the workers of the pool. HTTP errors
+        are returned in place of the response, with no content, so
+        the calling thread can store them in the archive. Pages
+        are downloaded completely; `stream` only sets how they
+        are decoded.
+
+        :returns: a tuple with the payload, the response and the
+            decoded content
+        """
+        start = time.perf_counter()
+        response = self.session.get(url, params=payload,
+                                    verify=self.ssl_verify)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            return payload, e, None
+
+        if not self.stats:
+            return payload, response, self._decode(response, stream=stream)
+
+        fetched_on = time.perf_counter()
+        content = self._decode(response, stream=stream)
+
+        self._record_page(payload, response, content,
+                          fetched_on - start, time.perf_counter() - fetched_on)
+
+        return payload, response, content
+
+    def _accept_pages(self, url, fetched):
+        """Store in the archive the pages fetched by the workers.
+
+        Pages are stored by the calling thread following the order
+        of the pages, so archives written this way can be read
+        fetching the pages one by one.
+
+        :returns: a generator of decoded pages
+
+        :raises HTTPError: when one of the pages failed
+        """
+        for payload, response, content in fetched:
+            self._archive_response(url, payload, response)
+
+            if isinstance(response, Exception):
+                raise response
+
+            yield content
+
+    def _decode(self, response, stream=None):
+        """Decode the JSON body of a response.
+
+        The body is decoded straight from the raw bytes, so there
+        is no need to build the text of the response first. When
+        `stream` is set, or it is `None` and the client streams
+        pages, the results are decoded incrementally.
+        """
+        stream = self.stream if stream is None else stream
+
+        if stream:
+            chunks = response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE)
+            return Functest.parse_json_stream(chunks)
+
+        return response.json()
+
+    @staticmethod
+    def _pagination(content):
+        """Get the pagination data of a decoded page.
+
+        In pages decoded incrementally, the pagination data might be
+        placed after the results. If it is not available yet, the
+        results not consumed are read and discarded.
+        """
+        if 'pagination' not in content:
+            collections.deque(content['results'], maxlen=0)
+
+        return content['pagination']
+
+    def _archive_response(self, url, payload, response):
+        """Store a response fetched outside `HttpClient.fetch` in the archive"""
+
+        if self.archive:
+            self.archive.store(url, payload, None, response)
+
+
+class _CompressedArchive:
+    """Archive that stores the bodies of the responses compressed.
+
+    Responses are stored as they are, as pickled `requests.Response`
+    objects, in the same table of the archive. Only their body is
+    replaced by a `_GzipBody`, which is pickled compressed with gzip
+    and unpickled decompressed by `gzip.decompress`. Thus, the
+    responses read from the archive are the original ones for any
+    tool that reads it, including previous versions of this backend.
+    Errors are stored with no changes. The rest of the attributes
+    and methods are the ones of the archive.
+
+    :param archive: archive where the responses are stored
+    """
+    COMPRESS_LEVEL = 6
+
+    def __init__(self, archive):
+        self._archive = archive
+
+    def __getattr__(self, name):
+        return getattr(self._archive, name)
+
+    def store(self, uri, payload, headers, data):
+        if isinstance(data, requests.Response):
+            data = self.compress_response(data)
+
+        self._archive.store(uri, payload, headers, data)
+
+    @classmethod
+    def compress_response(cls, response):
+        """Build a copy of a response to be pickled with its body compressed"""
+
+        compressed = requests.Response()
+        compressed.__setstate__(response.__getstate__())
+        compressed._content = _GzipBody(response.content, compresslevel=cls.COMPRESS_LEVEL)
+
+        return compressed
+
+
+class _GzipBody:
+    """Body of a response that is pickled compressed with gzip.
+
+    These objects are only built to be pickled; they are unpickled
+    as the original bytes of the body.
+    """
+    def __init__(self, content, compresslevel=9):
+        self.compressed = gzip.compress(content, compresslevel=compresslevel)
+
+    def __reduce__(self):
+        return gzip.decompress, (self.compressed,)
+
+
+class FunctestRateLimiter:
+    """Adaptive limiter of the requests sent to a Functest server.
+
+    The limiter sets how many requests can be in flight and how much
+    time passes between the start of two of them. It follows an
+    additive increase, multiplicative decrease policy: after as many
+    successful responses as the current concurrency, one more request
+    is allowed and the time between them is halved; on errors (5xx,
+    429 and timeouts) the concurrency is halved and the time between
+    requests doubled. Responses slower than `latency_factor` times
+    the lowest latency seen reduce the concurrency by one. Limits
+    are reduced at most once per latency period, as the requests
+    already in flight are likely to fail too. A `Retry-After` delay
+    stops every request until it expires.
+
+    The limiter is shared by the threads of the client.
+
+    :param max_concurrency: maximum number of requests in flight
+    :param max_retries: maximum retries per request
+    :param max_backoff: maximum seconds between two requests or
+        waiting for a `Retry-After` delay
+    :param latency_factor: times the lowest latency a response
+        can take before it is considered slow
+    """
+    MIN_CONCURRENCY = 1
+    BASE_DELAY = 0.5
+    DEFAULT_MAX_BACKOFF = 60
+    DEFAULT_LATENCY_FACTOR = 4
+
+    # Weight of the last sample in the moving averages
+    SMOOTHING = 0.2
+
+    def __init__(self, max_concurrency=1, max_retries=FunctestClient.MAX_RETRIES,
+                 max_backoff=None, latency_factor=None):
+        self.max_concurrency = max(max_concurrency, self.MIN_CONCURRENCY)
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff or self.DEFAULT_MAX_BACKOFF
+        self.latency_factor = latency_factor or self.DEFAULT_LATENCY_FACTOR
+
+        self.concurrency = self.max_concurrency
+        self.delay = 0
+        self.latency = None
+        self.min_latency = None
+        self.error_rate = 0.0
+        self.nrequests = 0
+        self.nerrors = 0
+
+        self._in_flight = 0
+        self._successes = 0
+        self._next_start = 0
+        self._blocked_until = 0
+        self._hold_until = 0
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def is_error(status_code):
+        """Check whether a status code means the server is overloaded or failing"""
+
+        return status_code == 429 or status_code >= 500
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Get the seconds to wait from a `Retry-After` header; `None` when it is not valid"""
+
+        if not value:
+            return None
+
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+
+        try:
+            date = datetime_to_utc(email.utils.parsedate_to_datetime(value))
+        except (TypeError, ValueError):
+            return None
+
+        return max((date - datetime_utcnow()).total_seconds(), 0)
+
+    def acquire(self):
+        """Wait until a new request can be sent"""
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self._blocked_until, self._next_start) - now
+
+                if wait <= 0 and self._in_flight < self.concurrency:
+                    break
+
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+            self._in_flight += 1
+            self._next_start = now + self.delay
+
+    def release(self, latency=None, error=False, retry_after=None):
+        """Update the limits with the result of a request.
+
+        :param latency: seconds the request took, when it succeeded
+        :param error: whether the request failed
+        :param retry_after: value of the `Retry-After` header
+        """
+        with self._cond:
+            now = time.monotonic()
+
+            self._in_flight -= 1
+            self.nrequests += 1
+            self.error_rate += self.SMOOTHING * ((1.0 if error else 0.0) - self.error_rate)
+
+            wait = self.parse_retry_after(retry_after)
+            if wait is not None:
+                self._blocked_until = max(self._blocked_until,
+                                          now + min(wait, self.max_backoff))
+
+            if error:
+                self.nerrors += 1
+
+                # Requests sent before the last decrease can fail too
+                if now >= self._hold_until:
+                    self._decrease(now, self.concurrency // 2)
+                    self.delay = min(max(self.delay * 2, self.BASE_DELAY), self.max_backoff)
+            elif latency is not None:
+                self._track_latency(now, latency)
+
+            self._cond.notify_all()
+
+    def _track_latency(self, now, latency):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.SMOOTHING * (latency - self.latency)
+
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+
+        if self.latency > self.min_latency * self.latency_factor:
+            if now >= self._hold_until:
+                self._decrease(now, self.concurrency - 1)
+            return
+
+        self._successes += 1
+
+        if self._successes >= self.concurrency:
+            self._successes = 0
+            self.concurrency = min(self.concurrency + 1, self.max_concurrency)
+            self.delay = self.delay / 2 if self.delay > self.BASE_DELAY / 8 else 0
+
+    def _decrease(self, now, concurrency):
+        concurrency = max(concurrency, self.MIN_CONCURRENCY)
+
+        if concurrency < self.concurrency:
+            logger.debug("Reducing concurrent requests from %s to %s",
+                         self.concurrency, concurrency)
+
+        self.concurrency = concurrency
+        self._successes = 0
+        self._hold_until = now + (self.latency or self.BASE_DELAY)
+
+
+class _TimeoutHTTPAdapter(requests.adapters.HTTPAdapter):
+    """Transport adapter that sets a timeout on the requests.
+
+    `requests` waits for the server forever unless a timeout is
+    given on each request. Requests sent without one wait up to
+    `timeout` seconds instead.
+    """
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        timeout = self.timeout if timeout is None else timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+class _AdaptiveHTTPAdapter(_TimeoutHTTPAdapter):
+    """Transport adapter that sends the requests through a rate limiter.
+
+    Requests that fail with errors the limiter tracks are retried
+    up to the `max_retries` of the limiter; the last response or
+    exception is returned when no retries are left.
+    """
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(max_retries=0, **kwargs)
+
+    def send(self, request, **kwargs):
+        retries = 0
+
+        while True:
+            self.limiter.acquire()
+            start = time.monotonic()
+
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.limiter.release(error=True)
+                if retries >= self.limiter.max_retries:
+                    raise
+                retries += 1
+                continue
+
+            if not self.limiter.is_error(response.status_code):
+                self.limiter.release(latency=time.monotonic() - start)
+                response.retries = retries
+                return response
+
+            self.limiter.release(error=True,
+                                 retry_after=response.headers.get('Retry-After', None))
+
+            if retries >= self.limiter.max_retries:
+                response.retries = retries
+                return response
+
+            logger.debug("Request to %s failed with %s; retrying",
+                         request.url, response.status_code)
+            response.close()
+            retries += 1
+
+
+class FunctestResponseCache:
+    """On-disk cache of the pages returned by a Functest server.
+
+    Pages are stored in a SQLite database with the validators of
+    their responses (`ETag` and `Last-Modified`), keyed by their
+    URL and their normalized query (`from`, `to`, `page` and the
+    filters, sorted). A page is fresh during `ttl` seconds since
+    it was stored or validated for the last time. When the total
+    size of the pages exceeds `max_size`, the least recently used
+    ones are removed.
+
+    Unlike the Perceval archive, which replays a fetch process
+    exactly, the cache only avoids downloading pages again. It
+    can be shared by the threads of a client.
+
+    :param path: path to the database of the cache
+    :param max_size: maximum size of the pages in megabytes
+    :param ttl: seconds a page is fresh
+    """
+    DEFAULT_MAX_SIZE = 256
+    DEFAULT_TTL = 3600
+
+    CACHE_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            key TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            content_type TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            validated_on REAL NOT NULL,
+            accessed_on REAL NOT NULL,
+            size INTEGER NOT NULL
+        )
+    """
+
+    CachedPage = collections.namedtuple('CachedPage',
+                                        ['body', 'content_type', 'etag',
+                                         'last_modified', 'validated_on'])
+
+    def __init__(self, path, max_size=None, ttl=None):
+        self.path = path
+        self.max_size = int((max_size or self.DEFAULT_MAX_SIZE) * 1024 * 1024)
+        self.ttl = self.DEFAULT_TTL if ttl is None else ttl
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(self.CACHE_SCHEMA)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_on)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(url):
+        """Build the key of a page from its URL, sorting its query"""
+
+        parts = urllib.parse.urlsplit(url)
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query)))
+
+        return urllib.parse.urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+    def get(self, key):
+        """Get a page; returns `None` when it is not cached"""
+
+        with self._lock:
+            row = self._conn.execute("SELECT body, content_type, etag, last_modified, validated_on "
+                                     "FROM pages WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+
+            self._conn.execute("UPDATE pages SET accessed_on = ? WHERE key = ?",
+                               (time.time(), key))
+            self._conn.commit()
+
+        return self.CachedPage(*row)
+
+    def is_fresh(self, page):
+        """Check whether a page can be used without validating it"""
+
+        return time.time() - page.validated_on < self.ttl
+
+    def put(self, key, body, content_type=None, etag=None, last_modified=None):
+        """Store a page, removing the least recently used ones when the cache is full"""
+
+        if len(body) > self.max_size:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (key, body, content_type, etag, last_modified,
+                                now, now, len(body)))
+            self._evict()
+            self._conn.commit()
+
+    def validate(self, key):
+        """Mark a page as fresh once the server confirmed it did not change"""
+
+        with self._lock:
+            self._conn.execute("UPDATE pages SET validated_on = ? WHERE key = ?",
+                               (time.time(), key))
+            self._conn.commit()
+
+    def size(self):
+        """Total size of the pages in bytes"""
+
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+        if total <= self.max_size:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM pages ORDER BY accessed_on").fetchall()
+
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+            self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            total -= size
+
+
+class _CachedHTTPAdapter(requests.adapters.BaseAdapter):
+    """Transport adapter that reads and stores pages in a cache.
+
+    Fresh pages are returned from the cache without sending any
+    request. Stale pages with validators are requested with
+    `If-None-Match` and `If-Modified-Since`; when the server
+    replies `304 Not Modified`, the cached page is returned.
+    Any other request is sent by the wrapped adapter.
+    """
+    def __init__(self, cache, adapter):
+        self.cache = cache
+        self.adapter = adapter
+        super().__init__()
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return self.adapter.send(request, **kwargs)
+
+        key = self.cache.make_key(request.url)
+        page = self.cache.get(key)
+
+        if page and self.cache.is_fresh(page):
+            return self._build_response(request, page)
+
+        if page:
+            request = request.copy()
+            if page.etag:
+                request.headers['If-None-Match'] = page.etag
+            if page.last_modified:
+                request.headers['If-Modified-Since'] = page.last_modified
+
+        response = self.adapter.send(request, **kwargs)
+
+        if response.status_code == 304 and page:
+            response.close()
+            self.cache.validate(key)
+            return self._build_response(request, page)
+
+        if response.status_code == 200:
+            self.cache.put(key, response.content,
+                           content_type=response.headers.get('Content-Type', None),
+                           etag=response.headers.get('ETag', None),
+                           last_modified=response.headers.get('Last-Modified', None))
+
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+    @staticmethod
+    def _build_response(request, page):
+        """Build a response with a cached page"""
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = request.url
+        response.request = request
+        response._content = page.body
+        response._content_consumed = True
+
+        headers = {
+            'Content-Type': page.content_type,
+            'ETag': page.etag,
+            'Last-Modified': page.last_modified
+        }
+        response.headers = requests.structures.CaseInsensitiveDict(
+            {name: value for name, value in headers.items() if value}
+        )
+
+        return response
+
+
+class AsyncFunctestClient:
+    """Functest REST API client based on asyncio.
+
+    This client fetches the same resources than `FunctestClient`
+    using `aiohttp`, so many clients can run in one event loop
+    without tying up a thread per request. It must be used as an
+    async context manager, which opens and closes its session.
+
+    Failed requests are retried with an exponential backoff,
+    honouring the `Retry-After` header when it is set. Responses
+    are stored in the archive as `requests.Response` objects with
+    the same parameters used by `FunctestClient`, so the archives
+    written by this client can be read by the sync one.
+
+    :param base_url: URL of the Functest server
+    :param archive: an archive to store fetched data
+    :param ssl_verify: enable/disable SSL verification
+    :param limit: maximum number of concurrent requests
+    :param max_retries: maximum retries per request; by default,
+        `FunctestClient.MAX_RETRIES`
+    :param timeout: seconds to wait for the server to accept a
+        connection or to send data; by default, `FunctestClient.TIMEOUT`
+    :param backoff_factor: seconds to wait before the first retry;
+        the time doubles on each retry
+
+    :raises BackendError: when `aiohttp` is not installed
+    """
+    DEFAULT_LIMIT = 10
+    BACKOFF_FACTOR = 0.5
+
+    # Responses retried, as done by `HttpClient`
+    RETRY_STATUS_CODES = [408, 413, 423, 429, 503, 504]
+
+    def __init__(self, base_url, archive=None, ssl_verify=True, limit=DEFAULT_LIMIT,
+                 max_retries=None, timeout=None, backoff_factor=BACKOFF_FACTOR):
+        if not aiohttp:
+            cause = "aiohttp is required by the async client; install the 'async' extra"
+            raise BackendError(cause=cause)
+
+        self.base_url = base_url
+        self.archive = archive
+        self.ssl_verify = ssl_verify
+        self.limit = limit
+        self.max_retries = FunctestClient.MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = FunctestClient.TIMEOUT if timeout is None else timeout
+        self.backoff_factor = backoff_factor
+        self.session = None
+
+    async def __aenter__(self):
+        connector_args = {} if self.ssl_verify else {'ssl': False}
+        connector = aiohttp.TCPConnector(limit=self.limit, **connector_args)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout,
+                                        sock_read=self.timeout)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self
+
+    async def __aexit__(self, *args):
+        await self.session.close()
+        self.session = None
+
+    async def results(self, from_date, to_date=None, page=1, filters=None):
+        """Get test cases results.
+
+        Async generator of the decoded pages of a query, returned as
+        dicts with the keys `pagination` and `results`. The first page
+        is requested alone to find out the number of pages; up to
+        `limit` of the rest are requested concurrently, but they are
+        returned and archived in order.
+
+        :raises HTTPError: when a request fails after its retries
+        """
+        url = urijoin(self.base_url, FunctestClient.FUNCTEST_API_PATH,
+                      FunctestClient.RRESULTS)
+        params = FunctestClient._results_params(from_date, to_date, page, filters)
+
+        response = await self._fetch(url, params)
+        content = self._accept_response(url, params, response)
+        yield content
+
+        pagination = content['pagination']
+        next_page = pagination['current_page'] + 1
+        total_pages = pagination['total_pages']
+
+        pending = collections.deque()
+
+        try:
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < self.limit:
+                    payload = dict(params)
+                    payload[FunctestClient.PPAGE] = next_page
+                    task = asyncio.ensure_future(self._fetch(url, payload))
+                    pending.append((payload, task))
+                    next_page += 1
+
+                payload, task = pending.popleft()
+                response = await task
+                yield self._accept_response(url, payload, response)
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def _fetch(self, url, payload):
+        """Fetch a page retrying failed requests.
+
+        :returns: a `requests.Response` or, when the request
+            failed, the `HTTPError` of the response
+        """
+        retries = 0
+
+        while True:
+            try:
+                async with self.session.get(url, params=payload) as resp:
+                    body = await resp.read()
+                    response = self._build_response(resp, body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if retries >= self.max_retries:
+                    raise e
+                retries += 1
+                await asyncio.sleep(self._backoff(retries))
+                continue
+
+            if response.status_code in self.RETRY_STATUS_CODES and retries < self.max_retries:
+                retries += 1
+                await asyncio.sleep(self._backoff(retries, response.headers.get('Retry-After', None)))
+                continue
+
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                return e
+
+            return response
+
+    def _backoff(self, retries, retry_after=None):
+        """Seconds to wait before retrying a request"""
+
+        if retry_after:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                pass
+
+        return self.backoff_factor * (2 ** (retries - 1))
+
+    def _accept_response(self, url, payload, response):
+        """Store a response in the archive and decode it"""
+
+        if self.archive:
+            self.archive.store(url, payload, None, response)
+
+        if isinstance(response, Exception):
+            raise response
+
+        return response.json()
+
+    @staticmethod
+    def _build_response(resp, body):
+        """Build a `requests.Response` from an aiohttp response"""
+
+        response = requests.Response()
+        response.status_code = resp.status
+        response.reason = resp.reason
+        response.headers = requests.structures.CaseInsensitiveDict(resp.headers)
+        response.url = str(resp.url)
+        response.encoding = resp.charset
+        response._content = body
+        response._content_consumed = True
+
+        return response
+
+
+class _JSONStreamReader:
+    """Incremental reader of Functest JSON pages.
+
+    The reader decodes one JSON value at a time from a stream
+    of chunks of bytes, requesting more chunks only when the
+    value in the buffer is incomplete.
+
+    :param chunks: iterable of chunks of bytes
+    """
+    WHITESPACE = ' \t\n\r'
+
+    # Consumed characters are dropped from the buffer
+    # once they exceed this number
+    COMPACT_SIZE = 64 * 1024
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_page(self):
+        """Read the members of the top level object.
+
+        Reading stops at the start of the `results` array,
+        which is returned as a generator.
+        """
+        page = {}
+
+        self._expect('{')
+
+        while not self._consume('}'):
+            key = self._read_value()
+            self._expect(':')
+
+            if key == 'results':
+                page['results'] = self._read_results(page)
+                return page
+
+            page[key] = self._read_value()
+            self._consume(',')
+
+        page['results'] = iter(())
+
+        return page
+
+    def _read_results(self, page):
+        """Generate the items of the results array.
+
+        Once the array is read, the remaining members of the
+        top level object are added to `page`.
+        """
+        self._expect('[')
+
+        while not self._consume(']'):
+            yield self._read_value()
+            self._consume(',')
+
+        self._consume(',')
+
+        while not self._consume('}'):
+            key = self._read_value()
+            self._expect(':')
+            page[key] = self._read_value()
+            self._consume(',')
+
+    def _read_value(self):
+        """Decode the next JSON value of the stream"""
+
+        self._skip_whitespace()
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Double the data available before decoding again,
+                # so large values are not decoded too many times
+                if not self._fill(2 * (len(self.buffer) - self.pos)):
+                    raise
+                continue
+
+            # Values like numbers might continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+
+            self.pos = end
+            return value
+
+    def _expect(self, char):
+        if not self._consume(char):
+            found = self.buffer[self.pos:self.pos + 1] or 'end of stream'
+            msg = "Expecting '%s' but '%s' found" % (char, found)
+            raise ValueError(msg)
+
+    def _consume(self, char):
+        """Consume `char` if it is the next non blank character"""
+
+        self._skip_whitespace()
+
+        if self.buffer[self.pos:self.pos + 1] == char:
+            self.pos += 1
+            return True
+        return False
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.buffer) or not self._fill():
+                break
+
+    def _fill(self, size=0):
+        """Append chunks to the buffer.
+
+        Chunks are appended until there are at least `size` characters
+        not consumed in the buffer, reading one chunk at least.
+
+        :returns: False when the end of the stream was already reached
+        """
+        if self.eof:
+            return False
+
+        if self.pos > self.COMPACT_SIZE:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+        texts = [self.buffer]
+        available = len(self.buffer) - self.pos
+        read = False
+
+        for chunk in self.chunks:
+            text = self.utf8.decode(chunk)
+            texts.append(text)
+            available += len(text)
+            read = read or bool(text)
+
+            if read and available >= size:
+                break
+        else:
+            texts.append(self.utf8.decode(b'', final=True))
+            self.eof = True
+
+        self.buffer = ''.join(texts)
+
+        return read
+
+
+class FunctestStats:
+    """Statistics of the fetch processes of a Functest backend.
+
+    `FunctestClient` records each page with the seconds spent
+    requesting it, retries included, its size in bytes, the
+    seconds spent decoding it, its number of items and retries.
+    Pages read from the archive have no latency. `Functest`
+    records each item returned with the seconds its consumer took
+    to ask for the next one. The last `MAX_PAGES` pages are kept
+    in `pages`; `summary` returns the totals.
+
+    When `interval` is set, a summary is written to the log every
+    `interval` seconds and when a fetch process ends. When `path`
+    is set, these summaries are also appended to that file as JSON
+    lines; with no `interval`, only when a fetch process ends.
+
+    Pages can be recorded by the threads of the client; items are
+    recorded by the thread that consumes them.
+
+    :param interval: seconds between two summaries
+    :param path: path to the file where summaries are appended
+    """
+    MAX_PAGES = 1000
+
+    PageStats = collections.namedtuple('PageStats',
+                                       ['page', 'latency', 'bytes', 'decode_time',
+                                        'items', 'retries'])
+
+    def __init__(self, interval=None, path=None):
+        self.interval = interval
+        self.path = path
+        self.pages = collections.deque(maxlen=self.MAX_PAGES)
+
+        self.npages = 0
+        self.nitems = 0
+        self.nbytes = 0
+        self.nretries = 0
+        self.request_time = 0.0
+        self.max_latency = 0.0
+        self.decode_time = 0.0
+        self.consumer_time = 0.0
+        self.started_on = time.monotonic()
+
+        self._nrequests = 0
+        self._next_emit = self.started_on + interval if interval else None
+        self._lock = threading.Lock()
+
+    def record_page(self, page, latency, nbytes, decode_time, nitems, retries):
+        """Record a page; `latency`, `nbytes` and `nitems` can be `None`"""
+
+        with self._lock:
+            self.pages.append(self.PageStats(page, latency, nbytes, decode_time,
+                                             nitems, retries))
+            self.npages += 1
+            self.nbytes += nbytes or 0
+            self.nretries += retries
+            self.decode_time += decode_time
+
+            if latency is not None:
+                self._nrequests += 1
+                self.request_time += latency
+                self.max_latency = max(self.max_latency, latency)
+
+            # Only one of the threads emits the summary
+            due = self._next_emit and time.monotonic() >= self._next_emit
+            if due:
+                self._next_emit = time.monotonic() + self.interval
+
+        if due:
+            self.emit()
+
+    def record_item(self, consumer_time):
+        """Record an item returned and the time its consumer took"""
+
+        self.nitems += 1
+        self.consumer_time += consumer_time
+
+    def summary(self):
+        """Get the totals of the pages and items recorded"""
+
+        elapsed = time.monotonic() - self.started_on
+
+        with self._lock:
+            return {
+                'elapsed': elapsed,
+                'pages': self.npages,
+                'items': self.nitems,
+                'bytes': self.nbytes,
+                'retries': self.nretries,
+                'request_time': self.request_time,
+                'mean_latency': self.request_time / self._nrequests if self._nrequests else None,
+                'max_latency': self.max_latency,
+                'decode_time': self.decode_time,
+                'consumer_time': self.consumer_time,
+                'items_per_second': self.nitems / elapsed if elapsed else None
+            }
+
+    def emit(self):
+        """Write a summary to the log and to the file of summaries"""
+
+        summary = self.summary()
+
+        logger.info("Fetch stats: %s pages, %s items, %s bytes, %s retries; "
+                    "%.2fs requesting, %.2fs decoding, %.2fs consuming",
+                    summary['pages'], summary['items'], summary['bytes'],
+                    summary['retries'], summary['request_time'],
+                    summary['decode_time'], summary['consumer_time'])
+
+        if self.path:
+            with open(self.path, 'a') as fd:
+                fd.write(json.dumps(summary, sort_keys=True))
+                fd.write('\n')
+
+        return summary
+
+    def finish(self):
+        """Emit a summary at the end of a fetch process, when summaries are enabled"""
+
+        if self.interval or self.path:
+            self.emit()
+
+
+class FunctestIdSet:
+    """Set of ids of Functest items.
+
+    Ids of Functest items are MongoDB object ids, 24 hexadecimal
+    digits, which are stored as integers; they take about half
+    the memory of the strings. Other ids are stored as they are.
+    """
+    def __init__(self):
+        self._ids = set()
+
+    def add(self, item_id):
+        self._ids.add(self._key(item_id))
+
+    def __contains__(self, item_id):
+        return self._key(item_id) in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    @staticmethod
+    def _key(item_id):
+        if len(item_id) == 24:
+            try:
+                return int(item_id, 16)
+            except ValueError:
+                pass
+        return item_id
+
+
+class FunctestBloomFilter:
+    """Bloom filter of ids of Functest items.
+
+    The filter takes a fixed amount of memory, set by the number
+    of items it is sized for (`capacity`) and its rate of false
+    positives (`error_rate`). An id not added to the filter is
+    taken as added with that probability, while the number of
+    items added stays under its capacity.
+
+    :param capacity: number of items the filter is sized for
+    :param error_rate: rate of false positives
+    """
+    DEFAULT_ERROR_RATE = 0.001
+
+    def __init__(self, capacity, error_rate=None):
+        error_rate = error_rate or self.DEFAULT_ERROR_RATE
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.nbits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.nhashes = max(1, round(self.nbits / capacity * math.log(2)))
+        self.bits = bytearray((self.nbits + 7) // 8)
+        self.nitems = 0
+
+    def add(self, item_id):
+        for index in self._indexes(item_id):
+            self.bits[index >> 3] |= 1 << (index & 7)
+        self.nitems += 1
+
+    def __contains__(self, item_id):
+        return all(self.bits[index >> 3] & (1 << (index & 7))
+                   for index in self._indexes(item_id))
+
+    def __len__(self):
+        return self.nitems
+
+    def _indexes(self, item_id):
+        """Positions of the bits of an id, by double hashing"""
+
+        digest = hashlib.blake2b(item_id.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+
+        return [(h1 + i * h2) % self.nbits for i in range(self.nhashes)]
+
+
+class FunctestConsistencyCheck:
+    """Check the consistency of the pages of Functest queries.
+
+    Results are paginated on a collection that can change during
+    a fetch process. New results push the next ones to later
+    pages, so they are returned twice; removed results pull them
+    to earlier pages, so they are skipped. The ids of the items
+    returned are tracked to drop the duplicated ones.
+
+    Pages are sorted by start date, newest first. The boundary
+    between two pages is taken as shifted when the next page
+    starts with an item already returned or newer than the last
+    item of the previous page, or when the number of pages of the
+    query changed. Then, the items started between the last date
+    of the previous page and the first date of the next one are
+    fetched again and the ones not returned yet are added after
+    the items of the next page. Shifts that do not change the
+    number of pages and only remove results cannot be detected.
+
+    With a Bloom filter, false positives are taken as duplicates,
+    so some items might be dropped; use it only when the number
+    of items is too large to keep their ids in memory.
+
+    :param bloom_capacity: when it is set, ids are kept in a
+        `FunctestBloomFilter` sized for this number of items;
+        otherwise, they are kept in a `FunctestIdSet`
+    """
+    def __init__(self, bloom_capacity=None):
+        if bloom_capacity:
+            self.ids = FunctestBloomFilter(bloom_capacity)
+        else:
+            self.ids = FunctestIdSet()
+
+        self.nduplicates = 0
+        self.nshifts = 0
+        self.nrecovered = 0
+
+    def check_pages(self, pages, recover):
+        """Check the pages of a query.
+
+        The results of each page are replaced by a generator which
+        drops the duplicated items and adds the recovered ones.
+
+        :param pages: iterable of decoded pages of a query
+        :param recover: function that returns the items started
+            between two dates, given as `from_date` and `to_date`
+        """
+        state = {'last_date': None, 'total_pages': None}
+
+        for page in pages:
+            page['results'] = self._check_results(page, page['results'], state, recover)
+            yield page
+
+    def log(self):
+        """Write the result of the checks to the log"""
+
+        if self.nduplicates or self.nshifts:
+            logger.warning("Pages shifted %s times during the fetch process; "
+                           "%s duplicated items dropped, %s skipped items recovered",
+                           self.nshifts, self.nduplicates, self.nrecovered)
+
+    def _check_results(self, page, results, state, recover):
+        first_date = None
+        last_date = None
+        shifted = False
+
+        for item in results:
+            date = item['start_date'][:19]
+
+            if first_date is None:
+                first_date = date
+                if state['last_date'] and date > state['last_date']:
+                    shifted = True
+            last_date = date
+
+            if item['_id'] in self.ids:
+                self.nduplicates += 1
+                shifted = True
+                continue
+
+            self.ids.add(item['_id'])
+            yield item
+
+        # Pagination might be decoded after the results
+        total_pages = page['pagination']['total_pages']
+
+        if state['total_pages'] is not None and total_pages != state['total_pages']:
+            shifted = True
+
+        if shifted and first_date and state['last_date']:
+            self.nshifts += 1
+
+            from_date, to_date = sorted([first_date, state['last_date']])
+            logger.debug("Page %s shifted; fetching the items from %s to %s again",
+                         page['pagination']['current_page'], from_date, to_date)
+
+            for item in recover(parse_start_date(from_date), parse_start_date(to_date)):
+                if item['_id'] not in self.ids:
+                    self.ids.add(item['_id'])
+                    self.nrecovered += 1
+                    yield item
+
+        state['last_date'] = last_date or state['last_date']
+        state['total_pages'] = total_pages
+
+
+class FunctestCheckpoint:
+    """Progress of a Functest fetch process saved in a file.
+
+    The checkpoint stores the window of dates of the query, the
+    last page completely fetched and the identifier of the last
+    item returned. The file is written atomically, so it is never
+    left half written when the process dies.
+
+    :param path: path to the checkpoint file
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Read the checkpoint; returns `None` when it does not exist"""
+
+        try:
+            with open(self.path, 'r') as fd:
+                return json.load(fd)
+        except FileNotFoundError:
+            return None
+
+    def save(self, from_date, to_date, page, last_id, filters=None):
+        """Save the progress of a fetch process"""
+
+        data = {
+            'from_date': from_date.strftime(FUNCTEST_DATETIME_FORMAT),
+            'to_date': to_date.strftime(FUNCTEST_DATETIME_FORMAT) if to_date else None,
+            'filters': filters or {},
+            'page': page,
+            'last_id': last_id
+        }
+
+        tmp_path = self.path + '.tmp'
+
+        with open(tmp_path, 'w') as fd:
+            json.dump(data, fd)
+
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        """Remove the checkpoint once the fetch process is completed"""
+
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def resume(self, from_date, to_date=None, filters=None):
+        """Get the arguments to resume a fetch process.
+
+        The checkpoint is only valid for a query on the same window
+        of dates and with the same filters. When `to_date` is `None`,
+        any upper limit matches and the stored one is returned.
+
+        :returns: a dict with the arguments `to_date`, `page` and
+            `last_id`; an empty dict when the fetch process cannot
+            be resumed from this checkpoint
+        """
+        data = self.load()
+
+        if not data:
+            return {}
+
+        if data['from_date'] != from_date.strftime(FUNCTEST_DATETIME_FORMAT):
+            return {}
+
+        if to_date and data['to_date'] != to_date.strftime(FUNCTEST_DATETIME_FORMAT):
+            return {}
+
+        if data.get('filters', {}) != (filters or {}):
+            return {}
+
+        args = {
+            'page': data['page'] + 1,
+            'last_id': data['last_id']
+        }
+
+        if not to_date and data['to_date']:
+            args['to_date'] = str_to_datetime(data['to_date'])
+
+        return args
+
+
+class FunctestSyncState:
+    """State of the incremental fetch processes saved in a file.
+
+    The state stores the start date, with second resolution, of the
+    newest items returned and the identifiers of the items with that
+    date. It also stores the selection of items of the process, as
+    the state is not valid for other selections. The file is written
+    atomically.
+
+    :param path: path to the state file
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Read the state; returns `None` when it does not exist"""
+
+        try:
+            with open(self.path, 'r') as fd:
+                return json.load(fd)
+        except FileNotFoundError:
+            return None
+
+    def save(self, start_date, ids, selection=None):
+        """Save the newest items returned by a fetch process"""
+
+        data = {
+            'start_date': start_date.strftime(FUNCTEST_DATETIME_FORMAT),
+            'ids': sorted(ids),
+            'selection': self._encode_selection(selection)
+        }
+
+        tmp_path = self.path + '.tmp'
+
+        with open(tmp_path, 'w') as fd:
+            json.dump(data, fd)
+
+        os.replace(tmp_path, self.path)
+
+    def high_water(self, selection=None):
+        """Get the newest items returned for a selection of items.
+
+        :returns: a tuple with the start date of the newest items
+            and the set of their identifiers; `None` when there is
+            no state for that selection
+        """
+        data = self.load()
+
+        if not data:
+            return None
+
+        if data.get('selection', {}) != self._encode_selection(selection):
+            return None
+
+        return str_to_datetime(data['start_date']), set(data['ids'])
+
+    @staticmethod
+    def _encode_selection(selection):
+        return {field: sorted(values) for field, values in (selection or {}).items()}
+
+
+class FunctestDetailsStore:
+    """Content-addressed store of the details of Functest items.
+
+    Each set of details is saved once in a file named after the
+    SHA1 of its contents, so repeated details take no extra space.
+    Details are found by the `_id` of their items with a link file
+    that contains that hash. Link files are named after the ids
+    that are object ids, 24 hexadecimal digits; other ids, which
+    might not be safe file names, are replaced by their SHA1.
+    Files are written atomically.
+
+    :param dirpath: directory of the store
+    """
+    OBJECTS_DIR = 'objects'
+    IDS_DIR = 'ids'
+    HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+    def __init__(self, dirpath):
+        self.dirpath = dirpath
+
+    def put(self, item_id, details):
+        """Store the details of an item; returns their hash"""
+
+        content = json.dumps(details, sort_keys=True,
+                             separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha1(content).hexdigest()
+
+        object_path = self._object_path(digest)
+
+        if not os.path.exists(object_path):
+            self._write(object_path, content)
+
+        self._write(self._id_path(item_id), digest.encode('utf-8'))
+
+        return digest
+
+    def get(self, item_id):
+        """Get the details of an item; returns `None` when they are not stored"""
+
+        try:
+            with open(self._id_path(item_id), 'r') as fd:
+                digest = fd.read().strip()
+            with open(self._object_path(digest), 'r') as fd:
+                return json.load(fd)
+        except FileNotFoundError:
+            return None
+
+    def _object_path(self, digest):
+        return os.path.join(self.dirpath, self.OBJECTS_DIR, digest[:2], digest + '.json')
+
+    def _id_path(self, item_id):
+        item_id = str(item_id)
+
+        if len(item_id) != 24 or not all(c in self.HEX_DIGITS for c in item_id):
+            item_id = hashlib.sha1(item_id.encode('utf-8')).hexdigest()
+
+        return os.path.join(self.dirpath, self.IDS_DIR, item_id)
+
+    @staticmethod
+    def _write(path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = path + '.tmp'
+
+        with open(tmp_path, 'wb') as fd:
+            fd.write(content)
+
+        os.replace(tmp_path, path)
+
+
+class FunctestCommand(BackendCommand):
     """Class to run Functest backend from the command line."""
 
     BACKEND = Functest
@@ -248,14 +3134,235 @@ class FunctestCommand(BackendCommand):
     def setup_cmd_parser(cls):
         """Returns the Functest argument parser."""
 
+        # `export` imports this module, so it is imported here
+        from .export import EXPORT_FORMATS, EXPORT_NDJSON
+
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               to_date=True,
                                               archive=True,
                                               ssl_verify=True)
 
+        # Functest options
+        group = parser.parser.add_argument_group('Functest arguments')
+        group.add_argument('--workers', dest='workers',
+                           type=int, default=1,
+                           help="Number of threads used to fetch pages concurrently")
+        group.add_argument('--checkpoint-file', dest='checkpoint_file',
+                           help="File to save the progress of the fetch process and resume it")
+        group.add_argument('--stream', dest='stream',
+                           action='store_true',
+                           help="Decode the results of the pages incrementally; pages are still "
+                                "read completely when they are archived, with several workers "
+                                "or with a cache")
+        group.add_argument('--pool-size', dest='pool_size',
+                           type=int, default=None,
+                           help="Maximum number of connections kept open with the server")
+        group.add_argument('--no-keep-alive', dest='keep_alive',
+                           action='store_false',
+                           help="Close connections after each response")
+        group.add_argument('--no-compression', dest='compress',
+                           action='store_false',
+                           help="Do not ask for compressed responses")
+        group.add_argument('--compress-archive', dest='compress_archive',
+                           action='store_true',
+                           help="Store the pages compressed in the archive")
+        group.add_argument('--cache-file', dest='cache_file',
+                           help="File of the cache of pages, to avoid downloading them again")
+        group.add_argument('--cache-size', dest='cache_size',
+                           type=float, default=None,
+                           help="Maximum size of the cache of pages in megabytes")
+        group.add_argument('--cache-ttl', dest='cache_ttl',
+                           type=float, default=None,
+                           help="Seconds a cached page is used before validating it again")
+        group.add_argument('--max-retries', dest='max_retries',
+                           type=int, default=None,
+                           help="Maximum retries per request")
+        group.add_argument('--timeout', dest='timeout',
+                           type=float, default=None,
+                           help="Seconds to wait for the server to connect or send data")
+        group.add_argument('--adaptive-rate', dest='adaptive_rate',
+                           action='store_true',
+                           help="Adapt the rate of requests to the latency and errors of the server")
+        group.add_argument('--max-backoff', dest='max_backoff',
+                           type=float, default=None,
+                           help="Maximum seconds to wait between requests with an adaptive rate")
+        group.add_argument('--latency-factor', dest='latency_factor',
+                           type=float, default=None,
+                           help="Times the lowest latency a request can take before reducing the rate")
+        group.add_argument('--sync-file', dest='sync_file',
+                           help="File to save the newest items fetched and fetch only newer ones")
+        group.add_argument('--details', dest='details',
+                           choices=DETAILS_MODES, default=DETAILS_FULL,
+                           help="Keep the details of the items in full, replace them with "
+                                "a summary or move them to an external store")
+        group.add_argument('--details-dir', dest='details_dir',
+                           help="Directory of the store of details in 'external' mode")
+        group.add_argument('--metrics', dest='metrics',
+                           action='store_true',
+                           help="Add the metrics of the modules of the details to the items")
+        group.add_argument('--project', dest='projects',
+                           action='append',
+                           help="Fetch only results of this project; it can be set several times")
+        group.add_argument('--case', dest='cases',
+                           action='append',
+                           help="Fetch only results of this test case; it can be set several times")
+        group.add_argument('--installer', dest='installers',
+                           action='append',
+                           help="Fetch only results of this installer; it can be set several times")
+        group.add_argument('--pod', dest='pods',
+                           action='append',
+                           help="Fetch only results of this pod; it can be set several times")
+        group.add_argument('--shard-days', dest='shard_days',
+                           type=float, default=None,
+                           help="Split the range of dates in windows of this number of days")
+        group.add_argument('--shard-pages', dest='shard_pages',
+                           type=int, default=None,
+                           help="Split the range of dates in windows of around this number of pages")
+        group.add_argument('--consistency', dest='consistency',
+                           action='store_true',
+                           help="Drop duplicated items and fetch again the ones skipped "
+                                "when pages shift during the fetch process")
+        group.add_argument('--bloom-capacity', dest='bloom_capacity',
+                           type=int, default=None,
+                           help="Keep the ids of the items in a Bloom filter sized for "
+                                "this number of items when checking the consistency")
+        group.add_argument('--dedupe', dest='dedupe',
+                           action='store_true',
+                           help="Return only the first item found with each id when several servers are fetched")
+        group.add_argument('--stats-interval', dest='stats_interval',
+                           type=float, default=None,
+                           help="Seconds between two summaries of the fetch statistics written to the log")
+        group.add_argument('--stats-file', dest='stats_file',
+                           help="File where summaries of the fetch statistics are appended as JSON lines")
+        group.add_argument('--follow', dest='follow',
+                           action='store_true',
+                           help="Keep polling the server and write new items as soon as they are found, "
+                                "as JSON lines; polls are not archived")
+        group.add_argument('--follow-interval', dest='follow_interval',
+                           type=float, default=None,
+                           help="Minimum seconds between polls when following the server")
+        group.add_argument('--follow-max-interval', dest='follow_max_interval',
+                           type=float, default=None,
+                           help="Maximum seconds between polls when following the server")
+        group.add_argument('--follow-lookback', dest='follow_lookback',
+                           type=int, default=None,
+                           help="Seconds of results checked again on every poll when following the server")
+        group.add_argument('--export-file', dest='export_file',
+                           help="Export the items as a table to this file instead of "
+                                "writing them as JSON; '.gz' files are compressed")
+        group.add_argument('--export-format', dest='export_format',
+                           choices=EXPORT_FORMATS, default=EXPORT_NDJSON,
+                           help="Format of the exported file")
+        group.add_argument('--export-batch-size', dest='export_batch_size',
+                           type=int, default=None,
+                           help="Number of items written at once to the exported file")
+
         # Required arguments
-        parser.parser.add_argument('url',
-                                   help="URL of the Functest server")
+        parser.parser.add_argument('url', nargs='+',
+                                   help="URL of the Functest server; several "
+                                        "servers can be fetched at once")
 
         return parser
+
+    def _post_init(self):
+        """Check the arguments that cannot be used with `--follow`"""
+
+        # `export` imports this module, so it is imported here
+        from .export import EXPORT_NDJSON
+
+        if not self.parsed_args.follow:
+            return
+
+        if self.parsed_args.export_file or self.parsed_args.export_batch_size \
+                or self.parsed_args.export_format != EXPORT_NDJSON:
+            raise AttributeError("follow and export arguments are not compatible")
+        if self.parsed_args.json_line:
+            raise AttributeError("follow and json-line arguments are not compatible; "
+                                 "items are always written as JSON lines when following")
+
+    def run(self):
+        """Fetch and write the items.
+
+        When `--export-file` is given, items are exported as a
+        table with `FunctestExporter` instead of being written
+        as JSON documents to the output. With `--follow`, new
+        items are written to the output until the process is
+        interrupted or terminated.
+        """
+        if self.parsed_args.follow:
+            return self._follow()
+        if not self.parsed_args.export_file:
+            return super().run()
+
+        backend_args = vars(self.parsed_args)
+        category = backend_args.pop('category', None)
+        filter_classified = backend_args.pop('filter_classified', False)
+        archived_since = backend_args.pop('archived_since', None)
+
+        if self.archive_manager and self.parsed_args.fetch_archive:
+            items = fetch_from_archive(self.BACKEND, backend_args,
+                                       self.archive_manager,
+                                       category,
+                                       archived_since)
+        else:
+            items = fetch(self.BACKEND, backend_args, category,
+                          filter_classified=filter_classified,
+                          manager=self.archive_manager)
+
+        # `export` imports this module, so it is imported here
+        from .export import FunctestExporter
+
+        try:
+            with FunctestExporter(self.parsed_args.export_file,
+                                  fmt=self.parsed_args.export_format,
+                                  batch_size=self.parsed_args.export_batch_size) as exporter:
+                nrows = exporter.export(items)
+        except IOError as e:
+            raise RuntimeError(str(e))
+
+        logger.info("Export completed: %s items written to %s", nrows, self.parsed_args.export_file)
+
+    def _follow(self):
+        """Follow the server, writing each new item as a JSON line"""
+
+        backend_args = vars(self.parsed_args)
+
+        # Polls are not archived; see `Functest.follow`
+        init_args = find_signature_parameters(self.BACKEND.__init__, backend_args)
+        init_args['archive'] = None
+        backend = self.BACKEND(**init_args)
+
+        # Without a date, the server is followed from now on
+        from_date = backend_args['from_date']
+        if from_date == DEFAULT_DATETIME:
+            from_date = None
+
+        stop = threading.Event()
+
+        def terminate(signum, frame):
+            stop.set()
+
+        previous_handler = signal.signal(signal.SIGTERM, terminate)
+
+        items = backend.follow(category=backend_args.get('category', None) or CATEGORY_FUNCTEST,
+                               from_date=from_date,
+                               projects=backend_args['projects'],
+                               cases=backend_args['cases'],
+                               installers=backend_args['installers'],
+                               pods=backend_args['pods'],
+                               interval=backend_args['follow_interval'],
+                               max_interval=backend_args['follow_max_interval'],
+                               lookback=backend_args['follow_lookback'],
+                               stop=stop)
+        try:
+            for item in items:
+                self.outfile.write(json.dumps(item, separators=(',', ':'), sort_keys=True))
+                self.outfile.write('\n')
+                self.outfile.flush()
+        except KeyboardInterrupt:
+            items.close()
+        except IOError as e:
+            raise RuntimeError(str(e))
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
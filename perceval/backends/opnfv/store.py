@@ -0,0 +1,571 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import array
+import bisect
+import datetime
+import itertools
+import math
+
+from grimoirelab_toolkit.datetime import datetime_to_utc
+
+from ...errors import BackendError
+from .functest import parse_date
+
+
+class FunctestStore:
+    """In-memory store of Functest items to query them by field and date.
+
+    Items are kept by column instead of as dicts. The values of
+    the fields in `FIELDS`, which are shared by many items, are
+    encoded as codes of a dictionary of their distinct values and
+    stored in arrays; dates are stored as UTC timestamps in
+    seconds. The rest of the data of the items is discarded.
+
+    Items are identified by their `uuid`; items already in the
+    store are skipped, so overlapping sets of items, like the ones
+    of consecutive fetches, can be loaded.
+
+    Each field has an index with the positions of the items of
+    each value, so items can be found by several fields without
+    scanning the store. Items are also sorted by start date on
+    demand to find the ones of a time range.
+
+    Columns can be aggregated with `aggregate`, which requires
+    `numpy`. Arrays are read by numpy without copying them. The
+    aggregations of a grouping registered with `track` are kept
+    updated as items are added, so they are returned with no need
+    to go over the items again.
+
+    :param items: items, as returned by `Functest.fetch`, to add
+        to the store
+    """
+    FIELDS = [
+        'project_name',
+        'case_name',
+        'installer',
+        'pod_name',
+        'scenario',
+        'version',
+        'build_tag',
+        'criteria'
+    ]
+
+    # Timestamp of missing or invalid dates
+    NO_DATE = -2 ** 63
+
+    # Default fields and percentiles of the aggregations
+    GROUP_BY = ['project_name', 'case_name', 'scenario', 'installer', 'pod_name', 'version']
+    PERCENTILES = [50, 90, 99]
+
+    # Value of `criteria` of the items that passed
+    PASS = 'PASS'
+
+    def __init__(self, items=None):
+        self.uuids = []
+        self._uuids = set()
+        self.ids = []
+        self.start_dates = array.array('q')
+        self.stop_dates = array.array('q')
+
+        self._codes = {field: array.array('I') for field in self.FIELDS}
+        self._values = {field: [] for field in self.FIELDS}
+        self._encoding = {field: {} for field in self.FIELDS}
+        self._index = {field: [] for field in self.FIELDS}
+
+        # Positions sorted by start date; built when it is needed
+        self._date_order = None
+        self._sorted_dates = None
+
+        # Running aggregations, by fields and bucket
+        self._tracked = {}
+
+        if items:
+            self.load(items)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def load(self, items):
+        """Add a set of items; returns the number of items in the store"""
+
+        for item in items:
+            self.add(item)
+
+        return len(self)
+
+    def add(self, item):
+        """Add an item to the store.
+
+        :returns: whether the item was added; items already in the
+            store are skipped
+        """
+        if item['uuid'] in self._uuids:
+            return False
+
+        data = item['data']
+        position = len(self.ids)
+
+        self.uuids.append(item['uuid'])
+        self._uuids.add(item['uuid'])
+        self.ids.append(data.get('_id', None))
+        self.start_dates.append(self._to_timestamp(data.get('start_date', None)))
+        self.stop_dates.append(self._to_timestamp(data.get('stop_date', None)))
+
+        for field in self.FIELDS:
+            code = self._encode(field, data.get(field, None))
+            self._codes[field].append(code)
+            self._index[field][code].append(position)
+
+        self._date_order = None
+        self._sorted_dates = None
+
+        for (by, bucket), groups in self._tracked.items():
+            self._track_item(groups, by, bucket, position)
+
+        return True
+
+    def track(self, by=None, bucket=None):
+        """Keep the aggregations of a grouping updated as items are added.
+
+        For each group of the fields in `by` and, when `bucket` is
+        set, of the buckets of that number of seconds, the store
+        keeps the number of items, the passed and judged ones and
+        the sorted durations of the items, which are updated by
+        `add`. The items already in the store are aggregated now.
+
+        `aggregate` returns these values when it is called with the
+        same `by` and `bucket` and with no filters or dates. As the
+        durations are kept, any percentile can be calculated and
+        its value is the same as the one calculated from the columns.
+
+        :param by: fields to group by; by default, `GROUP_BY`
+        :param bucket: seconds of the time buckets
+
+        :raises BackendError: when a field is not valid
+        """
+        by = tuple(self.GROUP_BY if by is None else by)
+        bucket = bucket or None
+
+        for field in by:
+            self._check_field(field)
+
+        if (by, bucket) in self._tracked:
+            return
+
+        groups = {}
+        for position in range(len(self)):
+            self._track_item(groups, by, bucket, position)
+
+        self._tracked[(by, bucket)] = groups
+
+    def values(self, field):
+        """Distinct values of a field"""
+
+        self._check_field(field)
+        return list(self._values[field])
+
+    def find(self, from_date=None, to_date=None, **filters):
+        """Find the positions of the items that match a query.
+
+        Filters are given by field name. Their value can be a
+        single value or a list of them; items match when their
+        value is any of them. Items must match all the filters
+        and start between `from_date` and `to_date`, both
+        included, when they are set.
+
+        :param from_date: find the items started since this date
+        :param to_date: find the items started until this date
+        :param filters: values of the fields of the items
+
+        :returns: a sorted list of positions of the items
+
+        :raises BackendError: when a filter is not a field of
+            the store
+        """
+        selected = []
+
+        for field, values in filters.items():
+            self._check_field(field)
+
+            if isinstance(values, str) or values is None:
+                values = [values]
+
+            encoding = self._encoding[field]
+            codes = [encoding[value] for value in values if value in encoding]
+
+            if len(codes) == 1:
+                selected.append(self._index[field][codes[0]])
+            else:
+                selected.append(sorted(itertools.chain.from_iterable(
+                    self._index[field][code] for code in codes)))
+
+        from_ts = self._date_timestamp(from_date)
+        to_ts = self._date_timestamp(to_date)
+
+        if not selected:
+            if from_ts is None and to_ts is None:
+                return list(range(len(self)))
+            return sorted(self._date_range(from_ts, to_ts))
+
+        # Intersect the smallest sets first
+        selected.sort(key=len)
+        positions = set(selected[0])
+        for other in selected[1:]:
+            if not positions:
+                break
+            positions.intersection_update(other)
+
+        if from_ts is not None or to_ts is not None:
+            dates = self.start_dates
+            from_ts = self.NO_DATE + 1 if from_ts is None else from_ts
+            to_ts = -self.NO_DATE - 1 if to_ts is None else to_ts
+            positions = [p for p in positions if from_ts <= dates[p] <= to_ts]
+
+        return sorted(positions)
+
+    def count(self, from_date=None, to_date=None, **filters):
+        """Number of items that match a query; see `find`"""
+
+        return len(self.find(from_date=from_date, to_date=to_date, **filters))
+
+    def select(self, from_date=None, to_date=None, **filters):
+        """Get the records of the items that match a query; see `find`"""
+
+        for position in self.find(from_date=from_date, to_date=to_date, **filters):
+            yield self.record(position)
+
+    def aggregate(self, by=None, bucket=None, percentiles=None,
+                  from_date=None, to_date=None, **filters):
+        """Aggregate the results of the items by groups.
+
+        Items are grouped by the values of the fields in `by` and,
+        when `bucket` is set, by buckets of that number of seconds
+        of their start dates; items with no start date are not
+        grouped in any bucket. Items can be selected like in `find`.
+        With no filters or dates, the aggregations of a grouping
+        registered with `track` are returned as the store keeps
+        them, without going over the items.
+
+        Each group has the number of items, the ones that passed
+        (their `criteria` is `PASS`), the ones that failed (any
+        other `criteria`) and the percentage of passed ones over
+        both. Durations, the seconds between the start and stop
+        dates, are summarized with the given percentiles, named
+        like `duration_p50`; items with missing dates or stopped
+        before they started are not taken into account. Values
+        that cannot be calculated are set to `None`.
+
+        :param by: fields to group by; by default, `GROUP_BY`
+        :param bucket: seconds of the time buckets
+        :param percentiles: percentiles of the durations; by
+            default, `PERCENTILES`
+        :param from_date: aggregate the items started since this date
+        :param to_date: aggregate the items started until this date
+        :param filters: values of the fields of the items
+
+        :returns: a list of dicts, one per group, with the values
+            of the fields, the start date of the bucket, under
+            `bucket`, and the aggregated values
+
+        :raises BackendError: when `numpy` is not installed and
+            the grouping is not tracked, or a field is not valid
+        """
+        by = self.GROUP_BY if by is None else by
+        percentiles = self.PERCENTILES if percentiles is None else percentiles
+
+        for field in by:
+            self._check_field(field)
+
+        groups = self._tracked.get((tuple(by), bucket or None), None)
+        if groups is not None and not (filters or from_date or to_date):
+            return self._tracked_aggregations(groups, by, bucket, percentiles)
+
+        # numpy takes a while to load, so it is only imported here
+        try:
+            import numpy
+        except ImportError:
+            cause = "numpy is required to aggregate items; install the 'aggregation' extra"
+            raise BackendError(cause=cause)
+
+        if filters or from_date or to_date:
+            positions = numpy.array(self.find(from_date=from_date, to_date=to_date, **filters),
+                                    dtype=numpy.int64)
+        else:
+            positions = numpy.arange(len(self), dtype=numpy.int64)
+
+        starts = numpy.frombuffer(self.start_dates, dtype=numpy.int64)[positions]
+        stops = numpy.frombuffer(self.stop_dates, dtype=numpy.int64)[positions]
+
+        if bucket:
+            dated = starts != self.NO_DATE
+            positions = positions[dated]
+            starts = starts[dated]
+            stops = stops[dated]
+
+        if not len(positions):
+            return []
+
+        # Group by the codes of the fields and the bucket
+        keys = [numpy.frombuffer(self._codes[field], dtype=numpy.uint32)[positions].astype(numpy.int64)
+                for field in by]
+        sizes = [len(self._values[field]) for field in by]
+        if bucket:
+            first_bucket = int(starts.min()) // bucket
+            keys.append(starts // bucket - first_bucket)
+            sizes.append(int(keys[-1].max()) + 1)
+
+        groups, inverse = self._group_keys(numpy, keys, sizes, len(positions))
+
+        if bucket:
+            groups[:, -1] += first_bucket
+
+        ngroups = len(groups)
+        nitems = numpy.bincount(inverse, minlength=ngroups)
+
+        criteria = numpy.frombuffer(self._codes['criteria'], dtype=numpy.uint32)[positions]
+        encoding = self._encoding['criteria']
+        passed = criteria == encoding.get(self.PASS, -1)
+        judged = criteria != encoding.get(None, -1)
+
+        npassed = numpy.bincount(inverse, weights=passed, minlength=ngroups)
+        njudged = numpy.bincount(inverse, weights=judged, minlength=ngroups)
+
+        # Percentiles of the durations, interpolated like numpy does
+        timed = (starts != self.NO_DATE) & (stops != self.NO_DATE) & (stops >= starts)
+        durations = (stops - starts)[timed].astype(numpy.float64)
+        timed_groups = inverse[timed]
+
+        order = numpy.lexsort((durations, timed_groups))
+        durations = durations[order]
+        ntimed = numpy.bincount(timed_groups, minlength=ngroups)
+        offsets = numpy.concatenate(([0], numpy.cumsum(ntimed)[:-1]))
+
+        duration_percentiles = {}
+        for percentile in percentiles:
+            rank = numpy.maximum(ntimed - 1, 0) * (percentile / 100)
+            lower = numpy.floor(rank).astype(numpy.int64)
+            upper = numpy.ceil(rank).astype(numpy.int64)
+            fraction = rank - lower
+
+            if len(durations):
+                last = len(durations) - 1
+                low = durations[numpy.minimum(offsets + lower, last)]
+                high = durations[numpy.minimum(offsets + upper, last)]
+                values = low + (high - low) * fraction
+            else:
+                values = numpy.zeros(ngroups)
+
+            duration_percentiles['duration_p%s' % percentile] = values
+
+        aggregations = []
+
+        for i in range(ngroups):
+            aggregation = {}
+
+            for j, field in enumerate(by):
+                aggregation[field] = self._values[field][groups[i, j]]
+            if bucket:
+                aggregation['bucket'] = self._to_datetime(int(groups[i, -1]) * bucket)
+
+            aggregation['items'] = int(nitems[i])
+            aggregation['passed'] = int(npassed[i])
+            aggregation['failed'] = int(njudged[i] - npassed[i])
+            aggregation['pass_rate'] = round(float(100 * npassed[i] / njudged[i]), 2) if njudged[i] else None
+
+            for name, values in duration_percentiles.items():
+                aggregation[name] = float(values[i]) if ntimed[i] else None
+
+            aggregations.append(aggregation)
+
+        return aggregations
+
+    def _tracked_aggregations(self, groups, by, bucket, percentiles):
+        """Build the aggregations of a tracked grouping, sorted like in `aggregate`"""
+
+        aggregations = []
+
+        for key in sorted(groups):
+            group = groups[key]
+            aggregation = {}
+
+            for field, code in zip(by, key):
+                aggregation[field] = self._values[field][code]
+            if bucket:
+                aggregation['bucket'] = self._to_datetime(key[-1] * bucket)
+
+            aggregation['items'] = group.nitems
+            aggregation['passed'] = group.npassed
+            aggregation['failed'] = group.njudged - group.npassed
+            aggregation['pass_rate'] = round(100 * group.npassed / group.njudged, 2) if group.njudged else None
+
+            for percentile in percentiles:
+                aggregation['duration_p%s' % percentile] = self._percentile(group.durations, percentile)
+
+            aggregations.append(aggregation)
+
+        return aggregations
+
+    def _track_item(self, groups, by, bucket, position):
+        """Add the item of a position to the running aggregations of a grouping"""
+
+        start = self.start_dates[position]
+        stop = self.stop_dates[position]
+
+        key = tuple(self._codes[field][position] for field in by)
+        if bucket:
+            if start == self.NO_DATE:
+                return
+            key += (start // bucket,)
+
+        group = groups.get(key, None)
+        if group is None:
+            group = _RunningGroup()
+            groups[key] = group
+
+        criteria = self._values['criteria'][self._codes['criteria'][position]]
+
+        group.nitems += 1
+        if criteria == self.PASS:
+            group.npassed += 1
+        if criteria is not None:
+            group.njudged += 1
+
+        if start != self.NO_DATE and stop != self.NO_DATE and stop >= start:
+            bisect.insort(group.durations, float(stop - start))
+
+    @staticmethod
+    def _percentile(durations, percentile):
+        """Percentile of sorted durations, interpolated like numpy does"""
+
+        if not durations:
+            return None
+
+        rank = (len(durations) - 1) * (percentile / 100)
+        lower = math.floor(rank)
+        low = durations[lower]
+        high = durations[math.ceil(rank)]
+
+        return low + (high - low) * (rank - lower)
+
+    @staticmethod
+    def _group_keys(numpy, keys, sizes, nitems):
+        """Find the distinct combinations of a set of columns of codes.
+
+        When it fits in 64 bits, the codes of each row are combined
+        into a single number, which is much faster to sort than rows.
+
+        :returns: an array with the combinations, one per row, and
+            the index of the combination of each item
+        """
+        if not keys:
+            return numpy.zeros((1, 0), dtype=numpy.int64), numpy.zeros(nitems, dtype=numpy.int64)
+
+        if math.prod(sizes) >= 2 ** 63:
+            groups, inverse = numpy.unique(numpy.stack(keys, axis=1), axis=0, return_inverse=True)
+            return groups, inverse.reshape(-1)
+
+        combined = numpy.zeros(nitems, dtype=numpy.int64)
+        for key, size in zip(keys, sizes):
+            combined = combined * size + key
+
+        combined, inverse = numpy.unique(combined, return_inverse=True)
+
+        groups = numpy.empty((len(combined), len(keys)), dtype=numpy.int64)
+        for i in range(len(keys) - 1, -1, -1):
+            combined, groups[:, i] = numpy.divmod(combined, sizes[i])
+
+        return groups, inverse.reshape(-1)
+
+    def record(self, position):
+        """Get the record of the item in a position as a dict"""
+
+        record = {
+            'uuid': self.uuids[position],
+            '_id': self.ids[position]
+        }
+
+        for field in self.FIELDS:
+            record[field] = self._values[field][self._codes[field][position]]
+
+        record['start_date'] = self._to_datetime(self.start_dates[position])
+        record['stop_date'] = self._to_datetime(self.stop_dates[position])
+
+        return record
+
+    def _encode(self, field, value):
+        encoding = self._encoding[field]
+
+        code = encoding.get(value, None)
+        if code is None:
+            code = len(self._values[field])
+            encoding[value] = code
+            self._values[field].append(value)
+            self._index[field].append(array.array('I'))
+
+        return code
+
+    def _date_range(self, from_ts, to_ts):
+        """Positions of the items started in a range of timestamps"""
+
+        if self._date_order is None:
+            order = sorted(range(len(self)), key=self.start_dates.__getitem__)
+            self._date_order = array.array('I', order)
+            self._sorted_dates = array.array('q', (self.start_dates[p] for p in order))
+
+        # Items with no start date are never in a range
+        lower = bisect.bisect_right(self._sorted_dates, self.NO_DATE)
+        if from_ts is not None:
+            lower = max(lower, bisect.bisect_left(self._sorted_dates, from_ts))
+        upper = len(self) if to_ts is None else bisect.bisect_right(self._sorted_dates, to_ts)
+
+        return self._date_order[lower:upper]
+
+    def _check_field(self, field):
+        if field not in self._encoding:
+            cause = "%s is not a field of the store; valid fields: %s" % (field, ', '.join(self.FIELDS))
+            raise BackendError(cause=cause)
+
+    @classmethod
+    def _to_timestamp(cls, value):
+        date = parse_date(value)
+        return int(date.timestamp()) if date else cls.NO_DATE
+
+    @classmethod
+    def _to_datetime(cls, timestamp):
+        if timestamp == cls.NO_DATE:
+            return None
+        return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+
+    @staticmethod
+    def _date_timestamp(date):
+        if date is None:
+            return None
+        return int(datetime_to_utc(date).timestamp())
+
+
+class _RunningGroup:
+    """Running aggregation of a group of items tracked by `FunctestStore`"""
+
+    __slots__ = ('nitems', 'npassed', 'njudged', 'durations')
+
+    def __init__(self):
+        self.nitems = 0
+        self.npassed = 0
+        self.njudged = 0
+        self.durations = array.array('d')
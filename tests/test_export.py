@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import csv
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import dateutil.tz
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from perceval.errors import BackendError
+from perceval.backends.opnfv.export import FunctestExporter
+
+
+def read_file(filename, mode='r'):
+    with open(filename, mode) as f:
+        content = f.read()
+    return content
+
+
+class TestFunctestExporter(unittest.TestCase):
+    """FunctestExporter tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+
+        results = json.loads(read_file('data/functest/functest_results_page_1.json'))['results']
+        self.items = [{'uuid': str(i), 'data': result} for i, result in enumerate(results)]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_flatten(self):
+        """Test whether items are converted to rows with typed values"""
+
+        row = FunctestExporter.flatten(self.items[0])
+
+        expected = ('0', '592ff62c78a2ad000ae6af4d', 'functest', 'snaps_smoke', 'fuel',
+                    'lf-pod2', 'os-nosdn-kvm_ovs_dpdk_bar-ha', 'danube',
+                    'jenkins-functest-fuel-baremetal-daily-danube-515', 'PASS',
+                    datetime.datetime(2017, 6, 1, 10, 59, 27, tzinfo=dateutil.tz.tzutc()),
+                    datetime.datetime(2017, 6, 1, 11, 10, 36, tzinfo=dateutil.tz.tzutc()),
+                    669.0)
+        self.assertTupleEqual(row, expected)
+        self.assertEqual(len(row), len(FunctestExporter.COLUMNS))
+
+    def test_flatten_invalid_dates(self):
+        """Test whether missing or invalid dates are set to None"""
+
+        item = {'uuid': '0', 'data': {'_id': '1', 'start_date': '2017-06-01 10:59:27',
+                                      'stop_date': 'not a date'}}
+        row = FunctestExporter.flatten(item)
+
+        self.assertEqual(row[1], '1')
+        self.assertIsNone(row[2])
+        self.assertEqual(row[10], datetime.datetime(2017, 6, 1, 10, 59, 27, tzinfo=dateutil.tz.tzutc()))
+        self.assertIsNone(row[11])
+        self.assertIsNone(row[12])
+
+    def test_export_ndjson(self):
+        """Test whether items are exported to a compressed newline-delimited JSON file"""
+
+        path = os.path.join(self.test_path, 'items.ndjson.gz')
+
+        with FunctestExporter(path, fmt='ndjson', batch_size=7) as exporter:
+            nrows = exporter.export(self.items)
+
+        self.assertEqual(nrows, 20)
+
+        with gzip.open(path, 'rt') as fd:
+            rows = [json.loads(line) for line in fd]
+
+        self.assertEqual(len(rows), 20)
+        self.assertListEqual(list(rows[0].keys()), [name for name, _ in FunctestExporter.COLUMNS])
+        self.assertEqual(rows[0]['id'], '592ff62c78a2ad000ae6af4d')
+        self.assertEqual(rows[0]['start_date'], '2017-06-01T10:59:27+00:00')
+        self.assertEqual(rows[0]['stop_date'], '2017-06-01T11:10:36+00:00')
+        self.assertEqual(rows[0]['duration'], 669.0)
+        self.assertListEqual([row['uuid'] for row in rows], [str(i) for i in range(20)])
+
+    def test_export_csv(self):
+        """Test whether items are exported to a CSV file"""
+
+        path = os.path.join(self.test_path, 'items.csv')
+
+        with FunctestExporter(path, fmt='csv') as exporter:
+            nrows = exporter.export(self.items)
+
+        self.assertEqual(nrows, 20)
+
+        with open(path, 'r', newline='') as fd:
+            rows = list(csv.reader(fd))
+
+        self.assertEqual(len(rows), 21)
+        self.assertListEqual(rows[0], [name for name, _ in FunctestExporter.COLUMNS])
+        self.assertListEqual(rows[1][-3:], ['2017-06-01T10:59:27+00:00',
+                                            '2017-06-01T11:10:36+00:00',
+                                            '669.0'])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_export_parquet(self):
+        """Test whether items are exported to a Parquet file with typed columns"""
+
+        path = os.path.join(self.test_path, 'items.parquet')
+
+        with FunctestExporter(path, fmt='parquet', batch_size=7) as exporter:
+            nrows = exporter.export(self.items)
+
+        self.assertEqual(nrows, 20)
+
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, 20)
+        self.assertEqual(table.schema.field('duration').type, pyarrow.float64())
+        self.assertEqual(table.schema.field('start_date').type.tz, 'UTC')
+
+        row = table.slice(0, 1).to_pylist()[0]
+        self.assertEqual(row['case'], 'snaps_smoke')
+        self.assertEqual(row['duration'], 669.0)
+
+    def test_export_no_items(self):
+        """Test whether an empty table is written when there are no items"""
+
+        path = os.path.join(self.test_path, 'items.csv')
+
+        with FunctestExporter(path, fmt='csv') as exporter:
+            nrows = exporter.export([])
+
+        self.assertEqual(nrows, 0)
+        header = ','.join(name for name, _ in FunctestExporter.COLUMNS) + '\r\n'
+        self.assertEqual(read_file(path, 'rb'), header.encode('utf-8'))
+
+    def test_invalid_format(self):
+        """Test whether an exception is thrown when the format is not valid"""
+
+        path = os.path.join(self.test_path, 'items.xml')
+
+        with self.assertRaises(BackendError):
+            FunctestExporter(path, fmt='xml')
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from perceval.errors import BackendError
+from perceval.backends.opnfv.flaky import FunctestFlakyDetector
+
+
+def build_run(case, outcome, run, pod='lf-pod2'):
+    """Build an item of a run of a test case; runs are an hour apart"""
+
+    data = {
+        '_id': '%s-%s' % (case, run),
+        'case_name': case,
+        'scenario': 'os-nosdn-nofeature-ha',
+        'pod_name': pod,
+        'build_tag': 'jenkins-functest-%s' % run,
+        'criteria': outcome,
+        'start_date': '2017-06-01 %02d:00:00' % run
+    }
+    return {'uuid': data['_id'], 'data': data}
+
+
+class TestFunctestFlakyDetector(unittest.TestCase):
+    """FunctestFlakyDetector tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_process(self):
+        """Test whether groups are scored when items are given newest first"""
+
+        items = [build_run('vping_ssh', outcome, run)
+                 for run, outcome in enumerate(['PASS', 'FAIL', 'PASS', 'FAILED', 'PASS'])]
+        items += [build_run('vping_userdata', 'PASS', run) for run in range(4)]
+        items += [build_run('api_check', 'FAIL', run) for run in range(2)]
+        items.sort(key=lambda item: item['data']['start_date'], reverse=True)
+
+        detector = FunctestFlakyDetector()
+        scores = list(detector.process(items))
+
+        self.assertEqual(len(scores), 11)
+        self.assertEqual(len(detector), 3)
+
+        score = detector.score(('vping_ssh', 'os-nosdn-nofeature-ha', 'lf-pod2'))
+        expected = {
+            'case_name': 'vping_ssh',
+            'scenario': 'os-nosdn-nofeature-ha',
+            'pod_name': 'lf-pod2',
+            'runs': 5,
+            'flips': 4,
+            'score': 1.0,
+            'last_build_tag': 'jenkins-functest-4',
+            'last_passed': True
+        }
+        self.assertDictEqual(score, expected)
+
+        score = detector.score(('vping_userdata', 'os-nosdn-nofeature-ha', 'lf-pod2'))
+        self.assertEqual(score['flips'], 0)
+        self.assertEqual(score['score'], 0.0)
+
+        # Not enough runs to score the group
+        score = detector.score(('api_check', 'os-nosdn-nofeature-ha', 'lf-pod2'))
+        self.assertEqual(score['runs'], 2)
+        self.assertIsNone(score['score'])
+
+        flaky = detector.flaky()
+        self.assertListEqual([s['case_name'] for s in flaky], ['vping_ssh'])
+
+        flaky = detector.flaky(min_score=0)
+        self.assertListEqual([s['case_name'] for s in flaky], ['vping_ssh', 'vping_userdata'])
+
+    def test_window(self):
+        """Test whether groups keep only the most recent runs"""
+
+        detector = FunctestFlakyDetector(window=3)
+
+        for run, outcome in reversed(list(enumerate(['FAIL', 'PASS', 'PASS', 'FAIL', 'FAIL']))):
+            score = detector.update(build_run('vping_ssh', outcome, run))
+
+        # The oldest runs are out of the window
+        self.assertIsNone(score)
+
+        key = ('vping_ssh', 'os-nosdn-nofeature-ha', 'lf-pod2')
+        self.assertListEqual([r[1] for r in detector.runs[key]],
+                             ['jenkins-functest-2', 'jenkins-functest-3', 'jenkins-functest-4'])
+
+        # Newer runs replace the oldest ones
+        score = detector.update(build_run('vping_ssh', 'PASS', 5))
+        self.assertEqual(score['runs'], 3)
+        self.assertEqual(score['flips'], 1)
+        self.assertEqual(score['score'], 0.5)
+        self.assertEqual(score['last_build_tag'], 'jenkins-functest-5')
+
+    def test_same_build(self):
+        """Test whether runs of the same build tag are taken as one"""
+
+        detector = FunctestFlakyDetector()
+
+        for run, outcome in enumerate(['PASS', 'PASS', 'FAIL']):
+            detector.update(build_run('vping_ssh', outcome, run))
+
+        rerun = build_run('vping_ssh', 'PASS', 2)
+        rerun['data']['start_date'] = '2017-06-01 02:30:00'
+        score = detector.update(rerun)
+
+        self.assertEqual(score['runs'], 3)
+        self.assertEqual(score['flips'], 0)
+        self.assertTrue(score['last_passed'])
+
+        # Older runs of the same build tag do not replace the outcome
+        score = detector.update(build_run('vping_ssh', 'FAIL', 2))
+        self.assertEqual(score['flips'], 0)
+
+    def test_ignored_items(self):
+        """Test whether items with no outcome or start date are ignored"""
+
+        detector = FunctestFlakyDetector()
+
+        item = build_run('vping_ssh', None, 0)
+        self.assertIsNone(detector.update(item))
+
+        item = build_run('vping_ssh', 'SKIPPED', 0)
+        self.assertIsNone(detector.update(item))
+
+        item = build_run('vping_ssh', 'PASS', 0)
+        item['data']['start_date'] = 'not a date'
+        self.assertIsNone(detector.update(item))
+
+        self.assertEqual(len(detector), 0)
+
+    def test_save_load(self):
+        """Test whether the state is saved and restored between runs"""
+
+        path = os.path.join(self.test_path, 'flaky.json')
+
+        detector = FunctestFlakyDetector(path=path)
+        self.assertEqual(len(detector), 0)
+
+        for run, outcome in enumerate(['PASS', 'FAIL', 'PASS']):
+            detector.update(build_run('vping_ssh', outcome, run))
+        detector.update(build_run('vping_ssh', 'PASS', 0, pod='arm-pod3'))
+        detector.save()
+
+        detector = FunctestFlakyDetector(path=path)
+        self.assertEqual(len(detector), 2)
+
+        score = detector.update(build_run('vping_ssh', 'FAIL', 3))
+        self.assertEqual(score['runs'], 4)
+        self.assertEqual(score['flips'], 3)
+        self.assertEqual(score['score'], 1.0)
+
+        # The state is trimmed to smaller windows
+        detector = FunctestFlakyDetector(window=2, path=path)
+        score = detector.score(('vping_ssh', 'os-nosdn-nofeature-ha', 'lf-pod2'))
+        self.assertEqual(score['runs'], 2)
+        self.assertEqual(score['last_build_tag'], 'jenkins-functest-2')
+
+    def test_save_no_path(self):
+        """Test whether an exception is thrown when the state is saved with no path"""
+
+        detector = FunctestFlakyDetector()
+        detector.update(build_run('vping_ssh', 'PASS', 0))
+
+        with self.assertRaisesRegex(BackendError, "path not set"):
+            detector.save()
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')
@@ -20,17 +20,53 @@
 #     Quan Zhou <quan@bitergia.com>
 #
 
+import asyncio
+import collections
 import datetime
+import gzip
+import http.server
+import json
+import math
+import os
+import pickle
+import shutil
+import signal
+import tempfile
+import threading
+import time
 import unittest
 import unittest.mock
+import urllib.parse
 
 import httpretty
 import dateutil.tz
+import requests
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from grimoirelab_toolkit.datetime import InvalidDateError
+
+from perceval.archive import Archive
 from perceval.backend import BackendCommandArgumentParser
-from perceval.backends.opnfv.functest import (Functest,
+from perceval.errors import ArchiveError, BackendError
+from perceval.backends.opnfv.functest import (AsyncFunctestClient,
+                                              Functest,
+                                              FunctestBloomFilter,
+                                              FunctestCheckpoint,
                                               FunctestClient,
-                                              FunctestCommand)
+                                              FunctestCommand,
+                                              FunctestConsistencyCheck,
+                                              FunctestDetailsStore,
+                                              FunctestIdSet,
+                                              FunctestRateLimiter,
+                                              FunctestResponseCache,
+                                              FunctestStats,
+                                              FunctestSyncState,
+                                              parse_date,
+                                              parse_start_date)
 from perceval.utils import DEFAULT_DATETIME
 
 from base import TestCaseBackendArchive
@@ -45,17 +81,19 @@ def read_file(filename, mode='r'):
 FUNCTEST_URL = "http://example.com/"
 FUNCTEST_API_URL = FUNCTEST_URL + 'api/v1/'
 FUNCTEST_RESULTS_URL = FUNCTEST_API_URL + 'results'
+FUNCTEST_MIRROR_URL = "http://mirror.example.com/"
+FUNCTEST_MIRROR_RESULTS_URL = FUNCTEST_MIRROR_URL + 'api/v1/results'
 
 
-def setup_http_server():
+def setup_http_server(results_url=FUNCTEST_RESULTS_URL):
     """Setup a mock HTTP server"""
 
     page1 = read_file('data/functest/functest_results_page_1.json', 'rb')
     page2 = read_file('data/functest/functest_results_page_2.json', 'rb')
     empty_page = read_file('data/functest/functest_results_empty.json', 'rb')
 
-    def request_callback(method, uri, headers):
-        params = httpretty.last_request().querystring
+    def request_callback(request, uri, headers):
+        params = request.querystring
         status = 200
 
         if params['from'][0] == '2020-01-01 00:00:00':
@@ -69,12 +107,156 @@ def setup_http_server():
 
         return (status, headers, body)
 
+    httpretty.register_uri(httpretty.GET,
+                           results_url,
+                           responses=[
+                               httpretty.Response(body=request_callback)
+                           ])
+
+
+def setup_http_server_etags():
+    """Setup a mock HTTP server that supports conditional requests"""
+
+    pages = {
+        '1': read_file('data/functest/functest_results_page_1.json', 'rb'),
+        '2': read_file('data/functest/functest_results_page_2.json', 'rb')
+    }
+
+    def request_callback(request, uri, headers):
+        page = request.querystring['page'][0]
+        etag = '"page-%s"' % page
+
+        headers['ETag'] = etag
+
+        if request.headers.get('If-None-Match', None) == etag:
+            return (304, headers, b'')
+
+        return (200, headers, pages[page])
+
+    httpretty.register_uri(httpretty.GET,
+                           FUNCTEST_RESULTS_URL,
+                           responses=[
+                               httpretty.Response(body=request_callback)
+                           ])
+
+
+def setup_http_server_windows(page_size=10, new_results=None, update=None, update_after=1,
+                              pagination_last=False):
+    """Setup a mock HTTP server that filters results by date and fields.
+
+    When `update` is set, it is called with the list of results
+    after replying to the `update_after` request, to change them.
+    """
+    content = read_file('data/functest/functest_results.json')
+    results = json.loads(content)['results'] + (new_results or [])
+    results = sorted(results, key=lambda r: r['start_date'], reverse=True)
+    nrequests = []
+    fields = {
+        'project': 'project_name',
+        'case': 'case_name',
+        'installer': 'installer',
+        'pod': 'pod_name'
+    }
+
+    def request_callback(request, uri, headers):
+        params = request.querystring
+
+        from_date = params['from'][0]
+        to_date = params['to'][0] if 'to' in params else '9999-12-31 23:59:59'
+        page = int(params['page'][0])
+
+        selected = [r for r in results if from_date <= r['start_date'] <= to_date]
+
+        for param, field in fields.items():
+            if param in params:
+                selected = [r for r in selected if r[field] == params[param][0]]
+        body = {
+            'pagination': {
+                'current_page': page,
+                'total_pages': math.ceil(len(selected) / page_size)
+            },
+            'results': selected[(page - 1) * page_size:page * page_size]
+        }
+        if pagination_last:
+            body['pagination'] = body.pop('pagination')
+
+        nrequests.append(page)
+        if update and len(nrequests) == update_after:
+            update(results)
+
+        return (200, headers, json.dumps(body))
+
     httpretty.register_uri(httpretty.GET,
                            FUNCTEST_RESULTS_URL,
                            responses=[
                                httpretty.Response(body=request_callback)
                            ])
 
+    return [r['_id'] for r in results]
+
+
+class LocalFunctestServer:
+    """HTTP server on a local port that replies with the pages of the fixtures.
+
+    Clients that do not use `requests`, like the async one, and
+    clients that retry requests, cannot be mocked with httpretty.
+    The first `failures` requests fail with the `status` error.
+    Replies are sent after waiting `delay` seconds.
+    """
+    def __init__(self, failures=0, status=503, delay=0):
+        self.failures = failures
+        self.status = status
+        self.delay = delay
+        self.requests = []
+        self.pages = {
+            '1': read_file('data/functest/functest_results_page_1.json', 'rb'),
+            '2': read_file('data/functest/functest_results_page_2.json', 'rb')
+        }
+        self._server = None
+
+    @property
+    def url(self):
+        return 'http://%s:%s/' % self._server.server_address
+
+    def __enter__(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                server.requests.append(params)
+
+                if server.failures > 0:
+                    server.failures -= 1
+                    status, body = server.status, b''
+                else:
+                    status, body = 200, server.pages[params['page'][0]]
+
+                time.sleep(server.delay)
+
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.send_header('Retry-After', '0')
+                    self.end_headers()
+                    self.wfile.write(body)
+                except ConnectionError:
+                    # The client stopped waiting for the reply
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
 
 class TestFunctestBackend(unittest.TestCase):
     """Functest backend tests"""
@@ -85,10 +267,18 @@ class TestFunctestBackend(unittest.TestCase):
         functest = Functest(FUNCTEST_URL, tag='test')
 
         self.assertEqual(functest.url, FUNCTEST_URL)
+        self.assertListEqual(functest.urls, [FUNCTEST_URL])
         self.assertEqual(functest.origin, FUNCTEST_URL)
         self.assertEqual(functest.tag, 'test')
         self.assertIsNone(functest.client)
         self.assertTrue(functest.ssl_verify)
+        self.assertEqual(functest.workers, 1)
+        self.assertFalse(functest.stream)
+        self.assertIsNone(functest.pool_size)
+        self.assertTrue(functest.keep_alive)
+        self.assertTrue(functest.compress)
+        self.assertEqual(functest.details, 'full')
+        self.assertIsNone(functest.details_store)
 
         # When tag is empty or None it will be set to
         # the value in
@@ -101,15 +291,91 @@ class TestFunctestBackend(unittest.TestCase):
         self.assertEqual(functest.origin, FUNCTEST_URL)
         self.assertEqual(functest.tag, FUNCTEST_URL)
 
+        functest = Functest(FUNCTEST_URL, workers=4, stream=True, pool_size=20,
+                            keep_alive=False, compress=False)
+        self.assertEqual(functest.workers, 4)
+        self.assertTrue(functest.stream)
+        self.assertEqual(functest.pool_size, 20)
+        self.assertFalse(functest.keep_alive)
+        self.assertFalse(functest.compress)
+
+        functest = Functest(FUNCTEST_URL, max_retries=10, timeout=30, adaptive_rate=True,
+                            max_backoff=30, latency_factor=2)
+        self.assertEqual(functest.max_retries, 10)
+        self.assertEqual(functest.timeout, 30)
+        self.assertTrue(functest.adaptive_rate)
+        self.assertEqual(functest.max_backoff, 30)
+        self.assertEqual(functest.latency_factor, 2)
+
+        functest = Functest([FUNCTEST_URL, FUNCTEST_MIRROR_URL], dedupe=True)
+        self.assertListEqual(functest.urls, [FUNCTEST_URL, FUNCTEST_MIRROR_URL])
+        self.assertEqual(functest.origin, FUNCTEST_URL + ',' + FUNCTEST_MIRROR_URL)
+        self.assertEqual(functest.tag, FUNCTEST_URL + ',' + FUNCTEST_MIRROR_URL)
+        self.assertTrue(functest.dedupe)
+
+        functest = Functest(FUNCTEST_URL, consistency=True, bloom_capacity=1000)
+        self.assertTrue(functest.consistency)
+        self.assertEqual(functest.bloom_capacity, 1000)
+        self.assertIsNone(functest.consistency_check)
+        self.assertFalse(functest.metrics)
+
+        functest = Functest(FUNCTEST_URL, metrics=True)
+        self.assertTrue(functest.metrics)
+        self.assertFalse(functest.compress_archive)
+
+        functest = Functest(FUNCTEST_URL, compress_archive=True)
+        self.assertTrue(functest.compress_archive)
+
+        functest = Functest(FUNCTEST_URL)
+        self.assertIsNone(functest.stats)
+
+        functest = Functest(FUNCTEST_URL, stats=True)
+        self.assertIsInstance(functest.stats, FunctestStats)
+        self.assertIsNone(functest.stats.interval)
+        self.assertIsNone(functest.stats.path)
+
+        functest = Functest(FUNCTEST_URL, stats_interval=30, stats_file='/tmp/stats.jsonl')
+        self.assertIsInstance(functest.stats, FunctestStats)
+        self.assertEqual(functest.stats.interval, 30)
+        self.assertEqual(functest.stats.path, '/tmp/stats.jsonl')
+
+        functest = Functest(FUNCTEST_URL, details='external', details_dir='/tmp/details')
+        self.assertEqual(functest.details, 'external')
+        self.assertIsInstance(functest.details_store, FunctestDetailsStore)
+        self.assertEqual(functest.details_store.dirpath, '/tmp/details')
+
+    def test_initialization_servers_invalid(self):
+        """Test whether it fails when checkpoints or sync files are set with several URLs"""
+
+        urls = [FUNCTEST_URL, FUNCTEST_MIRROR_URL]
+
+        with self.assertRaises(BackendError):
+            _ = Functest(urls, checkpoint_file='/tmp/checkpoint.json')
+
+        with self.assertRaises(BackendError):
+            _ = Functest(urls, sync_file='/tmp/sync.json')
+
+        with self.assertRaises(BackendError):
+            _ = Functest([])
+
+    def test_initialization_details_invalid(self):
+        """Test whether it fails when the details mode is not valid"""
+
+        with self.assertRaises(BackendError):
+            _ = Functest(FUNCTEST_URL, details='partial')
+
+        with self.assertRaises(BackendError):
+            _ = Functest(FUNCTEST_URL, details='external')
+
     def test_has_archiving(self):
         """Test if it returns True when has_archiving is called"""
 
         self.assertEqual(Functest.has_archiving(), True)
 
     def test_has_resuming(self):
-        """Test if it returns False when has_resuming is called"""
+        """Test if it returns True when has_resuming is called"""
 
-        self.assertEqual(Functest.has_resuming(), False)
+        self.assertEqual(Functest.has_resuming(), True)
 
     @httpretty.activate
     @unittest.mock.patch('perceval.backends.opnfv.functest.datetime_utcnow')
@@ -211,176 +477,2968 @@ class TestFunctestBackend(unittest.TestCase):
         self.assertDictEqual(latest_requests[1].querystring, expected[1])
 
     @httpretty.activate
-    def test_fetch_empty(self):
-        """Test whether it works when no data is returned"""
+    @unittest.mock.patch('perceval.backends.opnfv.functest.datetime_utcnow')
+    def test_fetch_workers(self, mock_utcnow):
+        """Test whether it fetches the same items when pages are fetched concurrently"""
 
-        setup_http_server()
+        mock_utcnow.return_value = datetime.datetime(2017, 6, 1, 11, 0, 0)
 
-        from_date = datetime.datetime(2020, 1, 1)
+        setup_http_server()
 
         functest = Functest(FUNCTEST_URL)
-        items = [item for item in functest.fetch(from_date=from_date)]
+        expected = [item['uuid'] for item in functest.fetch()]
 
-        self.assertEqual(len(items), 0)
+        functest = Functest(FUNCTEST_URL, workers=4)
+        items = [item for item in functest.fetch()]
 
-        # Check requests
-        self.assertEqual(len(httpretty.httpretty.latest_requests), 1)
+        self.assertEqual(len(items), 27)
+        self.assertListEqual([item['uuid'] for item in items], expected)
+
+        item = items[0]
+        self.assertEqual(item['uuid'], '14d307c6511ad3e670a9b6cbef0942a4b5d09ab0')
+        self.assertEqual(item['data']['_id'], '592ff62c78a2ad000ae6af4d')
+
+        item = items[26]
+        self.assertEqual(item['uuid'], 'cca9bf1e338b4cac4fbedf1d0cc46b2f36465e8c')
+        self.assertEqual(item['data']['_id'], '592fe61678a2ad000ae6af33')
+
+        # Check requests; the first four belong to the sequential fetch
+        latest_requests = httpretty.httpretty.latest_requests
+        self.assertEqual(len(latest_requests), 4)
+        self.assertEqual(latest_requests[2].querystring['page'], ['1'])
+        self.assertEqual(latest_requests[3].querystring['page'], ['2'])
 
     @httpretty.activate
-    def test_search_fields(self):
-        """Test whether the search_fields is properly set"""
+    @unittest.mock.patch('perceval.backends.opnfv.functest.datetime_utcnow')
+    def test_fetch_stream(self, mock_utcnow):
+        """Test whether it fetches the same items decoding pages incrementally"""
+
+        mock_utcnow.return_value = datetime.datetime(2017, 6, 1, 11, 0, 0)
 
         setup_http_server()
 
         functest = Functest(FUNCTEST_URL)
+        expected = [item for item in functest.fetch()]
+
+        functest = Functest(FUNCTEST_URL, stream=True)
         items = [item for item in functest.fetch()]
 
-        item = items[0]
-        self.assertEqual(functest.metadata_id(item['data']), item['search_fields']['item_id'])
-        self.assertEqual(item['data']['project_name'], 'functest')
-        self.assertEqual(item['data']['project_name'], item['search_fields']['project_name'])
+        self.assertEqual(len(items), 27)
 
-    def test_parse_json(self):
-        """Test if it parses a JSON stream"""
+        for item, expected_item in zip(items, expected):
+            del item['timestamp']
+            del expected_item['timestamp']
+            self.assertDictEqual(item, expected_item)
 
-        raw_json = read_file('data/functest/functest_results.json')
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 4)
 
-        data = Functest.parse_json(raw_json)
-        self.assertEqual(len(data), 27)
+    @httpretty.activate
+    def test_fetch_stream_workers(self):
+        """Test whether pages fetched concurrently are decoded incrementally"""
 
+        setup_http_server()
 
-class TestFunctestBackendArchive(TestCaseBackendArchive):
-    """Functest backend tests using an archive"""
+        functest = Functest(FUNCTEST_URL, workers=2, stream=True)
+        items = [item for item in functest.fetch()]
 
-    def setUp(self):
-        super().setUp()
-        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive)
-        self.backend_read_archive = Functest(FUNCTEST_URL, archive=self.archive)
+        self.assertEqual(len(items), 27)
+        self.assertEqual(items[0]['data']['_id'], '592ff62c78a2ad000ae6af4d')
+        self.assertEqual(items[26]['data']['_id'], '592fe61678a2ad000ae6af33')
 
     @httpretty.activate
-    @unittest.mock.patch('perceval.backends.opnfv.functest.datetime_utcnow')
-    def test_fetch_from_archive(self, mock_utcnow):
-        """Test whether it fetches data from a repository from archive"""
+    def test_fetch_checkpoint(self):
+        """Test whether the fetch process is resumed from a checkpoint"""
 
-        mock_utcnow.return_value = datetime.datetime(2017, 6, 1, 11, 0, 0)
+        tmp_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, tmp_path)
+        checkpoint_file = os.path.join(tmp_path, 'checkpoint.json')
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
 
         setup_http_server()
-        self._test_fetch_from_archive()
+
+        # Stop the process after returning the first item of the second page
+        functest = Functest(FUNCTEST_URL, checkpoint_file=checkpoint_file)
+        items = functest.fetch(from_date=from_date, to_date=to_date)
+
+        for _ in range(21):
+            next(items)
+        items.close()
+
+        with open(checkpoint_file, 'r') as fd:
+            checkpoint = json.load(fd)
+
+        expected = {
+            'from_date': '2017-06-01 10:00:00',
+            'to_date': '2017-06-01 11:00:00',
+            'page': 1,
+            'last_id': '592fe88e78a2ad000ae6af39',
+            'filters': {}
+        }
+        self.assertDictEqual(checkpoint, expected)
+
+        # Resume the process; 'to_date' is taken from the checkpoint
+        functest = Functest(FUNCTEST_URL, checkpoint_file=checkpoint_file)
+        items = [item for item in functest.fetch(from_date=from_date)]
+
+        self.assertEqual(len(items), 7)
+        self.assertEqual(items[0]['data']['_id'], '592fe82678a2ad000ae6af38')
+        self.assertEqual(items[6]['data']['_id'], '592fe61678a2ad000ae6af33')
+
+        expected = {
+            'from': ['2017-06-01 10:00:00'],
+            'to': ['2017-06-01 11:00:00'],
+            'page': ['2']
+        }
+        self.assertDictEqual(httpretty.last_request().querystring, expected)
+
+        # The checkpoint is removed once the process is completed
+        self.assertFalse(os.path.exists(checkpoint_file))
 
     @httpretty.activate
-    def test_fetch_from_date_from_archive(self):
-        """Test whether it fetches data from a repository using dates for filtering from archive"""
+    def test_fetch_checkpoint_shifted_pages(self):
+        """Test whether items returned before resuming are skipped"""
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, tmp_path)
+        checkpoint_file = os.path.join(tmp_path, 'checkpoint.json')
 
         from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
         to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
 
+        # New results shifted the last two items returned to the next page
+        checkpoint = FunctestCheckpoint(checkpoint_file)
+        checkpoint.save(from_date, to_date, 1, '592fed0478a2ad000ae6af3d')
+
         setup_http_server()
-        self._test_fetch_from_archive(from_date=from_date, to_date=to_date)
+
+        functest = Functest(FUNCTEST_URL, checkpoint_file=checkpoint_file)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date)]
+
+        self.assertEqual(len(items), 5)
+        self.assertEqual(items[0]['data']['_id'], '592fe78778a2ad000ae6af37')
+        self.assertEqual(items[4]['data']['_id'], '592fe61678a2ad000ae6af33')
+
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 1)
 
     @httpretty.activate
-    def test_fetch_empty_from_archive(self):
-        """Test whether it works when no data is returned from archive"""
+    def test_fetch_checkpoint_other_window(self):
+        """Test whether checkpoints of other dates are ignored"""
+
+        tmp_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, tmp_path)
+        checkpoint_file = os.path.join(tmp_path, 'checkpoint.json')
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        checkpoint = FunctestCheckpoint(checkpoint_file)
+        checkpoint.save(datetime.datetime(2017, 5, 1), to_date, 1, '592fe88e78a2ad000ae6af39')
 
         setup_http_server()
-        from_date = datetime.datetime(2020, 1, 1)
-        self._test_fetch_from_archive(from_date=from_date)
 
+        functest = Functest(FUNCTEST_URL, checkpoint_file=checkpoint_file)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date)]
 
-class TestFunctestClient(unittest.TestCase):
-    """Functest API client tests.
+        self.assertEqual(len(items), 27)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+        self.assertFalse(os.path.exists(checkpoint_file))
 
-    These tests do not check the body of the response, only if the call
-    was well formed and if a response was obtained. Due to this, take
-    into account that the body returned on each request might not
-    match with the parameters from the request.
-    """
-    def test_init(self):
-        """Test initialization"""
+    @httpretty.activate
+    def test_fetch_shard_days(self):
+        """Test whether it fetches data splitting dates in windows of fixed size"""
 
-        functest = FunctestClient(FUNCTEST_URL)
-        self.assertEqual(functest.base_url, FUNCTEST_URL)
-        self.assertEqual(functest.max_retries, 3)
-        self.assertIsNone(functest.archive)
-        self.assertFalse(functest.from_archive)
-        self.assertTrue(functest.ssl_verify)
+        expected = setup_http_server_windows()
 
-        functest = FunctestClient(FUNCTEST_URL, ssl_verify=False)
-        self.assertEqual(functest.base_url, FUNCTEST_URL)
-        self.assertEqual(functest.max_retries, 3)
-        self.assertIsNone(functest.archive)
-        self.assertFalse(functest.from_archive)
-        self.assertFalse(functest.ssl_verify)
+        # One item is placed on the edge of the first two windows
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 5, 31)
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                 shard_days=1 / 48)]
+
+        self.assertEqual(len(items), 27)
+        self.assertListEqual([item['data']['_id'] for item in items], expected)
+
+        expected = [
+            ('2017-06-01 10:35:31', '2017-06-01 11:05:31', '1'),
+            ('2017-06-01 10:35:31', '2017-06-01 11:05:31', '2'),
+            ('2017-06-01 10:05:31', '2017-06-01 10:35:31', '1'),
+            ('2017-06-01 10:00:00', '2017-06-01 10:05:31', '1')
+        ]
+
+        requests = [(req.querystring['from'][0], req.querystring['to'][0], req.querystring['page'][0])
+                    for req in httpretty.httpretty.latest_requests]
+        self.assertListEqual(requests, expected)
 
     @httpretty.activate
-    def test_repository(self):
-        """Test repository API call"""
+    def test_fetch_shard_days_workers(self):
+        """Test whether windows fetched concurrently return the items in order"""
 
-        # Set up a mock HTTP server
-        setup_http_server()
+        expected = setup_http_server_windows()
 
-        # Call API
-        client = FunctestClient(FUNCTEST_URL)
         from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
-        results = [r for r in client.results(from_date=from_date)]
+        to_date = datetime.datetime(2017, 6, 1, 11, 5, 31)
 
-        req = httpretty.last_request()
+        functest = Functest(FUNCTEST_URL, workers=3)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                 shard_days=1 / 48)]
 
-        expected = {
-            'from': ['2017-06-01 10:00:00'],
-            'page': ['2']
-        }
-        self.assertEqual(req.method, 'GET')
-        self.assertRegex(req.path, '/api/v1/results')
-        self.assertDictEqual(req.querystring, expected)
+        self.assertEqual(len(items), 27)
+        self.assertListEqual([item['data']['_id'] for item in items], expected)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 4)
 
-        # Test using to_date value
+    @httpretty.activate
+    def test_fetch_shard_pages(self):
+        """Test whether it fetches data splitting dates in windows sized by pages"""
+
+        expected = setup_http_server_windows()
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
         to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
-        results = [r for r in client.results(from_date=from_date, to_date=to_date)]
 
-        req = httpretty.last_request()
+        functest = Functest(FUNCTEST_URL, workers=2)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                 shard_pages=1)]
 
-        expected = {
-            'from': ['2017-06-01 10:00:00'],
-            'to': ['2017-06-01 11:00:00'],
-            'page': ['2']
-        }
-        self.assertEqual(req.method, 'GET')
-        self.assertRegex(req.path, '/api/v1/results')
-        self.assertDictEqual(req.querystring, expected)
+        self.assertEqual(len(items), 27)
+        self.assertListEqual([item['data']['_id'] for item in items], expected)
 
+        # The first and last pages of the range size the windows
+        expected = [
+            ('2017-06-01 10:00:00', '2017-06-01 11:00:00', '1'),
+            ('2017-06-01 10:00:00', '2017-06-01 11:00:00', '3'),
+            ('2017-06-01 10:40:17', '2017-06-01 11:00:00', '1'),
+            ('2017-06-01 10:21:07', '2017-06-01 10:40:17', '1'),
+            ('2017-06-01 10:00:00', '2017-06-01 10:21:07', '1')
+        ]
 
-class TestFunctestCommand(unittest.TestCase):
-    """Tests for FunctestCommand class"""
+        requests = [(req.querystring['from'][0], req.querystring['to'][0], req.querystring['page'][0])
+                    for req in httpretty.httpretty.latest_requests]
+        self.assertListEqual(requests[:2], expected[:2])
+        self.assertListEqual(sorted(requests[2:]), sorted(expected[2:]))
 
-    def test_backend_class(self):
-        """Test if the backend class is Functest"""
+    @httpretty.activate
+    def test_fetch_shard_pages_stream(self):
+        """Test whether it sizes the windows with pages decoded incrementally"""
 
-        self.assertIs(FunctestCommand.BACKEND, Functest)
+        expected = setup_http_server_windows(pagination_last=True)
 
-    def test_setup_cmd_parser(self):
-        """Test if it parser object is correctly initialized"""
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
 
-        parser = FunctestCommand.setup_cmd_parser()
-        self.assertIsInstance(parser, BackendCommandArgumentParser)
-        self.assertEqual(parser._backend, Functest)
+        functest = Functest(FUNCTEST_URL, stream=True)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                 shard_pages=1)]
 
-        args = ['--from-date', '1970-01-01',
-                '--to-date', '2010-01-01',
-                'http://example.com']
+        self.assertListEqual([item['data']['_id'] for item in items], expected)
 
-        parsed_args = parser.parse(*args)
-        self.assertEqual(parsed_args.url, 'http://example.com')
-        self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
-        self.assertEqual(parsed_args.to_date,
-                         datetime.datetime(2010, 1, 1, 0, 0, 0,
-                                           tzinfo=dateutil.tz.tzutc()))
-        self.assertTrue(parsed_args.ssl_verify)
+        functest = Functest(FUNCTEST_URL, stream=True)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                 shard_pages=5)]
 
-        args = ['http://example.com', '--no-archive', '--no-ssl-verify']
-        parsed_args = parser.parse(*args)
-        self.assertEqual(parsed_args.url, 'http://example.com')
-        self.assertTrue(parsed_args.no_archive)
-        self.assertFalse(parsed_args.ssl_verify)
+        self.assertListEqual([item['data']['_id'] for item in items], expected)
+
+    @httpretty.activate
+    @unittest.mock.patch.object(FunctestClient, 'WINDOW_QUEUE_SIZE', 1)
+    def test_fetch_shard_pages_window_queue(self):
+        """Test whether windows with more pages than the queue are fetched"""
+
+        expected = setup_http_server_windows(page_size=2)
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 5, 31)
+
+        functest = Functest(FUNCTEST_URL, workers=3)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                 shard_days=1 / 48)]
+
+        self.assertListEqual([item['data']['_id'] for item in items], expected)
+
+        # Stopping in the middle of a window does not wait for the others
+        functest = Functest(FUNCTEST_URL, workers=3)
+        items = functest.fetch(from_date=from_date, to_date=to_date, shard_days=1 / 48)
+        self.assertEqual(next(items)['data']['_id'], expected[0])
+        items.close()
+
+    @httpretty.activate
+    def test_fetch_shard_pages_small_range(self):
+        """Test whether small ranges of dates are not split"""
+
+        expected = setup_http_server_windows()
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                 shard_pages=5)]
+
+        self.assertListEqual([item['data']['_id'] for item in items], expected)
+
+        pages = [req.querystring['page'][0] for req in httpretty.httpretty.latest_requests]
+        self.assertListEqual(pages, ['1', '2', '3'])
+
+    def test_fetch_shard_invalid(self):
+        """Test whether it fails when the windows are not well defined"""
+
+        functest = Functest(FUNCTEST_URL)
+
+        with self.assertRaises(BackendError):
+            _ = [item for item in functest.fetch(shard_days=1, shard_pages=10)]
+
+        with self.assertRaises(BackendError):
+            _ = [item for item in functest.fetch(shard_days=-1)]
+
+        functest = Functest(FUNCTEST_URL, checkpoint_file='/tmp/checkpoint.json')
+
+        with self.assertRaises(BackendError):
+            _ = [item for item in functest.fetch(shard_pages=10)]
+
+    @httpretty.activate
+    def test_fetch_filters(self):
+        """Test whether single values are sent to the server to filter the results"""
+
+        setup_http_server_windows()
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item for item in functest.fetch(from_date=from_date,
+                                                 installers=['daisy'])]
+
+        self.assertEqual(len(items), 2)
+        for item in items:
+            self.assertEqual(item['data']['installer'], 'daisy')
+
+        req = httpretty.last_request()
+        self.assertEqual(req.querystring['installer'], ['daisy'])
+        self.assertNotIn('project', req.querystring)
+        self.assertNotIn('case', req.querystring)
+        self.assertNotIn('pod', req.querystring)
+
+        items = [item for item in functest.fetch(from_date=from_date,
+                                                 projects=['functest'],
+                                                 cases=['api_check'])]
+
+        self.assertEqual(len(items), 5)
+        for item in items:
+            self.assertEqual(item['data']['project_name'], 'functest')
+            self.assertEqual(item['data']['case_name'], 'api_check')
+
+        req = httpretty.last_request()
+        self.assertEqual(req.querystring['project'], ['functest'])
+        self.assertEqual(req.querystring['case'], ['api_check'])
+
+    @httpretty.activate
+    def test_fetch_filters_several_values(self):
+        """Test whether several values of a field are filtered by the backend"""
+
+        setup_http_server_windows()
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item for item in functest.fetch(from_date=from_date,
+                                                 pods=['lf-pod2', 'arm-pod3'])]
+
+        self.assertEqual(len(items), 15)
+        for item in items:
+            self.assertIn(item['data']['pod_name'], ['lf-pod2', 'arm-pod3'])
+
+        for req in httpretty.httpretty.latest_requests:
+            self.assertNotIn('pod', req.querystring)
+
+    @httpretty.activate
+    def test_fetch_filters_ignored_by_server(self):
+        """Test whether results are filtered when the server ignores the filters"""
+
+        setup_http_server()
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item for item in functest.fetch(from_date=from_date,
+                                                 installers=['daisy'])]
+
+        self.assertEqual(len(items), 2)
+        for item in items:
+            self.assertEqual(item['data']['installer'], 'daisy')
+
+    @httpretty.activate
+    def test_fetch_filters_shard_days(self):
+        """Test whether filters are sent on every window of dates"""
+
+        setup_http_server_windows()
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 5, 31)
+
+        functest = Functest(FUNCTEST_URL, workers=2)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                 shard_days=1 / 48,
+                                                 pods=['ericsson-virtual1'])]
+
+        self.assertEqual(len(items), 7)
+        for item in items:
+            self.assertEqual(item['data']['pod_name'], 'ericsson-virtual1')
+
+        for req in httpretty.httpretty.latest_requests:
+            self.assertEqual(req.querystring['pod'], ['ericsson-virtual1'])
+
+    @httpretty.activate
+    def test_fetch_sync(self):
+        """Test whether incremental fetch processes only return new items"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        sync_file = os.path.join(dirpath, 'sync.json')
+
+        setup_http_server_windows()
+
+        functest = Functest(FUNCTEST_URL, sync_file=sync_file)
+        items = [item for item in functest.fetch(from_date=None)]
+
+        self.assertEqual(len(items), 27)
+
+        expected = {
+            'start_date': '2017-06-01 10:59:27',
+            'ids': ['592ff62c78a2ad000ae6af4d'],
+            'selection': {}
+        }
+        self.assertDictEqual(FunctestSyncState(sync_file).load(), expected)
+
+        # Nothing new; only the last second is requested again
+        items = [item for item in functest.fetch(from_date=None)]
+
+        self.assertEqual(len(items), 0)
+
+        req = httpretty.last_request()
+        self.assertEqual(req.querystring['from'], ['2017-06-01 10:59:27'])
+        self.assertDictEqual(FunctestSyncState(sync_file).load(), expected)
+
+        # New results, one of them on the same second of the last one
+        content = read_file('data/functest/functest_results.json')
+        result = json.loads(content)['results'][0]
+
+        new_results = []
+        for _id, start_date in [('5930000078a2ad000ae6af60', '2017-06-01 10:59:27'),
+                                ('5930000078a2ad000ae6af61', '2017-06-01 11:30:00'),
+                                ('5930000078a2ad000ae6af62', '2017-06-01 11:30:00')]:
+            new_result = dict(result)
+            new_result['_id'] = _id
+            new_result['start_date'] = start_date
+            new_results.append(new_result)
+
+        setup_http_server_windows(new_results=new_results)
+
+        items = [item for item in functest.fetch(from_date=None)]
+
+        self.assertListEqual(sorted(item['data']['_id'] for item in items),
+                             ['5930000078a2ad000ae6af60',
+                              '5930000078a2ad000ae6af61',
+                              '5930000078a2ad000ae6af62'])
+
+        expected = {
+            'start_date': '2017-06-01 11:30:00',
+            'ids': ['5930000078a2ad000ae6af61', '5930000078a2ad000ae6af62'],
+            'selection': {}
+        }
+        self.assertDictEqual(FunctestSyncState(sync_file).load(), expected)
+
+    @httpretty.activate
+    def test_fetch_sync_other_selection(self):
+        """Test whether the sync state is ignored for other selections of items"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        sync_file = os.path.join(dirpath, 'sync.json')
+
+        setup_http_server_windows()
+
+        functest = Functest(FUNCTEST_URL, sync_file=sync_file)
+        items = [item for item in functest.fetch(from_date=None, pods=['arm-pod3'])]
+
+        self.assertEqual(len(items), 6)
+
+        state = FunctestSyncState(sync_file).load()
+        self.assertDictEqual(state['selection'], {'pod_name': ['arm-pod3']})
+
+        items = [item for item in functest.fetch(from_date=None)]
+        self.assertEqual(len(items), 27)
+
+        req = httpretty.last_request()
+        self.assertEqual(req.querystring['from'], ['1970-01-01 00:00:00'])
+
+    @httpretty.activate
+    def test_fetch_sync_later_from_date(self):
+        """Test whether a later from date has precedence over the sync state"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        sync_file = os.path.join(dirpath, 'sync.json')
+
+        FunctestSyncState(sync_file).save(datetime.datetime(2017, 6, 1, 10, 0, 0),
+                                          {'592fe61678a2ad000ae6af33'})
+        setup_http_server_windows()
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 55, 0)
+
+        functest = Functest(FUNCTEST_URL, sync_file=sync_file)
+        items = [item for item in functest.fetch(from_date=from_date)]
+
+        self.assertListEqual([item['data']['_id'] for item in items],
+                             ['592ff62c78a2ad000ae6af4d', '592ff59378a2ad000ae6af4c'])
+
+        req = httpretty.last_request()
+        self.assertEqual(req.querystring['from'], ['2017-06-01 10:55:00'])
+
+    @httpretty.activate
+    def test_fetch_cache(self):
+        """Test whether fresh pages are read from the cache"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        cache_file = os.path.join(dirpath, 'cache.sqlite3')
+
+        setup_http_server()
+
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, cache_file=cache_file)
+        items = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 27)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
+        functest = Functest(FUNCTEST_URL, cache_file=cache_file)
+        cached_items = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+        self.assertListEqual([item['data'] for item in cached_items],
+                             [item['data'] for item in items])
+
+        # Other queries are not cached
+        to_date = datetime.datetime(2017, 6, 1, 12, 0, 0)
+        items = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 27)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 4)
+
+    @httpretty.activate
+    def test_fetch_cache_revalidate(self):
+        """Test whether stale pages are validated with conditional requests"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        cache_file = os.path.join(dirpath, 'cache.sqlite3')
+
+        setup_http_server_etags()
+
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, cache_file=cache_file, cache_ttl=0)
+        items = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 27)
+
+        requests_sent = httpretty.httpretty.latest_requests
+        self.assertEqual(len(requests_sent), 2)
+        for req in requests_sent:
+            self.assertNotIn('If-None-Match', req.headers)
+
+        items = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 27)
+
+        requests_sent = httpretty.httpretty.latest_requests
+        self.assertEqual(len(requests_sent), 4)
+        self.assertEqual(requests_sent[2].headers['If-None-Match'], '"page-1"')
+        self.assertEqual(requests_sent[3].headers['If-None-Match'], '"page-2"')
+
+    @httpretty.activate
+    def test_fetch_servers(self):
+        """Test whether several servers are fetched, tagging the items with their origin"""
+
+        setup_http_server()
+        setup_http_server(FUNCTEST_MIRROR_RESULTS_URL)
+
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest([FUNCTEST_URL, FUNCTEST_MIRROR_URL], tag='opnfv')
+        items = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 54)
+
+        for origin in (FUNCTEST_URL, FUNCTEST_MIRROR_URL):
+            server_items = [item for item in items if item['origin'] == origin]
+            self.assertEqual(len(server_items), 27)
+
+            # Items of each server keep their order
+            expected = Functest(origin)
+            expected_items = [item for item in expected.fetch(from_date=None, to_date=to_date)]
+            self.assertListEqual([item['uuid'] for item in server_items],
+                                 [item['uuid'] for item in expected_items])
+
+        for item in items:
+            self.assertEqual(item['tag'], 'opnfv')
+
+        uuids = {item['uuid'] for item in items}
+        self.assertEqual(len(uuids), 54)
+
+    @httpretty.activate
+    def test_fetch_servers_dedupe(self):
+        """Test whether duplicated items across servers are removed"""
+
+        setup_http_server()
+        setup_http_server(FUNCTEST_MIRROR_RESULTS_URL)
+
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest([FUNCTEST_URL, FUNCTEST_MIRROR_URL], dedupe=True)
+        items = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 27)
+        self.assertEqual(len({item['data']['_id'] for item in items}), 27)
+
+    @httpretty.activate
+    def test_fetch_consistency_new_results(self):
+        """Test whether items pushed to the next page by new results are not returned twice"""
+
+        new_result = {
+            '_id': 'ffffffffffffffffffffffff',
+            'start_date': '2017-06-01 10:59:59',
+            'stop_date': '2017-06-01 11:00:00',
+            'project_name': 'functest',
+            'case_name': 'new_case',
+            'installer': 'fuel',
+            'pod_name': 'lf-pod2'
+        }
+
+        def update(results):
+            results.insert(0, new_result)
+
+        ids = setup_http_server_windows(page_size=5, update=update)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, consistency=True)
+        items = [item['data']['_id'] for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertListEqual(items, ids)
+
+        check = functest.consistency_check
+        self.assertEqual(check.nduplicates, 1)
+        self.assertEqual(check.nshifts, 1)
+        self.assertEqual(check.nrecovered, 0)
+
+        # Without the check, the last item of the first page is returned twice
+        setup_http_server_windows(page_size=5, update=update)
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item['data']['_id'] for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 28)
+        self.assertEqual(len(set(items)), 27)
+
+    @httpretty.activate
+    def test_fetch_consistency_removed_results(self):
+        """Test whether items pulled to the previous page by removed results are recovered"""
+
+        def update(results):
+            del results[0:2]
+
+        ids = setup_http_server_windows(page_size=5, update=update)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, consistency=True, bloom_capacity=100)
+        items = [item['data']['_id'] for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 27)
+        self.assertSetEqual(set(items), set(ids))
+
+        check = functest.consistency_check
+        self.assertIsInstance(check.ids, FunctestBloomFilter)
+        self.assertEqual(check.nduplicates, 0)
+        self.assertEqual(check.nshifts, 1)
+        self.assertEqual(check.nrecovered, 2)
+
+        # Without the check, two items are skipped
+        setup_http_server_windows(page_size=5, update=update)
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item['data']['_id'] for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 25)
+
+    @httpretty.activate
+    def test_fetch_consistency_shards(self):
+        """Test whether the consistency is checked on the pages of each window"""
+
+        ids = setup_http_server_windows(page_size=5)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, consistency=True)
+        items = [item['data']['_id'] for item in functest.fetch(from_date=None, to_date=to_date,
+                                                                shard_pages=2)]
+
+        self.assertSetEqual(set(items), set(ids))
+        self.assertEqual(len(items), 27)
+        self.assertEqual(len(functest.consistency_check.ids), 27)
+        self.assertEqual(functest.consistency_check.nshifts, 0)
+
+    @httpretty.activate
+    def test_fetch_consistency_shard_edges(self):
+        """Test whether items on the edges of the windows are not taken as duplicates"""
+
+        expected = setup_http_server_windows()
+
+        # One item is placed on the edge of the first two windows
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 5, 31)
+
+        functest = Functest(FUNCTEST_URL, consistency=True)
+
+        with self.assertNoLogs('perceval.backends.opnfv.functest', level='WARNING'):
+            items = [item['data']['_id'] for item in functest.fetch(from_date=from_date, to_date=to_date,
+                                                                    shard_days=1 / 48)]
+
+        self.assertListEqual(items, expected)
+        self.assertEqual(functest.consistency_check.nduplicates, 0)
+        self.assertEqual(functest.consistency_check.nshifts, 0)
+
+    @httpretty.activate
+    def test_follow(self):
+        """Test whether new items are returned while the server is followed"""
+
+        new_result = {
+            '_id': 'ffffffffffffffffffffffff',
+            'start_date': '2017-06-01 10:55:00',
+            'stop_date': '2017-06-01 11:05:00',
+            'project_name': 'functest',
+            'case_name': 'new_case',
+            'installer': 'fuel',
+            'pod_name': 'lf-pod2'
+        }
+
+        def update(results):
+            results.insert(1, new_result)
+
+        ids = setup_http_server_windows(page_size=100, update=update, update_after=3)
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        sync_file = os.path.join(dirpath, 'sync.json')
+
+        stop = threading.Event()
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, sync_file=sync_file)
+        items = []
+
+        for item in functest.follow(from_date=from_date, interval=0.01, lookback=600, stop=stop):
+            items.append(item)
+            if len(items) == 28:
+                stop.set()
+
+        self.assertListEqual([item['data']['_id'] for item in items[:27]], ids)
+        self.assertEqual(items[27]['data']['_id'], 'ffffffffffffffffffffffff')
+        self.assertEqual(items[27]['origin'], FUNCTEST_URL)
+        self.assertEqual(items[27]['category'], 'functest')
+
+        # One request per poll; the third one is the first with the new result
+        polls = httpretty.latest_requests()
+        self.assertEqual(len(polls), 4)
+        self.assertEqual(polls[0].querystring['from'], ['2017-06-01 10:00:00'])
+        self.assertEqual(polls[1].querystring['from'], ['2017-06-01 10:49:27'])
+        self.assertNotIn('to', polls[1].querystring)
+
+        # Ids of the items in the lookback period are saved
+        with open(sync_file, 'r') as fd:
+            state = json.load(fd)
+        self.assertEqual(state['start_date'], '2017-06-01 10:59:27')
+        self.assertIn('ffffffffffffffffffffffff', state['ids'])
+        self.assertEqual(len(state['ids']), 6)
+
+    @httpretty.activate
+    def test_follow_resume(self):
+        """Test whether the server is followed from the items returned by the previous process"""
+
+        new_result = {
+            '_id': 'ffffffffffffffffffffffff',
+            'start_date': '2017-06-01 10:55:00',
+            'stop_date': '2017-06-01 11:05:00',
+            'case_name': 'new_case'
+        }
+
+        setup_http_server_windows(page_size=100)
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        sync_file = os.path.join(dirpath, 'sync.json')
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, sync_file=sync_file)
+        items = functest.follow(from_date=from_date, interval=0.01, lookback=600)
+
+        for _ in range(27):
+            next(items)
+        items.close()
+
+        setup_http_server_windows(page_size=100, new_results=[new_result])
+
+        stop = threading.Event()
+        functest = Functest(FUNCTEST_URL, sync_file=sync_file)
+        items = []
+
+        for item in functest.follow(from_date=from_date, interval=0.01, lookback=600, stop=stop):
+            items.append(item)
+            stop.set()
+
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]['data']['_id'], 'ffffffffffffffffffffffff')
+        self.assertEqual(httpretty.last_request().querystring['from'], ['2017-06-01 10:49:27'])
+
+    @httpretty.activate
+    def test_follow_backoff(self):
+        """Test whether polls with no new items or errors are spaced out"""
+
+        httpretty.register_uri(httpretty.GET,
+                               FUNCTEST_RESULTS_URL,
+                               responses=[
+                                   httpretty.Response(body='', status=404),
+                                   httpretty.Response(body=json.dumps({
+                                       'pagination': {'current_page': 1, 'total_pages': 1},
+                                       'results': []
+                                   }))
+                               ])
+
+        waits = []
+
+        class Stop(threading.Event):
+            def wait(self, timeout=None):
+                waits.append(timeout)
+                if len(waits) == 5:
+                    self.set()
+                return self.is_set()
+
+        functest = Functest(FUNCTEST_URL)
+
+        with self.assertLogs('perceval.backends.opnfv.functest', level='WARNING') as cm:
+            items = [item for item in functest.follow(interval=1, max_interval=6, stop=Stop())]
+
+        self.assertListEqual(items, [])
+        self.assertListEqual(waits, [2, 4, 6, 6, 6])
+        self.assertRegex(cm.output[0], "Error polling")
+        self.assertEqual(len(httpretty.latest_requests()), 5)
+
+    @httpretty.activate
+    def test_follow_archive(self):
+        """Test whether polls are not archived when the backend has an archive"""
+
+        ids = setup_http_server_windows(page_size=100)
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        archive_path = os.path.join(dirpath, 'archive')
+
+        class Stop(threading.Event):
+            def wait(self, timeout=None):
+                if len(httpretty.latest_requests()) == 3:
+                    self.set()
+                return self.is_set()
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        functest = Functest(FUNCTEST_URL, archive=Archive.create(archive_path))
+
+        with self.assertLogs('perceval.backends.opnfv.functest', level='WARNING') as cm:
+            items = [item for item in functest.follow(from_date=from_date, interval=0.01,
+                                                      lookback=600, stop=Stop())]
+
+        self.assertListEqual([item['data']['_id'] for item in items], ids)
+        self.assertRegex(cm.output[0], "not archived while it is followed")
+
+        # The same page was requested by the last two polls
+        polls = httpretty.latest_requests()
+        self.assertEqual(len(polls), 3)
+        self.assertEqual(polls[1].querystring, polls[2].querystring)
+
+        archive = Archive(archive_path)
+        self.assertIsNone(archive.origin)
+        self.assertEqual(archive._db.execute("SELECT COUNT(*) FROM archive").fetchone()[0], 0)
+
+    def test_follow_servers(self):
+        """Test whether an error is raised when several servers are followed"""
+
+        functest = Functest([FUNCTEST_URL, FUNCTEST_MIRROR_URL])
+
+        with self.assertRaisesRegex(BackendError, "only one server can be followed"):
+            _ = [item for item in functest.follow()]
+
+    @httpretty.activate
+    def test_fetch_servers_error(self):
+        """Test whether errors of any server stop the fetch process"""
+
+        setup_http_server()
+        httpretty.register_uri(httpretty.GET,
+                               FUNCTEST_MIRROR_RESULTS_URL,
+                               body='', status=404)
+
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest([FUNCTEST_URL, FUNCTEST_MIRROR_URL])
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+    @httpretty.activate
+    def test_fetch_stats(self):
+        """Test whether the pages and items fetched are recorded"""
+
+        page1 = read_file('data/functest/functest_results_page_1.json', 'rb')
+        page2 = read_file('data/functest/functest_results_page_2.json', 'rb')
+
+        setup_http_server()
+
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, stats=True)
+        items = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.assertEqual(len(items), 27)
+
+        stats = functest.stats
+        self.assertEqual(stats.npages, 2)
+        self.assertEqual(stats.nitems, 27)
+        self.assertEqual(stats.nbytes, len(page1) + len(page2))
+        self.assertEqual(stats.nretries, 0)
+
+        pages = list(stats.pages)
+        self.assertListEqual([page.page for page in pages], [1, 2])
+        self.assertListEqual([page.items for page in pages], [20, 7])
+        self.assertListEqual([page.bytes for page in pages], [len(page1), len(page2)])
+        for page in pages:
+            self.assertGreater(page.latency, 0)
+            self.assertGreaterEqual(page.decode_time, 0)
+
+        summary = stats.summary()
+        self.assertEqual(summary['pages'], 2)
+        self.assertEqual(summary['items'], 27)
+        self.assertAlmostEqual(summary['mean_latency'], stats.request_time / 2)
+
+    @httpretty.activate
+    def test_fetch_stats_workers(self):
+        """Test whether the pages fetched concurrently are recorded"""
+
+        setup_http_server_windows(page_size=2)
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, workers=4, stats=True)
+        items = [item for item in functest.fetch(from_date=from_date, to_date=to_date)]
+
+        stats = functest.stats
+        self.assertEqual(stats.nitems, len(items))
+        self.assertEqual(stats.npages, len(httpretty.httpretty.latest_requests))
+        self.assertEqual(sorted(page.page for page in stats.pages),
+                         list(range(1, stats.npages + 1)))
+        self.assertEqual(sum(page.items for page in stats.pages), len(items))
+
+    @httpretty.activate
+    def test_fetch_stats_file(self):
+        """Test whether a summary is appended to the stats file when the fetch ends"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        stats_file = os.path.join(dirpath, 'stats.jsonl')
+
+        setup_http_server()
+
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        functest = Functest(FUNCTEST_URL, stats_file=stats_file)
+        _ = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+        _ = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        with open(stats_file, 'r') as fd:
+            summaries = [json.loads(line) for line in fd]
+
+        self.assertEqual(len(summaries), 2)
+        self.assertEqual(summaries[0]['pages'], 2)
+        self.assertEqual(summaries[0]['items'], 27)
+        self.assertEqual(summaries[1]['pages'], 4)
+        self.assertEqual(summaries[1]['items'], 54)
+
+    @httpretty.activate
+    def test_fetch_metrics(self):
+        """Test whether the metrics of the modules of the details are added to the items"""
+
+        setup_http_server()
+
+        functest = Functest(FUNCTEST_URL, metrics=True, details='summary')
+        items = [item for item in functest.fetch()]
+
+        self.assertEqual(len(items), 27)
+
+        for item in items:
+            self.assertListEqual(sorted(item['data']['metrics'].keys()),
+                                 ['duration', 'modules', 'success', 'tests'])
+
+        # Modules of rally
+        item = items[1]
+        self.assertEqual(item['data']['_id'], '592ff59378a2ad000ae6af4c')
+
+        metrics = item['data']['metrics']
+        self.assertEqual(len(metrics['modules']), 9)
+        self.assertDictEqual(metrics['modules'][0],
+                             {'module': 'authenticate', 'tests': 12, 'success': 100.0, 'duration': 46.28})
+        self.assertDictEqual(metrics['modules'][8],
+                             {'module': 'requests', 'tests': 2, 'success': 100.0, 'duration': 7.4})
+        self.assertEqual(metrics['tests'], 200)
+        self.assertEqual(metrics['success'], 100.0)
+        self.assertEqual(metrics['duration'], 1194.83)
+
+        # Details of vping
+        item = items[3]
+        self.assertEqual(item['data']['case_name'], 'vping_userdata')
+        expected = {
+            'modules': [],
+            'tests': None,
+            'success': None,
+            'duration': None
+        }
+        self.assertDictEqual(item['data']['metrics'], expected)
+
+        # Metrics are not added by default
+        functest = Functest(FUNCTEST_URL)
+        items = [item for item in functest.fetch()]
+
+        for item in items:
+            self.assertNotIn('metrics', item['data'])
+
+    @httpretty.activate
+    def test_fetch_details_summary(self):
+        """Test whether the details of the items are replaced with their summary"""
+
+        setup_http_server()
+
+        functest = Functest(FUNCTEST_URL, details='summary')
+        items = [item for item in functest.fetch()]
+
+        self.assertEqual(len(items), 27)
+
+        keys = ['duration', 'modules', 'success', 'tests']
+        for item in items:
+            self.assertListEqual(sorted(item['data']['details'].keys()), keys)
+            self.assertNotIn('details_ref', item['data'])
+
+        # Modules of rally
+        item = items[1]
+        self.assertEqual(item['data']['_id'], '592ff59378a2ad000ae6af4c')
+        expected = {
+            'modules': 10,
+            'tests': 200,
+            'success': 100.0,
+            'duration': 1194.83
+        }
+        self.assertDictEqual(item['data']['details'], expected)
+
+        # Details of vping
+        item = items[3]
+        self.assertEqual(item['data']['case_name'], 'vping_userdata')
+        expected = {
+            'modules': 0,
+            'tests': None,
+            'success': None,
+            'duration': 38.0
+        }
+        self.assertDictEqual(item['data']['details'], expected)
+
+    @httpretty.activate
+    def test_fetch_details_external(self):
+        """Test whether the details of the items are moved to a store"""
+
+        setup_http_server()
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+
+        content = read_file('data/functest/functest_results.json')
+        expected = {result['_id']: result['details']
+                    for result in json.loads(content)['results']}
+
+        functest = Functest(FUNCTEST_URL, details='external', details_dir=dirpath)
+        items = [item for item in functest.fetch()]
+
+        self.assertEqual(len(items), 27)
+
+        store = FunctestDetailsStore(dirpath)
+
+        for item in items:
+            item_id = item['data']['_id']
+            self.assertIn('modules', item['data']['details'])
+            self.assertEqual(len(item['data']['details_ref']), 40)
+            self.assertEqual(store.get(item_id), expected[item_id])
+
+    @httpretty.activate
+    def test_fetch_empty(self):
+        """Test whether it works when no data is returned"""
+
+        setup_http_server()
+
+        from_date = datetime.datetime(2020, 1, 1)
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item for item in functest.fetch(from_date=from_date)]
+
+        self.assertEqual(len(items), 0)
+
+        # Check requests
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 1)
+
+    @httpretty.activate
+    def test_search_fields(self):
+        """Test whether the search_fields is properly set"""
+
+        setup_http_server()
+
+        functest = Functest(FUNCTEST_URL)
+        items = [item for item in functest.fetch()]
+
+        item = items[0]
+        self.assertEqual(functest.metadata_id(item['data']), item['search_fields']['item_id'])
+        self.assertEqual(item['data']['project_name'], 'functest')
+        self.assertEqual(item['data']['project_name'], item['search_fields']['project_name'])
+
+    def test_parse_json(self):
+        """Test if it parses a JSON stream"""
+
+        raw_json = read_file('data/functest/functest_results.json')
+
+        data = Functest.parse_json(raw_json)
+        self.assertEqual(len(data), 27)
+
+    def test_metadata_updated_on(self):
+        """Test if it converts the start date of an item to a timestamp"""
+
+        item = {'start_date': '2017-06-01 10:59:27'}
+        self.assertEqual(Functest.metadata_updated_on(item), 1496314767.0)
+
+        item = {'start_date': '2017-06-01T12:59:27+02:00'}
+        self.assertEqual(Functest.metadata_updated_on(item), 1496314767.0)
+
+    def test_parse_number(self):
+        """Test if it parses the numbers of the details"""
+
+        self.assertEqual(Functest.parse_number("     46.28"), 46.28)
+        self.assertEqual(Functest.parse_number("100.00"), 100.0)
+        self.assertEqual(Functest.parse_number(" 12 "), 12)
+        self.assertEqual(Functest.parse_number(12), 12)
+        self.assertEqual(Functest.parse_number(40.7), 40.7)
+        self.assertIsNone(Functest.parse_number(""))
+        self.assertIsNone(Functest.parse_number("PASS"))
+        self.assertIsNone(Functest.parse_number("nan"))
+        self.assertIsNone(Functest.parse_number(True))
+        self.assertIsNone(Functest.parse_number(None))
+        self.assertIsNone(Functest.parse_number([]))
+
+    def test_summarize_details(self):
+        """Test if it summarizes the details of an item"""
+
+        details = [
+            {
+                'module': 'authenticate     ',
+                'details': {'duration': '     46.28', 'success': '100.00', 'nb tests': 12}
+            },
+            {
+                'module': 'glance           ',
+                'details': {'duration': '     91.00', 'success': ' 50.00', 'nb tests': 8}
+            },
+            {
+                'module': 'empty            '
+            }
+        ]
+
+        summary = Functest.summarize_details(details)
+        expected = {
+            'modules': 3,
+            'tests': 20,
+            'success': 80.0,
+            'duration': 137.28
+        }
+        self.assertDictEqual(summary, expected)
+
+        details = {'failures': 2, 'tests': 8, 'errors': ''}
+        summary = Functest.summarize_details(details)
+        expected = {
+            'modules': 0,
+            'tests': 8,
+            'success': 75.0,
+            'duration': None
+        }
+        self.assertDictEqual(summary, expected)
+
+        expected = {
+            'modules': 0,
+            'tests': None,
+            'success': None,
+            'duration': None
+        }
+        self.assertDictEqual(Functest.summarize_details(""), expected)
+        self.assertDictEqual(Functest.summarize_details(None), expected)
+        self.assertDictEqual(Functest.summarize_details([]), expected)
+
+    def test_parse_modules(self):
+        """Test if it parses the modules of the details of an item"""
+
+        details = [
+            {
+                'module': 'authenticate     ',
+                'details': {'duration': '     46.28', 'success': '100.00', 'nb tests': 12}
+            },
+            {
+                'module': 'glance           ',
+                'details': {'duration': 'n/a', 'success': ' 50.00', 'nb tests': '8'}
+            },
+            {
+                'module': 'empty            '
+            },
+            {
+                'summary': {'duration': 137.28, 'nb success': '80.00', 'nb tests': 20}
+            }
+        ]
+
+        modules = Functest.parse_modules(details)
+        expected = [
+            {'module': 'authenticate', 'tests': 12, 'success': 100.0, 'duration': 46.28},
+            {'module': 'glance', 'tests': 8, 'success': 50.0, 'duration': None},
+            {'module': 'empty', 'tests': None, 'success': None, 'duration': None}
+        ]
+        self.assertListEqual(modules, expected)
+
+        self.assertListEqual(Functest.parse_modules({'tests': 8}), [])
+        self.assertListEqual(Functest.parse_modules(None), [])
+
+    def test_parse_json_stream(self):
+        """Test if it parses a JSON stream incrementally"""
+
+        raw_json = read_file('data/functest/functest_results_page_1.json', 'rb')
+        expected = json.loads(raw_json)
+
+        for size in (1, 7, 1024, len(raw_json)):
+            chunks = [raw_json[i:i + size] for i in range(0, len(raw_json), size)]
+
+            data = Functest.parse_json_stream(chunks)
+            self.assertDictEqual(data['pagination'], expected['pagination'])
+            self.assertNotIsInstance(data['results'], list)
+
+            results = [item for item in data['results']]
+            self.assertListEqual(results, expected['results'])
+
+    def test_parse_json_stream_trailing_members(self):
+        """Test if members placed after the results are parsed"""
+
+        raw_json = b'{"results": [{"_id": "1"}, {"_id": "2"}], ' \
+                   b'"pagination": {"current_page": 1, "total_pages": 1}}'
+        chunks = [raw_json[i:i + 5] for i in range(0, len(raw_json), 5)]
+
+        data = Functest.parse_json_stream(chunks)
+        self.assertNotIn('pagination', data)
+
+        results = [item for item in data['results']]
+        self.assertListEqual(results, [{'_id': '1'}, {'_id': '2'}])
+        self.assertDictEqual(data['pagination'], {'current_page': 1, 'total_pages': 1})
+
+    def test_parse_json_stream_empty(self):
+        """Test if it parses streams without results"""
+
+        raw_json = read_file('data/functest/functest_results_empty.json', 'rb')
+
+        data = Functest.parse_json_stream([raw_json])
+        self.assertDictEqual(data['pagination'], {'current_page': 1, 'total_pages': 0})
+        self.assertListEqual([item for item in data['results']], [])
+
+        data = Functest.parse_json_stream([b'{"pagination": {}}'])
+        self.assertListEqual([item for item in data['results']], [])
+
+    def test_parse_json_stream_invalid(self):
+        """Test if it fails parsing invalid streams"""
+
+        data = Functest.parse_json_stream([b'{"results": [{"_id": "1"}, {"_id": '])
+        results = data['results']
+
+        self.assertEqual(next(results), {'_id': '1'})
+
+        with self.assertRaises(ValueError):
+            next(results)
+
+        with self.assertRaises(ValueError):
+            Functest.parse_json_stream([b'["results"]'])
+
+
+class TestFunctestBackendArchive(TestCaseBackendArchive):
+    """Functest backend tests using an archive"""
+
+    def setUp(self):
+        super().setUp()
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive)
+        self.backend_read_archive = Functest(FUNCTEST_URL, archive=self.archive)
+
+    @httpretty.activate
+    @unittest.mock.patch('perceval.backends.opnfv.functest.datetime_utcnow')
+    def test_fetch_from_archive(self, mock_utcnow):
+        """Test whether it fetches data from a repository from archive"""
+
+        mock_utcnow.return_value = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server()
+        self._test_fetch_from_archive()
+
+    @httpretty.activate
+    def test_fetch_from_date_from_archive(self):
+        """Test whether it fetches data from a repository using dates for filtering from archive"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server()
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date)
+
+    @httpretty.activate
+    @unittest.mock.patch('perceval.backends.opnfv.functest.datetime_utcnow')
+    def test_fetch_workers_from_archive(self, mock_utcnow):
+        """Test whether pages fetched concurrently are read from archive"""
+
+        mock_utcnow.return_value = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive, workers=4)
+
+        setup_http_server()
+        self._test_fetch_from_archive()
+
+    @httpretty.activate
+    def test_fetch_checkpoint_from_archive(self):
+        """Test whether a resumed fetch process is read from archive"""
+
+        checkpoint_file = os.path.join(self.test_path, 'checkpoint.json')
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        checkpoint = FunctestCheckpoint(checkpoint_file)
+        checkpoint.save(from_date, to_date, 1, '592fe88e78a2ad000ae6af39')
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive,
+                                              checkpoint_file=checkpoint_file)
+
+        setup_http_server()
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date)
+
+    @httpretty.activate
+    def test_fetch_shard_days_from_archive(self):
+        """Test whether windows of dates are read from archive"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 5, 31)
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive, workers=3)
+
+        setup_http_server_windows()
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date,
+                                      shard_days=1 / 48)
+
+    @httpretty.activate
+    def test_fetch_shard_pages_from_archive(self):
+        """Test whether windows sized by pages are read from archive"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server_windows()
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date,
+                                      shard_pages=1)
+
+    @httpretty.activate
+    def test_fetch_stream_from_archive(self):
+        """Test whether pages decoded incrementally are read from archive"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive, stream=True)
+        self.backend_read_archive = Functest(FUNCTEST_URL, archive=self.archive, stream=True)
+
+        setup_http_server()
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date)
+
+    @httpretty.activate
+    def test_fetch_filters_from_archive(self):
+        """Test whether filtered results are read from archive"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        setup_http_server_windows()
+        self._test_fetch_from_archive(from_date=from_date,
+                                      projects=['functest'],
+                                      pods=['lf-pod2', 'arm-pod3'])
+
+    @httpretty.activate
+    def test_fetch_sync_from_archive(self):
+        """Test whether incremental fetch processes are read from archive"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        sync_file = os.path.join(dirpath, 'sync.json')
+
+        FunctestSyncState(sync_file).save(datetime.datetime(2017, 6, 1, 10, 55, 33),
+                                          {'592ff59378a2ad000ae6af4c'})
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive,
+                                              sync_file=sync_file)
+
+        setup_http_server_windows()
+        self._test_fetch_from_archive(from_date=None)
+
+    @httpretty.activate
+    def test_fetch_cache_from_archive(self):
+        """Test whether pages read from the cache are stored in the archive"""
+
+        cache_file = os.path.join(self.test_path, 'cache.sqlite3')
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server()
+
+        functest = Functest(FUNCTEST_URL, cache_file=cache_file)
+        _ = [item for item in functest.fetch(from_date=None, to_date=to_date)]
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive,
+                                              cache_file=cache_file)
+        self._test_fetch_from_archive(from_date=None, to_date=to_date)
+
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
+    @httpretty.activate
+    def test_fetch_details_summary_from_archive(self):
+        """Test whether the details are summarized when they are read from archive"""
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive, details='summary')
+        self.backend_read_archive = Functest(FUNCTEST_URL, archive=self.archive, details='summary')
+
+        setup_http_server()
+        self._test_fetch_from_archive(from_date=None)
+
+    @httpretty.activate
+    def test_fetch_pages_from_archive(self):
+        """Test whether queries of many pages are read from archive"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server_windows(page_size=2)
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date)
+
+    @httpretty.activate
+    def test_fetch_compressed_from_archive(self):
+        """Test whether pages stored compressed are read from archive"""
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive,
+                                              compress_archive=True)
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server()
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date)
+
+        # Responses are pickled with their body compressed, but
+        # they are unpickled as the original ones
+        rows = self.archive._db.execute("SELECT data FROM archive").fetchall()
+        self.assertEqual(len(rows), 2)
+
+        for row in rows:
+            self.assertIn(b'cgzip\ndecompress\n', row[0])
+
+            response = pickle.loads(row[0])
+            self.assertIsInstance(response, requests.Response)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(b'cgzip', pickle.dumps(response, 0))
+
+            content = json.loads(response.content)
+            self.assertIn(len(content['results']), [20, 7])
+
+    @httpretty.activate
+    def test_fetch_compressed_workers_from_archive(self):
+        """Test whether pages fetched concurrently and stored compressed are read from archive"""
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive, workers=3,
+                                              compress_archive=True)
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server_windows(page_size=2)
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date)
+
+    @httpretty.activate
+    def test_fetch_compressed_stream_from_archive(self):
+        """Test whether pages stored compressed are decoded incrementally from archive"""
+
+        self.backend_write_archive = Functest(FUNCTEST_URL, archive=self.archive,
+                                              compress_archive=True)
+        self.backend_read_archive = Functest(FUNCTEST_URL, archive=self.archive, stream=True)
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server()
+        self._test_fetch_from_archive(from_date=from_date, to_date=to_date)
+
+    @httpretty.activate
+    def test_fetch_missing_page_from_archive(self):
+        """Test whether an exception is thrown when a page is not found in the archive"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        setup_http_server()
+        items = [item for item in self.backend_write_archive.fetch(from_date=from_date,
+                                                                   to_date=to_date)]
+        self.assertEqual(len(items), 27)
+
+        payload = {
+            'from': '2017-06-01 10:00:00',
+            'to': '2017-06-01 11:00:00',
+            'page': 2
+        }
+        hashcode = Archive.make_hashcode(FUNCTEST_RESULTS_URL, payload, None)
+        self.archive._db.execute("DELETE FROM archive WHERE hashcode = ?", (hashcode,))
+        self.archive._db.commit()
+
+        items = self.backend_read_archive.fetch_from_archive()
+
+        with self.assertRaises(ArchiveError):
+            _ = [item for item in items]
+
+    @httpretty.activate
+    def test_fetch_servers_from_archive(self):
+        """Test whether items of several servers are read from archive"""
+
+        urls = [FUNCTEST_URL, FUNCTEST_MIRROR_URL]
+        self.backend_write_archive = Functest(urls, archive=self.archive)
+        self.backend_read_archive = Functest(urls, archive=self.archive)
+
+        setup_http_server()
+        setup_http_server(FUNCTEST_MIRROR_RESULTS_URL)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        items = [item for item in self.backend_write_archive.fetch(from_date=None,
+                                                                   to_date=to_date)]
+        items_archived = [item for item in self.backend_read_archive.fetch_from_archive()]
+
+        self.assertEqual(len(items), 54)
+        self.assertEqual(len(items_archived), 54)
+
+        for item in items + items_archived:
+            del item['timestamp']
+
+        def key(item):
+            return item['uuid']
+
+        self.assertListEqual(sorted(items, key=key), sorted(items_archived, key=key))
+
+    @httpretty.activate
+    def test_fetch_stats_from_archive(self):
+        """Test whether the pages read from archive are recorded with no latency"""
+
+        self.backend_read_archive = Functest(FUNCTEST_URL, archive=self.archive, stats=True)
+
+        setup_http_server()
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        items = [item for item in self.backend_write_archive.fetch(from_date=None,
+                                                                   to_date=to_date)]
+        items_archived = [item for item in self.backend_read_archive.fetch_from_archive()]
+
+        self.assertEqual(len(items_archived), len(items))
+
+        stats = self.backend_read_archive.stats
+        self.assertEqual(stats.npages, 2)
+        self.assertEqual(stats.nitems, 27)
+
+        pages = list(stats.pages)
+        self.assertListEqual([page.items for page in pages], [20, 7])
+        self.assertIsNone(pages[0].latency)
+        self.assertIsNone(pages[1].latency)
+
+    @httpretty.activate
+    def test_fetch_empty_from_archive(self):
+        """Test whether it works when no data is returned from archive"""
+
+        setup_http_server()
+        from_date = datetime.datetime(2020, 1, 1)
+        self._test_fetch_from_archive(from_date=from_date)
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestFunctestBackendAsync(unittest.IsolatedAsyncioTestCase):
+    """Functest backend tests using asyncio"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    async def test_fetch_async(self):
+        """Test whether it fetches data with asyncio"""
+
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        with LocalFunctestServer() as server:
+            functest = Functest(server.url)
+            items = [item async for item in functest.fetch_async(from_date=None,
+                                                                 to_date=to_date)]
+
+        self.assertEqual(len(items), 27)
+
+        item = items[0]
+        self.assertEqual(item['origin'], server.url)
+        self.assertEqual(item['updated_on'], 1496314767.0)
+        self.assertEqual(item['category'], 'functest')
+        self.assertEqual(item['data']['_id'], '592ff62c78a2ad000ae6af4d')
+
+        item = items[26]
+        self.assertEqual(item['updated_on'], 1496311317.0)
+        self.assertEqual(item['data']['_id'], '592fe61678a2ad000ae6af33')
+
+        expected = [
+            {
+                'from': ['1970-01-01 00:00:00'],
+                'to': ['2017-06-01 11:00:00'],
+                'page': ['1']
+            },
+            {
+                'from': ['1970-01-01 00:00:00'],
+                'to': ['2017-06-01 11:00:00'],
+                'page': ['2']
+            }
+        ]
+        self.assertListEqual(server.requests, expected)
+
+    async def test_fetch_async_selection(self):
+        """Test whether items are selected and compacted as in the sync fetch"""
+
+        with LocalFunctestServer() as server:
+            functest = Functest(server.url, details='summary')
+            items = [item async for item in functest.fetch_async(installers=['daisy'])]
+
+        self.assertEqual(len(items), 2)
+        for item in items:
+            self.assertEqual(item['data']['installer'], 'daisy')
+            self.assertIn('modules', item['data']['details'])
+
+        for params in server.requests:
+            self.assertEqual(params['installer'], ['daisy'])
+
+    async def test_fetch_async_retries(self):
+        """Test whether failed requests are retried"""
+
+        with LocalFunctestServer(failures=2) as server:
+            functest = Functest(server.url)
+            items = [item async for item in functest.fetch_async()]
+
+        self.assertEqual(len(items), 27)
+        self.assertEqual(len(server.requests), 4)
+
+    async def test_fetch_async_error(self):
+        """Test whether it fails when the retries are exhausted"""
+
+        with LocalFunctestServer(failures=10) as server:
+            functest = Functest(server.url)
+
+            with self.assertRaises(requests.exceptions.HTTPError):
+                _ = [item async for item in functest.fetch_async()]
+
+        self.assertEqual(len(server.requests), FunctestClient.MAX_RETRIES + 1)
+
+    async def test_fetch_async_max_retries(self):
+        """Test whether the async client uses the retries of the backend"""
+
+        with LocalFunctestServer(failures=10) as server:
+            functest = Functest(server.url, max_retries=1)
+
+            with self.assertRaises(requests.exceptions.HTTPError):
+                _ = [item async for item in functest.fetch_async()]
+
+        self.assertEqual(len(server.requests), 2)
+
+    async def test_fetch_async_timeout(self):
+        """Test whether the async client waits for the server up to the timeout"""
+
+        with LocalFunctestServer(delay=0.5) as server:
+            functest = Functest(server.url, max_retries=0, timeout=0.1)
+
+            with self.assertRaises(asyncio.TimeoutError):
+                _ = [item async for item in functest.fetch_async()]
+
+        self.assertEqual(len(server.requests), 1)
+
+    async def test_fetch_async_from_archive(self):
+        """Test whether the archive written with asyncio is read by the sync backend"""
+
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive'))
+
+        with LocalFunctestServer() as server:
+            functest = Functest(server.url, archive=archive)
+            items = [item async for item in functest.fetch_async()]
+
+        self.assertEqual(len(items), 27)
+
+        functest = Functest(server.url, archive=archive)
+        items_archived = [item for item in functest.fetch_from_archive()]
+
+        self.assertEqual(len(items), len(items_archived))
+
+        for item, archived_item in zip(items, items_archived):
+            del item['timestamp']
+            del archived_item['timestamp']
+            self.assertEqual(item, archived_item)
+
+    async def test_fetch_async_compressed_from_archive(self):
+        """Test whether pages fetched with asyncio are stored compressed"""
+
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive'))
+
+        with LocalFunctestServer() as server:
+            functest = Functest(server.url, archive=archive, compress_archive=True)
+            items = [item async for item in functest.fetch_async()]
+
+        self.assertEqual(len(items), 27)
+
+        data = archive._db.execute("SELECT data FROM archive").fetchone()[0]
+        self.assertIn(b'cgzip\ndecompress\n', data)
+
+        functest = Functest(server.url, archive=archive)
+        items_archived = [item for item in functest.fetch_from_archive()]
+
+        self.assertListEqual([item['uuid'] for item in items_archived],
+                             [item['uuid'] for item in items])
+
+    async def test_fetch_async_invalid_category(self):
+        """Test whether it fails with an invalid category"""
+
+        functest = Functest(FUNCTEST_URL)
+
+        with self.assertRaises(BackendError):
+            _ = [item async for item in functest.fetch_async(category='unknown')]
+
+    async def test_fetch_async_servers(self):
+        """Test whether it fails when there are several URLs"""
+
+        functest = Functest([FUNCTEST_URL, FUNCTEST_MIRROR_URL])
+
+        with self.assertRaises(BackendError):
+            _ = [item async for item in functest.fetch_async()]
+
+
+class TestAsyncFunctestClient(unittest.TestCase):
+    """AsyncFunctestClient tests"""
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_init(self):
+        """Test initialization parameters"""
+
+        client = AsyncFunctestClient(FUNCTEST_URL, limit=5, max_retries=1, timeout=10)
+        self.assertEqual(client.base_url, FUNCTEST_URL)
+        self.assertIsNone(client.archive)
+        self.assertTrue(client.ssl_verify)
+        self.assertEqual(client.limit, 5)
+        self.assertEqual(client.max_retries, 1)
+        self.assertEqual(client.timeout, 10)
+        self.assertIsNone(client.session)
+
+    def test_init_no_aiohttp(self):
+        """Test whether it fails when aiohttp is not installed"""
+
+        with unittest.mock.patch('perceval.backends.opnfv.functest.aiohttp', None):
+            with self.assertRaises(BackendError):
+                _ = AsyncFunctestClient(FUNCTEST_URL)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    def test_backoff(self):
+        """Test the time to wait between retries"""
+
+        client = AsyncFunctestClient(FUNCTEST_URL, backoff_factor=0.5)
+        self.assertEqual(client._backoff(1), 0.5)
+        self.assertEqual(client._backoff(2), 1)
+        self.assertEqual(client._backoff(3), 2)
+        self.assertEqual(client._backoff(3, '10'), 10)
+        self.assertEqual(client._backoff(3, 'Wed, 21 Oct 2015 07:28:00 GMT'), 2)
+
+
+class TestFunctestRateLimiter(unittest.TestCase):
+    """FunctestRateLimiter tests"""
+
+    def test_init(self):
+        """Test initialization parameters"""
+
+        limiter = FunctestRateLimiter()
+        self.assertEqual(limiter.max_concurrency, 1)
+        self.assertEqual(limiter.max_retries, FunctestClient.MAX_RETRIES)
+        self.assertEqual(limiter.max_backoff, FunctestRateLimiter.DEFAULT_MAX_BACKOFF)
+        self.assertEqual(limiter.latency_factor, FunctestRateLimiter.DEFAULT_LATENCY_FACTOR)
+        self.assertEqual(limiter.concurrency, 1)
+        self.assertEqual(limiter.delay, 0)
+        self.assertIsNone(limiter.latency)
+
+        limiter = FunctestRateLimiter(max_concurrency=8, max_retries=5,
+                                      max_backoff=10, latency_factor=2)
+        self.assertEqual(limiter.max_concurrency, 8)
+        self.assertEqual(limiter.max_retries, 5)
+        self.assertEqual(limiter.max_backoff, 10)
+        self.assertEqual(limiter.latency_factor, 2)
+        self.assertEqual(limiter.concurrency, 8)
+
+    @unittest.mock.patch.object(FunctestRateLimiter, 'BASE_DELAY', 0.01)
+    def test_errors(self):
+        """Test whether errors reduce the rate and successes restore it"""
+
+        limiter = FunctestRateLimiter(max_concurrency=8)
+
+        for _ in range(4):
+            limiter.acquire()
+
+        # Requests failing at once reduce the rate only once
+        for _ in range(4):
+            limiter.release(error=True)
+
+        self.assertEqual(limiter.concurrency, 4)
+        self.assertEqual(limiter.delay, 0.01)
+        self.assertEqual(limiter.nerrors, 4)
+        self.assertGreater(limiter.error_rate, 0)
+
+        time.sleep(0.02)
+
+        limiter.acquire()
+        limiter.release(error=True)
+        self.assertEqual(limiter.concurrency, 2)
+        self.assertEqual(limiter.delay, 0.02)
+
+        # The rate increases after as many successes as the concurrency
+        for _ in range(2):
+            limiter.acquire()
+            limiter.release(latency=0.01)
+
+        self.assertEqual(limiter.concurrency, 3)
+        self.assertEqual(limiter.delay, 0.01)
+        self.assertEqual(limiter.nrequests, 7)
+
+        for _ in range(3):
+            limiter.acquire()
+            limiter.release(latency=0.01)
+
+        self.assertEqual(limiter.concurrency, 4)
+        self.assertEqual(limiter.delay, 0.005)
+
+    def test_slow_responses(self):
+        """Test whether slow responses reduce the concurrency"""
+
+        limiter = FunctestRateLimiter(max_concurrency=4, latency_factor=2)
+
+        limiter.acquire()
+        limiter.release(latency=0.001)
+        self.assertEqual(limiter.concurrency, 4)
+
+        limiter.acquire()
+        limiter.release(latency=1)
+        self.assertEqual(limiter.concurrency, 3)
+        self.assertEqual(limiter.delay, 0)
+
+        # Only once per latency period
+        limiter.acquire()
+        limiter.release(latency=1)
+        self.assertEqual(limiter.concurrency, 3)
+
+    def test_retry_after(self):
+        """Test whether requests wait for the time set by Retry-After"""
+
+        limiter = FunctestRateLimiter(max_concurrency=2)
+
+        limiter.acquire()
+        limiter.release(retry_after='0.2')
+
+        start = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_concurrency(self):
+        """Test whether requests wait while the concurrency is reached"""
+
+        limiter = FunctestRateLimiter(max_concurrency=1)
+        limiter.acquire()
+
+        acquired = threading.Event()
+
+        def acquire():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+
+        self.assertFalse(acquired.wait(0.1))
+
+        limiter.release(latency=0.01)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+    def test_parse_retry_after(self):
+        """Test whether Retry-After values are parsed"""
+
+        self.assertEqual(FunctestRateLimiter.parse_retry_after('2'), 2)
+        self.assertEqual(FunctestRateLimiter.parse_retry_after('0.5'), 0.5)
+        self.assertEqual(FunctestRateLimiter.parse_retry_after('-1'), 0)
+        self.assertEqual(FunctestRateLimiter.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        self.assertIsNone(FunctestRateLimiter.parse_retry_after('soon'))
+        self.assertIsNone(FunctestRateLimiter.parse_retry_after(None))
+
+    def test_is_error(self):
+        """Test which status codes are errors"""
+
+        self.assertTrue(FunctestRateLimiter.is_error(429))
+        self.assertTrue(FunctestRateLimiter.is_error(500))
+        self.assertTrue(FunctestRateLimiter.is_error(503))
+        self.assertFalse(FunctestRateLimiter.is_error(200))
+        self.assertFalse(FunctestRateLimiter.is_error(404))
+
+
+class TestFunctestStats(unittest.TestCase):
+    """FunctestStats tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_record(self):
+        """Test whether pages and items are recorded"""
+
+        stats = FunctestStats()
+        stats.record_page(1, 0.5, 1000, 0.1, 20, 0)
+        stats.record_page(2, 1.5, None, 0.2, None, 2)
+        stats.record_page(3, None, 500, 0.1, 5, 0)
+        stats.record_item(0.25)
+        stats.record_item(0.25)
+
+        self.assertEqual(len(stats.pages), 3)
+        self.assertEqual(stats.pages[1], FunctestStats.PageStats(2, 1.5, None, 0.2, None, 2))
+
+        summary = stats.summary()
+        self.assertEqual(summary['pages'], 3)
+        self.assertEqual(summary['items'], 2)
+        self.assertEqual(summary['bytes'], 1500)
+        self.assertEqual(summary['retries'], 2)
+        self.assertEqual(summary['request_time'], 2.0)
+        self.assertEqual(summary['mean_latency'], 1.0)
+        self.assertEqual(summary['max_latency'], 1.5)
+        self.assertAlmostEqual(summary['decode_time'], 0.4)
+        self.assertEqual(summary['consumer_time'], 0.5)
+        self.assertGreater(summary['elapsed'], 0)
+
+    def test_max_pages(self):
+        """Test whether only the last pages are kept"""
+
+        stats = FunctestStats()
+
+        with unittest.mock.patch.object(stats, 'pages', collections.deque(maxlen=5)):
+            for page in range(1, 11):
+                stats.record_page(page, 0.1, 100, 0.01, 10, 0)
+
+            self.assertListEqual([page.page for page in stats.pages], [6, 7, 8, 9, 10])
+
+        self.assertEqual(stats.npages, 10)
+        self.assertEqual(stats.nbytes, 1000)
+
+    def test_emit_interval(self):
+        """Test whether summaries are emitted periodically"""
+
+        stats_file = os.path.join(self.test_path, 'stats.jsonl')
+        stats = FunctestStats(interval=0.05, path=stats_file)
+
+        with self.assertLogs('perceval.backends.opnfv.functest', level='INFO') as logs:
+            stats.record_page(1, 0.1, 100, 0.01, 10, 0)
+            time.sleep(0.1)
+            stats.record_page(2, 0.1, 100, 0.01, 10, 0)
+            stats.record_page(3, 0.1, 100, 0.01, 10, 0)
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('2 pages', logs.output[0])
+
+        with open(stats_file, 'r') as fd:
+            summaries = [json.loads(line) for line in fd]
+
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0]['pages'], 2)
+
+    def test_finish(self):
+        """Test whether a summary is emitted at the end only when summaries are enabled"""
+
+        stats_file = os.path.join(self.test_path, 'stats.jsonl')
+
+        stats = FunctestStats()
+        with unittest.mock.patch.object(stats, 'emit') as mock_emit:
+            stats.finish()
+        mock_emit.assert_not_called()
+
+        stats = FunctestStats(path=stats_file)
+        stats.record_page(1, 0.1, 100, 0.01, 10, 0)
+        stats.finish()
+
+        with open(stats_file, 'r') as fd:
+            summaries = [json.loads(line) for line in fd]
+
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0]['pages'], 1)
+
+
+class TestFunctestIdSet(unittest.TestCase):
+    """FunctestIdSet unit tests"""
+
+    def test_ids(self):
+        """Test whether object ids and other ids are stored"""
+
+        ids = FunctestIdSet()
+        ids.add('5930ead74ad4bf000a3d9e8d')
+        ids.add('not-an-object-id')
+        ids.add('zzzzzzzzzzzzzzzzzzzzzzzz')
+
+        self.assertEqual(len(ids), 3)
+        self.assertIn('5930ead74ad4bf000a3d9e8d', ids)
+        self.assertIn('5930EAD74AD4BF000A3D9E8D', ids)
+        self.assertIn('not-an-object-id', ids)
+        self.assertIn('zzzzzzzzzzzzzzzzzzzzzzzz', ids)
+        self.assertNotIn('5930ead74ad4bf000a3d9e8e', ids)
+        self.assertNotIn('other-id', ids)
+
+
+class TestFunctestBloomFilter(unittest.TestCase):
+    """FunctestBloomFilter unit tests"""
+
+    def test_initialization(self):
+        """Test whether the filter is sized for its capacity and error rate"""
+
+        bloom = FunctestBloomFilter(1000)
+        self.assertEqual(bloom.capacity, 1000)
+        self.assertEqual(bloom.error_rate, 0.001)
+        self.assertEqual(bloom.nbits, 14378)
+        self.assertEqual(bloom.nhashes, 10)
+        self.assertEqual(len(bloom.bits), 1798)
+        self.assertEqual(len(bloom), 0)
+
+        bloom = FunctestBloomFilter(1000, error_rate=0.01)
+        self.assertEqual(bloom.nbits, 9586)
+        self.assertEqual(bloom.nhashes, 7)
+
+    def test_ids(self):
+        """Test whether added ids are found and the rate of false positives is bounded"""
+
+        bloom = FunctestBloomFilter(1000, error_rate=0.01)
+
+        for i in range(1000):
+            bloom.add('%024x' % i)
+        self.assertEqual(len(bloom), 1000)
+
+        for i in range(1000):
+            self.assertIn('%024x' % i, bloom)
+
+        false_positives = sum(1 for i in range(1000, 11000) if '%024x' % i in bloom)
+        self.assertLess(false_positives, 300)
+
+
+class TestFunctestConsistencyCheck(unittest.TestCase):
+    """FunctestConsistencyCheck unit tests"""
+
+    def test_check_pages(self):
+        """Test whether duplicated items are dropped and the skipped ones recovered"""
+
+        def build_page(page, total_pages, results):
+            return {
+                'pagination': {'current_page': page, 'total_pages': total_pages},
+                'results': [{'_id': r, 'start_date': '2017-06-01 10:%s:00' % r} for r in results]
+            }
+
+        recovered = []
+
+        def recover(from_date, to_date):
+            recovered.append((from_date, to_date))
+            return [{'_id': '50'}, {'_id': '49'}]
+
+        pages = [
+            build_page(1, 3, ['55', '54', '53', '52']),
+            build_page(2, 3, ['52', '51', '50', '49']),
+            build_page(3, 3, ['48'])
+        ]
+
+        check = FunctestConsistencyCheck()
+        items = [item['_id'] for page in check.check_pages(pages, recover)
+                 for item in page['results']]
+
+        self.assertListEqual(items, ['55', '54', '53', '52', '51', '50', '49', '48'])
+        self.assertEqual(check.nduplicates, 1)
+        self.assertEqual(check.nshifts, 1)
+        self.assertEqual(check.nrecovered, 0)
+        self.assertListEqual(recovered, [(parse_start_date('2017-06-01 10:52:00'),
+                                          parse_start_date('2017-06-01 10:52:00'))])
+
+
+class TestFunctestCheckpoint(unittest.TestCase):
+    """FunctestCheckpoint tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.checkpoint_file = os.path.join(self.test_path, 'checkpoint.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_save_load(self):
+        """Test whether the progress is saved and loaded"""
+
+        checkpoint = FunctestCheckpoint(self.checkpoint_file)
+        self.assertIsNone(checkpoint.load())
+
+        checkpoint.save(datetime.datetime(2017, 6, 1, 10, 0, 0),
+                        datetime.datetime(2017, 6, 1, 11, 0, 0),
+                        3, '592fe88e78a2ad000ae6af39')
+
+        expected = {
+            'from_date': '2017-06-01 10:00:00',
+            'to_date': '2017-06-01 11:00:00',
+            'filters': {},
+            'page': 3,
+            'last_id': '592fe88e78a2ad000ae6af39'
+        }
+        self.assertDictEqual(checkpoint.load(), expected)
+        self.assertFalse(os.path.exists(self.checkpoint_file + '.tmp'))
+
+        checkpoint.remove()
+        self.assertIsNone(checkpoint.load())
+
+        # Removing a checkpoint twice does not fail
+        checkpoint.remove()
+
+    def test_resume(self):
+        """Test whether it returns the arguments to resume a process"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        checkpoint = FunctestCheckpoint(self.checkpoint_file)
+        self.assertDictEqual(checkpoint.resume(from_date, to_date), {})
+
+        checkpoint.save(from_date, to_date, 3, '592fe88e78a2ad000ae6af39')
+
+        args = checkpoint.resume(from_date, to_date)
+        self.assertDictEqual(args, {'page': 4, 'last_id': '592fe88e78a2ad000ae6af39'})
+
+        args = checkpoint.resume(from_date)
+        self.assertEqual(args['page'], 4)
+        self.assertEqual(args['last_id'], '592fe88e78a2ad000ae6af39')
+        self.assertEqual(args['to_date'],
+                         datetime.datetime(2017, 6, 1, 11, 0, 0, tzinfo=dateutil.tz.tzutc()))
+
+        args = checkpoint.resume(datetime.datetime(2017, 6, 1, 9, 0, 0), to_date)
+        self.assertDictEqual(args, {})
+
+        args = checkpoint.resume(from_date, datetime.datetime(2017, 6, 1, 12, 0, 0))
+        self.assertDictEqual(args, {})
+
+        args = checkpoint.resume(from_date, to_date, {'pod': 'lf-pod2'})
+        self.assertDictEqual(args, {})
+
+    def test_resume_filters(self):
+        """Test whether a process is only resumed with the same filters"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+
+        checkpoint = FunctestCheckpoint(self.checkpoint_file)
+        checkpoint.save(from_date, to_date, 1, '592fe88e78a2ad000ae6af39',
+                        filters={'pod': 'lf-pod2'})
+
+        args = checkpoint.resume(from_date, to_date, {'pod': 'lf-pod2'})
+        self.assertDictEqual(args, {'page': 2, 'last_id': '592fe88e78a2ad000ae6af39'})
+
+        args = checkpoint.resume(from_date, to_date)
+        self.assertDictEqual(args, {})
+
+        args = checkpoint.resume(from_date, to_date, {'pod': 'arm-pod3'})
+        self.assertDictEqual(args, {})
+
+
+class TestParseStartDate(unittest.TestCase):
+    """parse_start_date tests"""
+
+    def test_parse(self):
+        """Test if it parses dates in the format of the API"""
+
+        expected = datetime.datetime(2017, 6, 1, 10, 59, 27, tzinfo=dateutil.tz.tzutc())
+
+        date = parse_start_date('2017-06-01 10:59:27')
+        self.assertEqual(date, expected)
+        self.assertEqual(date.utcoffset(), datetime.timedelta(0))
+
+    def test_fallback(self):
+        """Test if other formats are parsed by the general parser"""
+
+        date = parse_start_date('2017-06-01 10:59:27.500000')
+        expected = datetime.datetime(2017, 6, 1, 10, 59, 27, 500000,
+                                     tzinfo=dateutil.tz.tzutc())
+        self.assertEqual(date, expected)
+
+        date = parse_start_date('2017-06-01T12:59:27+02:00')
+        expected = datetime.datetime(2017, 6, 1, 10, 59, 27, tzinfo=dateutil.tz.tzutc())
+        self.assertEqual(date, expected)
+
+        # Fixed format but not a valid date
+        with self.assertRaises(InvalidDateError):
+            parse_start_date('2017-13-01 10:59:27')
+
+    def test_cache(self):
+        """Test if conversions are cached"""
+
+        parse_start_date.cache_clear()
+
+        parse_start_date('2017-06-01 10:59:27')
+        parse_start_date('2017-06-01 10:59:27')
+        parse_start_date('2017-06-01 10:59:28')
+
+        info = parse_start_date.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 2)
+
+
+class TestParseDate(unittest.TestCase):
+    """parse_date tests"""
+
+    def test_parse(self):
+        """Test if it parses valid dates"""
+
+        expected = datetime.datetime(2017, 6, 1, 10, 59, 27, tzinfo=dateutil.tz.tzutc())
+        self.assertEqual(parse_date('2017-06-01 10:59:27'), expected)
+        self.assertEqual(parse_date('2017-06-01T12:59:27+02:00'), expected)
+
+    def test_invalid_dates(self):
+        """Test if missing, non-string or invalid dates are converted to None"""
+
+        self.assertIsNone(parse_date(None))
+        self.assertIsNone(parse_date(''))
+        self.assertIsNone(parse_date(1496314767))
+        self.assertIsNone(parse_date('2017-13-01 10:59:27'))
+        self.assertIsNone(parse_date('not a date'))
+
+
+class TestFunctestResponseCache(unittest.TestCase):
+    """FunctestResponseCache tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.cache_file = os.path.join(self.test_path, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test initialization parameters"""
+
+        cache = FunctestResponseCache(self.cache_file)
+        self.assertEqual(cache.path, self.cache_file)
+        self.assertEqual(cache.max_size, FunctestResponseCache.DEFAULT_MAX_SIZE * 1024 * 1024)
+        self.assertEqual(cache.ttl, FunctestResponseCache.DEFAULT_TTL)
+        self.assertEqual(cache.size(), 0)
+
+        cache = FunctestResponseCache(self.cache_file, max_size=0.5, ttl=0)
+        self.assertEqual(cache.max_size, 512 * 1024)
+        self.assertEqual(cache.ttl, 0)
+
+    def test_make_key(self):
+        """Test whether keys are built with the query normalized"""
+
+        key1 = FunctestResponseCache.make_key(FUNCTEST_RESULTS_URL + '?page=2&from=2017-06-01+10%3A00%3A00')
+        key2 = FunctestResponseCache.make_key(FUNCTEST_RESULTS_URL + '?from=2017-06-01%2010:00:00&page=2')
+        key3 = FunctestResponseCache.make_key(FUNCTEST_RESULTS_URL + '?from=2017-06-01%2010:00:00&page=3')
+
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_put_get(self):
+        """Test whether pages are stored and retrieved"""
+
+        cache = FunctestResponseCache(self.cache_file)
+        self.assertIsNone(cache.get('page1'))
+
+        cache.put('page1', b'{"results": []}', content_type='application/json',
+                  etag='"abc"', last_modified='Thu, 01 Jun 2017 11:00:00 GMT')
+
+        page = cache.get('page1')
+        self.assertEqual(page.body, b'{"results": []}')
+        self.assertEqual(page.content_type, 'application/json')
+        self.assertEqual(page.etag, '"abc"')
+        self.assertEqual(page.last_modified, 'Thu, 01 Jun 2017 11:00:00 GMT')
+        self.assertTrue(cache.is_fresh(page))
+        self.assertEqual(cache.size(), 15)
+
+        # Pages are kept between instances
+        cache = FunctestResponseCache(self.cache_file)
+        self.assertEqual(cache.get('page1').body, b'{"results": []}')
+
+    def test_ttl(self):
+        """Test whether pages are stale after their TTL until they are validated"""
+
+        cache = FunctestResponseCache(self.cache_file, ttl=0.1)
+        cache.put('page1', b'{}', etag='"abc"')
+
+        self.assertTrue(cache.is_fresh(cache.get('page1')))
+
+        time.sleep(0.15)
+        self.assertFalse(cache.is_fresh(cache.get('page1')))
+
+        cache.validate('page1')
+        self.assertTrue(cache.is_fresh(cache.get('page1')))
+
+    def test_eviction(self):
+        """Test whether the least recently used pages are removed when the cache is full"""
+
+        # Room for 4 pages of 256 KB
+        cache = FunctestResponseCache(self.cache_file, max_size=1)
+        body = b'x' * 256 * 1024
+
+        for key in ('page1', 'page2', 'page3', 'page4'):
+            cache.put(key, body)
+            time.sleep(0.01)
+
+        cache.get('page1')
+        cache.put('page5', body)
+
+        self.assertIsNotNone(cache.get('page1'))
+        self.assertIsNone(cache.get('page2'))
+        self.assertIsNotNone(cache.get('page3'))
+        self.assertIsNotNone(cache.get('page5'))
+        self.assertEqual(cache.size(), 4 * 256 * 1024)
+
+        # Pages larger than the cache are not stored
+        cache.put('page6', b'x' * 2 * 1024 * 1024)
+        self.assertIsNone(cache.get('page6'))
+
+
+class TestFunctestSyncState(unittest.TestCase):
+    """FunctestSyncState tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.sync_file = os.path.join(self.test_path, 'sync.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_save_load(self):
+        """Test whether the state is saved and loaded"""
+
+        state = FunctestSyncState(self.sync_file)
+        self.assertIsNone(state.load())
+        self.assertIsNone(state.high_water())
+
+        state.save(datetime.datetime(2017, 6, 1, 10, 59, 27),
+                   {'592ff62c78a2ad000ae6af4d', '592ff59378a2ad000ae6af4c'},
+                   {'pod_name': {'lf-pod2', 'arm-pod3'}})
+
+        expected = {
+            'start_date': '2017-06-01 10:59:27',
+            'ids': ['592ff59378a2ad000ae6af4c', '592ff62c78a2ad000ae6af4d'],
+            'selection': {'pod_name': ['arm-pod3', 'lf-pod2']}
+        }
+        self.assertDictEqual(state.load(), expected)
+        self.assertFalse(os.path.exists(self.sync_file + '.tmp'))
+
+    def test_high_water(self):
+        """Test whether the newest items are only returned for the same selection"""
+
+        state = FunctestSyncState(self.sync_file)
+        state.save(datetime.datetime(2017, 6, 1, 10, 59, 27),
+                   {'592ff62c78a2ad000ae6af4d'},
+                   {'pod_name': {'lf-pod2'}})
+
+        start_date, ids = state.high_water({'pod_name': {'lf-pod2'}})
+        self.assertEqual(start_date,
+                         datetime.datetime(2017, 6, 1, 10, 59, 27, tzinfo=dateutil.tz.tzutc()))
+        self.assertSetEqual(ids, {'592ff62c78a2ad000ae6af4d'})
+
+        self.assertIsNone(state.high_water())
+        self.assertIsNone(state.high_water({'pod_name': {'arm-pod3'}}))
+
+
+class TestFunctestDetailsStore(unittest.TestCase):
+    """FunctestDetailsStore tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval-opnfv_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_put_get(self):
+        """Test whether details are stored and retrieved by the id of their items"""
+
+        details = {'timestart': 1496314264.745014, 'duration': 38.0, 'status': 'PASS'}
+
+        store = FunctestDetailsStore(self.test_path)
+        self.assertIsNone(store.get('592ff59378a2ad000ae6af4c'))
+
+        digest = store.put('592ff59378a2ad000ae6af4c', details)
+        self.assertEqual(len(digest), 40)
+        self.assertDictEqual(store.get('592ff59378a2ad000ae6af4c'), details)
+
+    def test_put_same_details(self):
+        """Test whether the same details are stored only once"""
+
+        details = {'failures': [], 'errors': []}
+
+        store = FunctestDetailsStore(self.test_path)
+        digest1 = store.put('592ff59378a2ad000ae6af4c', details)
+        digest2 = store.put('592ff01778a2ad000ae6af44', {'errors': [], 'failures': []})
+        digest3 = store.put('592fe88e78a2ad000ae6af39', {'errors': ['timeout'], 'failures': []})
+
+        self.assertEqual(digest1, digest2)
+        self.assertNotEqual(digest1, digest3)
+
+        objects = []
+        for _, _, files in os.walk(os.path.join(self.test_path, 'objects')):
+            objects.extend(files)
+        self.assertEqual(len(objects), 2)
+
+        self.assertDictEqual(store.get('592ff01778a2ad000ae6af44'), details)
+
+    def test_put_unsafe_ids(self):
+        """Test whether ids that are not object ids are not used as file names"""
+
+        details = {'duration': 38.0}
+        ids_path = os.path.join(self.test_path, 'ids')
+
+        store = FunctestDetailsStore(self.test_path)
+
+        for item_id in ['../../escaped', '/tmp/escaped', '..', '0x2ff59378a2ad000ae6af4c']:
+            store.put(item_id, details)
+            self.assertDictEqual(store.get(item_id), details)
+
+        self.assertFalse(os.path.exists(os.path.join(self.test_path, '..', 'escaped')))
+
+        names = os.listdir(ids_path)
+        self.assertEqual(len(names), 4)
+        for name in names:
+            self.assertEqual(len(name), 40)
+
+        store.put('592ff59378a2ad000ae6af4c', details)
+        self.assertIn('592ff59378a2ad000ae6af4c', os.listdir(ids_path))
+
+
+class TestFunctestClient(unittest.TestCase):
+    """Functest API client tests.
+
+    These tests do not check the body of the response, only if the call
+    was well formed and if a response was obtained. Due to this, take
+    into account that the body returned on each request might not
+    match with the parameters from the request.
+    """
+    def test_init(self):
+        """Test initialization"""
+
+        functest = FunctestClient(FUNCTEST_URL)
+        self.assertEqual(functest.base_url, FUNCTEST_URL)
+        self.assertEqual(functest.max_retries, 3)
+        self.assertIsNone(functest.archive)
+        self.assertFalse(functest.from_archive)
+        self.assertTrue(functest.ssl_verify)
+
+        self.assertEqual(functest.workers, 1)
+        self.assertFalse(functest.stream)
+        self.assertEqual(functest.pool_size, 10)
+        self.assertTrue(functest.keep_alive)
+        self.assertTrue(functest.compress)
+
+        functest = FunctestClient(FUNCTEST_URL, ssl_verify=False)
+        self.assertEqual(functest.base_url, FUNCTEST_URL)
+        self.assertEqual(functest.max_retries, 3)
+        self.assertIsNone(functest.archive)
+        self.assertFalse(functest.from_archive)
+        self.assertFalse(functest.ssl_verify)
+
+        functest = FunctestClient(FUNCTEST_URL, workers=4, stream=True)
+        self.assertEqual(functest.workers, 4)
+        self.assertTrue(functest.stream)
+
+        functest = FunctestClient(FUNCTEST_URL, workers=16)
+        self.assertEqual(functest.pool_size, 16)
+
+        functest = FunctestClient(FUNCTEST_URL, workers=16, pool_size=4,
+                                  keep_alive=False, compress=False)
+        self.assertEqual(functest.pool_size, 4)
+        self.assertFalse(functest.keep_alive)
+        self.assertFalse(functest.compress)
+
+    def test_connection_pool(self):
+        """Test whether the pool of connections is sized and configured"""
+
+        client = FunctestClient(FUNCTEST_URL, workers=16)
+
+        for prefix in ('http://', 'https://'):
+            adapter = client.session.get_adapter(prefix)
+            self.assertEqual(adapter._pool_maxsize, 16)
+            self.assertEqual(adapter.max_retries.total, FunctestClient.MAX_RETRIES)
+
+        self.assertEqual(client.session.headers['Accept-Encoding'], 'gzip, deflate')
+        self.assertEqual(client.session.headers['Connection'], 'keep-alive')
+
+        client = FunctestClient(FUNCTEST_URL, keep_alive=False, compress=False)
+        self.assertEqual(client.session.headers['Accept-Encoding'], 'identity')
+        self.assertEqual(client.session.headers['Connection'], 'close')
+
+        client = FunctestClient(FUNCTEST_URL, max_retries=7)
+        self.assertIsNone(client.limiter)
+
+        for prefix in ('http://', 'https://'):
+            adapter = client.session.get_adapter(prefix)
+            self.assertEqual(adapter.max_retries.total, 7)
+
+    def test_timeout(self):
+        """Test whether requests wait for the server up to the timeout"""
+
+        client = FunctestClient(FUNCTEST_URL)
+        self.assertEqual(client.timeout, FunctestClient.TIMEOUT)
+
+        for prefix in ('http://', 'https://'):
+            adapter = client.session.get_adapter(prefix)
+            self.assertEqual(adapter.timeout, FunctestClient.TIMEOUT)
+
+        client = FunctestClient(FUNCTEST_URL, timeout=5, adaptive_rate=True)
+        self.assertEqual(client.timeout, 5)
+
+        for prefix in ('http://', 'https://'):
+            adapter = client.session.get_adapter(prefix)
+            self.assertEqual(adapter.timeout, 5)
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        with LocalFunctestServer(delay=0.5) as server:
+            client = FunctestClient(server.url, max_retries=0, timeout=0.1)
+
+            with self.assertRaises(requests.exceptions.RequestException):
+                _ = [page for page in client.results(from_date=from_date)]
+
+            client = FunctestClient(server.url, timeout=5)
+            pages = [page for page in client.results(from_date=from_date)]
+            self.assertEqual(len(pages), 2)
+
+    def test_adaptive_rate(self):
+        """Test whether requests go through the rate limiter"""
+
+        client = FunctestClient(FUNCTEST_URL, workers=4, adaptive_rate=True,
+                                max_retries=5, max_backoff=10, latency_factor=2)
+
+        self.assertIsInstance(client.limiter, FunctestRateLimiter)
+        self.assertEqual(client.limiter.max_concurrency, 4)
+        self.assertEqual(client.limiter.max_retries, 5)
+        self.assertEqual(client.limiter.max_backoff, 10)
+        self.assertEqual(client.limiter.latency_factor, 2)
+
+        for prefix in ('http://', 'https://'):
+            adapter = client.session.get_adapter(prefix)
+            self.assertIs(adapter.limiter, client.limiter)
+            self.assertEqual(adapter.max_retries.total, 0)
+
+    @unittest.mock.patch.object(FunctestRateLimiter, 'BASE_DELAY', 0.01)
+    def test_adaptive_rate_retries(self):
+        """Test whether the rate limiter retries failed requests"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        with LocalFunctestServer(failures=3, status=429) as server:
+            client = FunctestClient(server.url, workers=2, adaptive_rate=True)
+            pages = [page for page in client.results(from_date=from_date)]
+
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(len(server.requests), 5)
+        self.assertEqual(client.limiter.nerrors, 3)
+        self.assertEqual(client.limiter.nrequests, 5)
+
+    def test_stats_retries(self):
+        """Test whether the retries of the requests are recorded"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        with LocalFunctestServer(failures=2, status=503) as server:
+            client = FunctestClient(server.url, stats=FunctestStats())
+            _ = [page for page in client.results(from_date=from_date)]
+
+        self.assertListEqual([page.retries for page in client.stats.pages], [2, 0])
+
+        with LocalFunctestServer(failures=2, status=429) as server:
+            client = FunctestClient(server.url, adaptive_rate=True, stats=FunctestStats())
+            _ = [page for page in client.results(from_date=from_date)]
+
+        self.assertListEqual([page.retries for page in client.stats.pages], [2, 0])
+
+    @unittest.mock.patch.object(FunctestRateLimiter, 'BASE_DELAY', 0.01)
+    def test_adaptive_rate_retries_exhausted(self):
+        """Test whether it fails when the rate limiter has no retries left"""
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        with LocalFunctestServer(failures=10, status=500) as server:
+            client = FunctestClient(server.url, adaptive_rate=True, max_retries=1)
+
+            with self.assertRaises(requests.exceptions.HTTPError):
+                _ = [page for page in client.results(from_date=from_date)]
+
+        self.assertEqual(len(server.requests), 2)
+
+    @httpretty.activate
+    def test_repository(self):
+        """Test repository API call"""
+
+        # Set up a mock HTTP server
+        setup_http_server()
+
+        # Call API
+        client = FunctestClient(FUNCTEST_URL)
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        results = [r for r in client.results(from_date=from_date)]
+
+        req = httpretty.last_request()
+
+        expected = {
+            'from': ['2017-06-01 10:00:00'],
+            'page': ['2']
+        }
+        self.assertEqual(req.method, 'GET')
+        self.assertRegex(req.path, '/api/v1/results')
+        self.assertDictEqual(req.querystring, expected)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['pagination']['current_page'], 1)
+        self.assertEqual(len(results[0]['results']), 20)
+        self.assertEqual(results[1]['pagination']['current_page'], 2)
+        self.assertEqual(len(results[1]['results']), 7)
+
+        # Test using to_date value
+        to_date = datetime.datetime(2017, 6, 1, 11, 0, 0)
+        results = [r for r in client.results(from_date=from_date, to_date=to_date)]
+
+        req = httpretty.last_request()
+
+        expected = {
+            'from': ['2017-06-01 10:00:00'],
+            'to': ['2017-06-01 11:00:00'],
+            'page': ['2']
+        }
+        self.assertEqual(req.method, 'GET')
+        self.assertRegex(req.path, '/api/v1/results')
+        self.assertDictEqual(req.querystring, expected)
+
+    @httpretty.activate
+    def test_results_workers(self):
+        """Test whether pages fetched concurrently are returned in order"""
+
+        setup_http_server()
+
+        client = FunctestClient(FUNCTEST_URL, workers=2)
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        results = [r for r in client.results(from_date=from_date)]
+
+        self.assertEqual(len(results), 2)
+        self.assertDictEqual(results[0], json.loads(read_file('data/functest/functest_results_page_1.json')))
+        self.assertDictEqual(results[1], json.loads(read_file('data/functest/functest_results_page_2.json')))
+
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
+    @httpretty.activate
+    def test_results_headers(self):
+        """Test whether connection and compression headers are sent"""
+
+        setup_http_server()
+
+        client = FunctestClient(FUNCTEST_URL, workers=2, keep_alive=False, compress=False)
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+        _ = [r for r in client.results(from_date=from_date)]
+
+        for req in httpretty.httpretty.latest_requests:
+            self.assertEqual(req.headers['Accept-Encoding'], 'identity')
+            self.assertEqual(req.headers['Connection'], 'close')
+
+    @httpretty.activate
+    def test_results_stream(self):
+        """Test whether pages are decoded incrementally"""
+
+        setup_http_server()
+
+        client = FunctestClient(FUNCTEST_URL, stream=True)
+        from_date = datetime.datetime(2017, 6, 1, 10, 0, 0)
+
+        nitems = []
+        for page in client.results(from_date=from_date):
+            self.assertNotIsInstance(page['results'], list)
+            nitems.append(len([item for item in page['results']]))
+
+        self.assertListEqual(nitems, [20, 7])
+
+        # Pagination is available even when results are not consumed
+        results = [r for r in client.results(from_date=from_date)]
+        self.assertEqual(len(results), 2)
+
+    def test_stream_read_completely(self):
+        """Test whether a warning is logged when streamed pages are read completely"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+
+        with self.assertNoLogs('perceval.backends.opnfv.functest', level='WARNING'):
+            FunctestClient(FUNCTEST_URL, stream=True)
+
+        archive = Archive.create(os.path.join(dirpath, 'archive.sqlite3'))
+
+        with self.assertNoLogs('perceval.backends.opnfv.functest', level='WARNING'):
+            FunctestClient(FUNCTEST_URL, archive=archive, workers=4)
+
+        with self.assertLogs('perceval.backends.opnfv.functest', level='WARNING') as cm:
+            FunctestClient(FUNCTEST_URL, archive=archive, stream=True)
+        self.assertRegex(cm.output[0], "read completely before they are decoded when they are archived;")
+
+        cache = FunctestResponseCache(os.path.join(dirpath, 'cache.sqlite3'))
+        self.addCleanup(cache.close)
+
+        with self.assertLogs('perceval.backends.opnfv.functest', level='WARNING') as cm:
+            FunctestClient(FUNCTEST_URL, workers=4, cache=cache, stream=True)
+        self.assertRegex(cm.output[0], "when they are fetched by several workers, cached;")
+
+
+class TestFunctestCommand(unittest.TestCase):
+    """Tests for FunctestCommand class"""
+
+    def test_backend_class(self):
+        """Test if the backend class is Functest"""
+
+        self.assertIs(FunctestCommand.BACKEND, Functest)
+
+    def test_setup_cmd_parser(self):
+        """Test if it parser object is correctly initialized"""
+
+        parser = FunctestCommand.setup_cmd_parser()
+        self.assertIsInstance(parser, BackendCommandArgumentParser)
+        self.assertEqual(parser._backend, Functest)
+
+        args = ['--from-date', '1970-01-01',
+                '--to-date', '2010-01-01',
+                'http://example.com']
+
+        parsed_args = parser.parse(*args)
+        self.assertListEqual(parsed_args.url, ['http://example.com'])
+        self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
+        self.assertEqual(parsed_args.to_date,
+                         datetime.datetime(2010, 1, 1, 0, 0, 0,
+                                           tzinfo=dateutil.tz.tzutc()))
+        self.assertTrue(parsed_args.ssl_verify)
+        self.assertEqual(parsed_args.workers, 1)
+        self.assertIsNone(parsed_args.checkpoint_file)
+        self.assertIsNone(parsed_args.shard_days)
+        self.assertIsNone(parsed_args.shard_pages)
+        self.assertFalse(parsed_args.stream)
+        self.assertIsNone(parsed_args.pool_size)
+        self.assertTrue(parsed_args.keep_alive)
+        self.assertTrue(parsed_args.compress)
+        self.assertIsNone(parsed_args.projects)
+        self.assertIsNone(parsed_args.cases)
+        self.assertIsNone(parsed_args.installers)
+        self.assertIsNone(parsed_args.pods)
+        self.assertEqual(parsed_args.details, 'full')
+        self.assertIsNone(parsed_args.details_dir)
+        self.assertIsNone(parsed_args.sync_file)
+        self.assertIsNone(parsed_args.max_retries)
+        self.assertIsNone(parsed_args.timeout)
+        self.assertIsNone(parsed_args.cache_file)
+        self.assertIsNone(parsed_args.cache_size)
+        self.assertIsNone(parsed_args.cache_ttl)
+        self.assertFalse(parsed_args.adaptive_rate)
+        self.assertIsNone(parsed_args.max_backoff)
+        self.assertIsNone(parsed_args.latency_factor)
+        self.assertIsNone(parsed_args.stats_interval)
+        self.assertIsNone(parsed_args.stats_file)
+        self.assertFalse(parsed_args.dedupe)
+        self.assertFalse(parsed_args.consistency)
+        self.assertFalse(parsed_args.metrics)
+        self.assertFalse(parsed_args.compress_archive)
+        self.assertIsNone(parsed_args.bloom_capacity)
+        self.assertFalse(parsed_args.follow)
+        self.assertIsNone(parsed_args.follow_interval)
+        self.assertIsNone(parsed_args.follow_max_interval)
+        self.assertIsNone(parsed_args.follow_lookback)
+        self.assertIsNone(parsed_args.export_file)
+        self.assertEqual(parsed_args.export_format, 'ndjson')
+        self.assertIsNone(parsed_args.export_batch_size)
+
+        args = ['http://example.com', '--no-archive', '--no-ssl-verify',
+                '--workers', '4', '--checkpoint-file', '/tmp/checkpoint.json',
+                '--shard-days', '7', '--shard-pages', '100', '--stream',
+                '--pool-size', '20', '--no-keep-alive', '--no-compression',
+                '--project', 'functest', '--case', 'api_check',
+                '--installer', 'fuel', '--installer', 'daisy',
+                '--pod', 'lf-pod2', '--details', 'external',
+                '--details-dir', '/tmp/details', '--sync-file', '/tmp/sync.json',
+                '--max-retries', '10', '--timeout', '30',
+                '--adaptive-rate', '--max-backoff', '30',
+                '--latency-factor', '2.5', '--cache-file', '/tmp/cache.sqlite3',
+                '--cache-size', '64', '--cache-ttl', '600',
+                '--export-file', '/tmp/items.csv.gz', '--export-format', 'csv',
+                '--export-batch-size', '5000',
+                '--stats-interval', '60', '--stats-file', '/tmp/stats.jsonl',
+                '--consistency', '--bloom-capacity', '1000000', '--metrics',
+                '--follow', '--follow-interval', '2', '--follow-max-interval', '30',
+                '--follow-lookback', '1800', '--compress-archive']
+        parsed_args = parser.parse(*args)
+        self.assertListEqual(parsed_args.url, ['http://example.com'])
+        self.assertTrue(parsed_args.no_archive)
+        self.assertFalse(parsed_args.ssl_verify)
+        self.assertEqual(parsed_args.workers, 4)
+        self.assertEqual(parsed_args.checkpoint_file, '/tmp/checkpoint.json')
+        self.assertEqual(parsed_args.shard_days, 7)
+        self.assertEqual(parsed_args.shard_pages, 100)
+        self.assertTrue(parsed_args.stream)
+        self.assertEqual(parsed_args.pool_size, 20)
+        self.assertFalse(parsed_args.keep_alive)
+        self.assertFalse(parsed_args.compress)
+        self.assertListEqual(parsed_args.projects, ['functest'])
+        self.assertListEqual(parsed_args.cases, ['api_check'])
+        self.assertListEqual(parsed_args.installers, ['fuel', 'daisy'])
+        self.assertListEqual(parsed_args.pods, ['lf-pod2'])
+        self.assertEqual(parsed_args.details, 'external')
+        self.assertEqual(parsed_args.details_dir, '/tmp/details')
+        self.assertEqual(parsed_args.sync_file, '/tmp/sync.json')
+        self.assertEqual(parsed_args.max_retries, 10)
+        self.assertEqual(parsed_args.timeout, 30)
+        self.assertTrue(parsed_args.adaptive_rate)
+        self.assertEqual(parsed_args.max_backoff, 30)
+        self.assertEqual(parsed_args.latency_factor, 2.5)
+        self.assertEqual(parsed_args.cache_file, '/tmp/cache.sqlite3')
+        self.assertEqual(parsed_args.cache_size, 64)
+        self.assertEqual(parsed_args.cache_ttl, 600)
+        self.assertEqual(parsed_args.export_file, '/tmp/items.csv.gz')
+        self.assertEqual(parsed_args.export_format, 'csv')
+        self.assertEqual(parsed_args.export_batch_size, 5000)
+        self.assertEqual(parsed_args.stats_interval, 60)
+        self.assertEqual(parsed_args.stats_file, '/tmp/stats.jsonl')
+        self.assertTrue(parsed_args.consistency)
+        self.assertEqual(parsed_args.bloom_capacity, 1000000)
+        self.assertTrue(parsed_args.metrics)
+        self.assertTrue(parsed_args.follow)
+        self.assertEqual(parsed_args.follow_interval, 2)
+        self.assertEqual(parsed_args.follow_max_interval, 30)
+        self.assertEqual(parsed_args.follow_lookback, 1800)
+        self.assertTrue(parsed_args.compress_archive)
+
+        args = ['http://example.com', 'http://mirror.example.com', '--dedupe']
+        parsed_args = parser.parse(*args)
+        self.assertListEqual(parsed_args.url, ['http://example.com', 'http://mirror.example.com'])
+        self.assertTrue(parsed_args.dedupe)
+
+    @httpretty.activate
+    def test_export(self):
+        """Test whether the command exports the items instead of writing them as JSON"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+
+        export_file = os.path.join(dirpath, 'items.ndjson.gz')
+        outfile = os.path.join(dirpath, 'out.json')
+
+        setup_http_server()
+
+        args = [FUNCTEST_URL, '--no-archive', '--to-date', '2017-06-01 11:00:00',
+                '--export-file', export_file, '-o', outfile]
+
+        cmd = FunctestCommand(*args)
+        cmd.run()
+        cmd.outfile.close()
+
+        with gzip.open(export_file, 'rt') as fd:
+            rows = [json.loads(line) for line in fd]
+
+        self.assertEqual(len(rows), 27)
+        self.assertEqual(rows[0]['id'], '592ff62c78a2ad000ae6af4d')
+        self.assertEqual(rows[0]['duration'], 669.0)
+        self.assertEqual(read_file(outfile), '')
+
+    @httpretty.activate
+    def test_follow(self):
+        """Test whether the command writes new items until it is terminated"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+        outfile = os.path.join(dirpath, 'out.json')
+
+        setup_http_server_windows(page_size=100)
+
+        archive_path = os.path.join(dirpath, 'archives')
+
+        args = [FUNCTEST_URL, '--archive-path', archive_path, '--from-date', '2017-06-01 10:00:00',
+                '--follow', '--follow-interval', '0.01', '--follow-lookback', '600',
+                '--case', 'rally_sanity', '-o', outfile]
+
+        cmd = FunctestCommand(*args)
+
+        timer = threading.Timer(0.5, os.kill, args=(os.getpid(), signal.SIGTERM))
+        timer.start()
+        cmd.run()
+        cmd.outfile.close()
+        timer.join()
+
+        lines = read_file(outfile).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['data']['_id'], '592ff59378a2ad000ae6af4c')
+        self.assertEqual(json.loads(lines[1])['data']['case_name'], 'rally_sanity')
+
+        # Polls are not archived
+        self.assertListEqual(os.listdir(archive_path), [])
+
+        # The previous handler is restored
+        self.assertEqual(signal.getsignal(signal.SIGTERM), signal.SIG_DFL)
+
+    def test_follow_invalid_arguments(self):
+        """Test whether an exception is thrown when follow is combined with output options"""
+
+        dirpath = tempfile.mkdtemp(prefix='perceval-opnfv_')
+        self.addCleanup(shutil.rmtree, dirpath)
+
+        invalid_args = [
+            ['--export-file', os.path.join(dirpath, 'items.csv')],
+            ['--export-format', 'csv'],
+            ['--export-batch-size', '10'],
+        ]
+
+        for extra_args in invalid_args:
+            args = [FUNCTEST_URL, '--no-archive', '--follow'] + extra_args
+            with self.assertRaisesRegex(AttributeError, "follow and export arguments are not compatible"):
+                FunctestCommand(*args)
+
+        args = [FUNCTEST_URL, '--no-archive', '--follow', '--json-line']
+        with self.assertRaisesRegex(AttributeError, "follow and json-line arguments are not compatible"):
+            FunctestCommand(*args)
+
+        # Export options can be used without following
+        args = [FUNCTEST_URL, '--no-archive', '--json-line', '--export-format', 'csv']
+        cmd = FunctestCommand(*args)
+        self.assertEqual(cmd.parsed_args.export_format, 'csv')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import datetime
+import json
+import unittest
+
+import dateutil.tz
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from perceval.errors import BackendError
+from perceval.backends.opnfv.store import FunctestStore
+
+
+def read_file(filename, mode='r'):
+    with open(filename, mode) as f:
+        content = f.read()
+    return content
+
+
+class TestFunctestStore(unittest.TestCase):
+    """FunctestStore tests"""
+
+    def setUp(self):
+        results = json.loads(read_file('data/functest/functest_results.json'))['results']
+        self.items = [{'uuid': str(i), 'data': result} for i, result in enumerate(results)]
+
+    def test_load(self):
+        """Test whether items are stored by columns with encoded values"""
+
+        store = FunctestStore()
+        self.assertEqual(store.load(self.items), 27)
+        self.assertEqual(len(store), 27)
+
+        self.assertListEqual(store.values('installer'), ['fuel', 'daisy'])
+        self.assertListEqual(store.values('version'), ['danube', 'master'])
+        self.assertListEqual(store.values('criteria'), ['PASS', 'FAILED'])
+        self.assertEqual(len(store.values('pod_name')), 5)
+
+        record = store.record(0)
+        expected = {
+            'uuid': '0',
+            '_id': '592ff62c78a2ad000ae6af4d',
+            'project_name': 'functest',
+            'case_name': 'snaps_smoke',
+            'installer': 'fuel',
+            'pod_name': 'lf-pod2',
+            'scenario': 'os-nosdn-kvm_ovs_dpdk_bar-ha',
+            'version': 'danube',
+            'build_tag': 'jenkins-functest-fuel-baremetal-daily-danube-515',
+            'criteria': 'PASS',
+            'start_date': datetime.datetime(2017, 6, 1, 10, 59, 27, tzinfo=dateutil.tz.tzutc()),
+            'stop_date': datetime.datetime(2017, 6, 1, 11, 10, 36, tzinfo=dateutil.tz.tzutc())
+        }
+        self.assertDictEqual(record, expected)
+
+    def test_load_duplicates(self):
+        """Test whether items already in the store are skipped"""
+
+        store = FunctestStore(self.items[:20])
+
+        # Overlapping sets of items, like the ones of two fetches
+        self.assertEqual(store.load(self.items[10:]), 27)
+        self.assertListEqual(store.uuids, [item['uuid'] for item in self.items])
+        self.assertEqual(store.count(case_name='rally_sanity'), 2)
+
+        self.assertFalse(store.add(self.items[0]))
+        self.assertTrue(store.add({'uuid': 'new', 'data': {'_id': self.items[0]['data']['_id']}}))
+        self.assertEqual(len(store), 28)
+
+    def test_load_missing_values(self):
+        """Test whether missing fields and invalid dates are stored as None"""
+
+        store = FunctestStore([{'uuid': '0', 'data': {'_id': '1', 'start_date': 'not a date'}}])
+
+        record = store.record(0)
+        self.assertEqual(record['_id'], '1')
+        self.assertIsNone(record['installer'])
+        self.assertIsNone(record['start_date'])
+        self.assertIsNone(record['stop_date'])
+
+        self.assertListEqual(store.find(installer=None), [0])
+        self.assertListEqual(store.find(from_date=datetime.datetime(1970, 1, 1)), [])
+
+    def test_find(self):
+        """Test whether items are found by their fields"""
+
+        store = FunctestStore(self.items)
+
+        self.assertListEqual(store.find(), list(range(27)))
+        self.assertListEqual(store.find(installer='fuel', pod_name='lf-pod2'),
+                             [0, 8, 15, 21, 22, 23, 24, 25, 26])
+        self.assertListEqual(store.find(case_name='rally_sanity'), [1, 15])
+        self.assertListEqual(store.find(case_name='rally_sanity', pod_name='lf-pod2'), [15])
+        self.assertEqual(store.count(installer=['fuel', 'daisy']), 27)
+        self.assertListEqual(store.find(installer='unknown'), [])
+        self.assertListEqual(store.find(installer='fuel', pod_name='unknown'), [])
+
+        records = list(store.select(case_name='rally_sanity'))
+        self.assertListEqual([r['_id'] for r in records],
+                             ['592ff59378a2ad000ae6af4c', self.items[15]['data']['_id']])
+
+    def test_find_dates(self):
+        """Test whether items are found by a range of start dates"""
+
+        store = FunctestStore(self.items)
+
+        from_date = datetime.datetime(2017, 6, 1, 10, 50)
+        to_date = datetime.datetime(2017, 6, 1, 10, 55, 33)
+
+        self.assertListEqual(store.find(from_date=from_date, to_date=to_date), [1, 2, 3])
+        self.assertListEqual(store.find(from_date=from_date), [0, 1, 2, 3])
+        self.assertListEqual(store.find(from_date=from_date, installer='fuel'), [0, 1, 2, 3])
+        self.assertListEqual(store.find(to_date=to_date, case_name='rally_sanity'), [1, 15])
+        self.assertEqual(store.count(to_date=datetime.datetime(2017, 6, 1, 10, 0)), 0)
+
+        # The sorted dates are updated when new items are added
+        store.add({'uuid': 'new', 'data': {'_id': 'new', 'start_date': '2017-06-01 10:53:00'}})
+        self.assertListEqual(store.find(from_date=from_date, to_date=to_date), [1, 2, 3, 27])
+
+    def test_find_invalid_field(self):
+        """Test whether an error is raised when a filter is not a field"""
+
+        store = FunctestStore(self.items)
+
+        with self.assertRaisesRegex(BackendError, "details is not a field of the store"):
+            store.find(details='full')
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_aggregate(self):
+        """Test whether items are aggregated by fields"""
+
+        store = FunctestStore(self.items)
+
+        aggregations = store.aggregate(by=['installer', 'version'])
+        expected = [
+            {
+                'installer': 'fuel', 'version': 'danube',
+                'items': 22, 'passed': 22, 'failed': 0, 'pass_rate': 100.0,
+                'duration_p50': 85.0, 'duration_p90': 898.2, 'duration_p99': 1368.03
+            },
+            {
+                'installer': 'fuel', 'version': 'master',
+                'items': 3, 'passed': 2, 'failed': 1, 'pass_rate': 66.67,
+                'duration_p50': 103.0, 'duration_p90': 109.4, 'duration_p99': 110.84
+            },
+            {
+                'installer': 'daisy', 'version': 'master',
+                'items': 2, 'passed': 2, 'failed': 0, 'pass_rate': 100.0,
+                'duration_p50': 97.5, 'duration_p90': 173.9, 'duration_p99': 191.09
+            }
+        ]
+        self.assertEqual(len(aggregations), len(expected))
+        for aggregation, exp in zip(aggregations, expected):
+            self.assertListEqual(list(aggregation.keys()), list(exp.keys()))
+            for key, value in exp.items():
+                self.assertAlmostEqual(aggregation[key], value, places=6)
+
+        # Durations match the percentiles of numpy
+        durations = [(stop - start).total_seconds()
+                     for start, stop in ((r['start_date'], r['stop_date'])
+                                         for r in store.select(installer='fuel', version='danube'))]
+        self.assertAlmostEqual(aggregations[0]['duration_p90'], numpy.percentile(durations, 90))
+
+        aggregations = store.aggregate(by=['pod_name'], percentiles=[50], installer='daisy')
+        expected = [{
+            'pod_name': 'zte-virtual1',
+            'items': 2, 'passed': 2, 'failed': 0, 'pass_rate': 100.0,
+            'duration_p50': 97.5
+        }]
+        self.assertListEqual(aggregations, expected)
+
+        self.assertEqual(len(store.aggregate()), 27)
+        self.assertListEqual(store.aggregate(installer='unknown'), [])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_group_keys(self):
+        """Test whether combinations of codes are found when they do not fit in 64 bits"""
+
+        keys = [numpy.array([3, 1, 3, 0]), numpy.array([7, 2, 7, 2])]
+
+        for sizes in ([4, 8], [2 ** 40, 2 ** 40]):
+            groups, inverse = FunctestStore._group_keys(numpy, keys, sizes, 4)
+            self.assertListEqual(groups.tolist(), [[0, 2], [1, 2], [3, 7]])
+            self.assertListEqual(inverse.tolist(), [2, 1, 2, 0])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_aggregate_buckets(self):
+        """Test whether items are aggregated by buckets of time and updated with new items"""
+
+        store = FunctestStore(self.items)
+
+        aggregations = store.aggregate(by=[], bucket=1800, percentiles=[])
+        expected = [
+            {
+                'bucket': datetime.datetime(2017, 6, 1, 10, 0, tzinfo=dateutil.tz.tzutc()),
+                'items': 11, 'passed': 10, 'failed': 1, 'pass_rate': 90.91
+            },
+            {
+                'bucket': datetime.datetime(2017, 6, 1, 10, 30, tzinfo=dateutil.tz.tzutc()),
+                'items': 16, 'passed': 16, 'failed': 0, 'pass_rate': 100.0
+            }
+        ]
+        self.assertListEqual(aggregations, expected)
+
+        # New items are aggregated; items with no dates or criteria are not judged
+        store.add({'uuid': 'new', 'data': {'_id': 'new', 'criteria': 'FAILED',
+                                           'start_date': '2017-06-01 11:05:00'}})
+        store.add({'uuid': 'none', 'data': {'_id': 'none'}})
+
+        aggregations = store.aggregate(by=[], bucket=1800, percentiles=[50])
+        self.assertEqual(len(aggregations), 3)
+        expected = {
+            'bucket': datetime.datetime(2017, 6, 1, 11, 0, tzinfo=dateutil.tz.tzutc()),
+            'items': 1, 'passed': 0, 'failed': 1, 'pass_rate': 0.0, 'duration_p50': None
+        }
+        self.assertDictEqual(aggregations[2], expected)
+
+        aggregations = store.aggregate(by=['criteria'], percentiles=[])
+        expected = [
+            {'criteria': 'PASS', 'items': 26, 'passed': 26, 'failed': 0, 'pass_rate': 100.0},
+            {'criteria': 'FAILED', 'items': 2, 'passed': 0, 'failed': 2, 'pass_rate': 0.0},
+            {'criteria': None, 'items': 1, 'passed': 0, 'failed': 0, 'pass_rate': None}
+        ]
+        self.assertListEqual(aggregations, expected)
+
+    def test_track(self):
+        """Test whether tracked aggregations are updated as items are added"""
+
+        store = FunctestStore(self.items[:20])
+        store.track(by=['installer', 'version'])
+        store.load(self.items[10:])
+
+        aggregations = store.aggregate(by=['installer', 'version'])
+        expected = [
+            {
+                'installer': 'fuel', 'version': 'danube',
+                'items': 22, 'passed': 22, 'failed': 0, 'pass_rate': 100.0,
+                'duration_p50': 85.0, 'duration_p90': 898.2, 'duration_p99': 1368.03
+            },
+            {
+                'installer': 'fuel', 'version': 'master',
+                'items': 3, 'passed': 2, 'failed': 1, 'pass_rate': 66.67,
+                'duration_p50': 103.0, 'duration_p90': 109.4, 'duration_p99': 110.84
+            },
+            {
+                'installer': 'daisy', 'version': 'master',
+                'items': 2, 'passed': 2, 'failed': 0, 'pass_rate': 100.0,
+                'duration_p50': 97.5, 'duration_p90': 173.9, 'duration_p99': 191.09
+            }
+        ]
+        self.assertEqual(len(aggregations), len(expected))
+        for aggregation, exp in zip(aggregations, expected):
+            self.assertListEqual(list(aggregation.keys()), list(exp.keys()))
+            for key, value in exp.items():
+                self.assertAlmostEqual(aggregation[key], value, places=6)
+
+        # Tracking the same grouping again changes nothing
+        store.track(by=['installer', 'version'])
+        self.assertListEqual(store.aggregate(by=['installer', 'version']), aggregations)
+
+    def test_track_buckets(self):
+        """Test whether tracked aggregations by buckets of time are updated"""
+
+        store = FunctestStore(self.items)
+        store.track(by=[], bucket=1800)
+
+        store.add({'uuid': 'new', 'data': {'_id': 'new', 'criteria': 'FAILED',
+                                           'start_date': '2017-06-01 11:05:00'}})
+        store.add({'uuid': 'none', 'data': {'_id': 'none'}})
+
+        aggregations = store.aggregate(by=[], bucket=1800, percentiles=[])
+        expected = [
+            {
+                'bucket': datetime.datetime(2017, 6, 1, 10, 0, tzinfo=dateutil.tz.tzutc()),
+                'items': 11, 'passed': 10, 'failed': 1, 'pass_rate': 90.91
+            },
+            {
+                'bucket': datetime.datetime(2017, 6, 1, 10, 30, tzinfo=dateutil.tz.tzutc()),
+                'items': 16, 'passed': 16, 'failed': 0, 'pass_rate': 100.0
+            },
+            {
+                'bucket': datetime.datetime(2017, 6, 1, 11, 0, tzinfo=dateutil.tz.tzutc()),
+                'items': 1, 'passed': 0, 'failed': 1, 'pass_rate': 0.0
+            }
+        ]
+        self.assertListEqual(aggregations, expected)
+
+        aggregations = store.aggregate(by=[], bucket=1800, percentiles=[50])
+        self.assertIsNone(aggregations[2]['duration_p50'])
+
+    def test_track_invalid_field(self):
+        """Test whether an error is raised when a tracked field is not valid"""
+
+        store = FunctestStore(self.items)
+
+        with self.assertRaisesRegex(BackendError, "details is not a field of the store"):
+            store.track(by=['details'])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_track_matches_aggregate(self):
+        """Test whether tracked aggregations match the ones calculated from the columns"""
+
+        groupings = [
+            ([], None),
+            (['criteria'], None),
+            (['installer', 'pod_name'], 600),
+            (None, 3600)
+        ]
+
+        tracked = FunctestStore()
+        for by, bucket in groupings:
+            tracked.track(by=by, bucket=bucket)
+
+        tracked.load(self.items[:15])
+        tracked.load(self.items[5:])
+        tracked.add({'uuid': 'none', 'data': {'_id': 'none', 'stop_date': '2017-06-01 11:05:00'}})
+
+        store = FunctestStore(self.items)
+        store.add({'uuid': 'none', 'data': {'_id': 'none', 'stop_date': '2017-06-01 11:05:00'}})
+
+        for by, bucket in groupings:
+            expected = store.aggregate(by=by, bucket=bucket, percentiles=[0, 25, 50, 90, 100])
+            aggregations = tracked.aggregate(by=by, bucket=bucket, percentiles=[0, 25, 50, 90, 100])
+            self.assertListEqual(aggregations, expected)
+
+        # Filters and dates are not served by the tracked aggregations
+        expected = store.aggregate(by=['criteria'], installer='daisy')
+        self.assertListEqual(tracked.aggregate(by=['criteria'], installer='daisy'), expected)
+        self.assertEqual(expected[0]['items'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')